@@ -0,0 +1,20 @@
+@echo off
+setlocal enabledelayedexpansion
+
+set SCRIPT_DIR=%~dp0
+pushd "%SCRIPT_DIR%"
+
+if not exist bench.py (
+  echo bench.py not found in %SCRIPT_DIR%
+  popd
+  exit /b 1
+)
+
+rem bench.py only uses the standard library; the virtual environment is optional.
+if exist ".venv\Scripts\activate" call ".venv\Scripts\activate"
+
+echo Running bench.py ...
+python bench.py %*
+
+popd
+endlocal
@@ -0,0 +1,574 @@
+import argparse
+import asyncio
+import json
+import re
+import ssl
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+from hapi_cli_common import ensure_python_version
+
+RELEASES = ("hapi-fhir-general", "hapi-fhir-terminology")
+WORKLOADS = ("transaction", "search", "expand", "validate-code", "lookup")
+DEFAULT_WORKLOADS = {
+    "hapi-fhir-general": ["transaction", "search"],
+    "hapi-fhir-terminology": ["expand", "validate-code", "lookup"],
+}
+PERCENTILES = (50, 95, 99)
+FHIR_JSON = "application/fhir+json"
+REQUEST_TIMEOUT = 30.0
+
+# Terminology workloads run against this small code system, uploaded by --seed.
+BENCH_CODE_SYSTEM = "http://example.org/fhir/CodeSystem/hapi-bench"
+BENCH_VALUE_SET = "http://example.org/fhir/ValueSet/hapi-bench"
+BENCH_CODES = [f"bench-{index:03d}" for index in range(50)]
+
+
+class HttpConnection:
+    """A single keep-alive HTTP/1.1 connection driven by asyncio streams."""
+
+    def __init__(self, base_url: str, timeout: float = REQUEST_TIMEOUT) -> None:
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self) -> None:
+        context = ssl.create_default_context() if self.scheme == "https" else None
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+        self._reader = self._writer = None
+
+    def resolve(self, target: str) -> str:
+        """Turn a path relative to the FHIR base, or an absolute link, into a request path."""
+        if target.startswith(("http://", "https://")):
+            # HAPI builds paging links from HAPI_FHIR_SERVER_ADDRESS (0.0.0.0 in our values),
+            # so only the path and query are kept and sent to the host being tested.
+            parts = urlsplit(target)
+            return parts.path + (f"?{parts.query}" if parts.query else "")
+        return f"{self.base_path}/{target.lstrip('/')}"
+
+    async def request(
+        self, method: str, target: str, body: Optional[bytes] = None
+    ) -> Tuple[int, bytes]:
+        path = self.resolve(target)
+        for attempt in (1, 2):
+            if self._writer is None:
+                await self._connect()
+            try:
+                return await asyncio.wait_for(self._exchange(method, path, body), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # The server may close an idle keep-alive connection; retry once on a fresh one.
+                await self.close()
+                if attempt == 2:
+                    raise
+            except asyncio.TimeoutError:
+                await self.close()
+                raise
+        raise AssertionError("unreachable")
+
+    async def _exchange(self, method: str, path: str, body: Optional[bytes]) -> Tuple[int, bytes]:
+        assert self._reader is not None and self._writer is not None
+        host = self.host if self.port in (80, 443) else f"{self.host}:{self.port}"
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {host}",
+            f"Accept: {FHIR_JSON}",
+            "Connection: keep-alive",
+        ]
+        if body is not None:
+            lines += [f"Content-Type: {FHIR_JSON}", f"Content-Length: {len(body)}"]
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before the response")
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status < 200 or status in (204, 304):
+            # These responses never carry a body, whatever their headers say.
+            payload = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            payload = b"".join(chunks)
+        elif "content-length" in headers:
+            payload = await self._reader.readexactly(int(headers["content-length"]))
+        else:
+            payload = await self._reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, payload
+
+
+@dataclass
+class WorkloadStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+    def record(self, seconds: float, status: str, ok: bool) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(stats: WorkloadStats, elapsed: float) -> Dict:
+    ordered = sorted(stats.latencies)
+    count = len(ordered)
+    summary = {
+        "requests": count,
+        "errors": stats.errors,
+        "error_rate": round(stats.errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "statuses": dict(sorted(stats.statuses.items())),
+        "latency_ms": {f"p{pct}": round(percentile(ordered, pct) * 1000, 2) for pct in PERCENTILES},
+    }
+    if ordered:
+        summary["latency_ms"]["mean"] = round(sum(ordered) / count * 1000, 2)
+        summary["latency_ms"]["max"] = round(ordered[-1] * 1000, 2)
+    return summary
+
+
+def transaction_bundle(size: int) -> bytes:
+    entries = []
+    for index in range(size):
+        entries.append(
+            {
+                "fullUrl": f"urn:uuid:{uuid.uuid4()}",
+                "resource": {
+                    "resourceType": "Patient",
+                    "identifier": [{"system": "urn:hapi-bench", "value": str(uuid.uuid4())}],
+                    "name": [{"family": "Bench", "given": [f"Load{index}"]}],
+                    "gender": "unknown",
+                },
+                "request": {"method": "POST", "url": "Patient"},
+            }
+        )
+    return json.dumps({"resourceType": "Bundle", "type": "transaction", "entry": entries}).encode()
+
+
+def _next_link(payload: bytes) -> Optional[str]:
+    try:
+        bundle = json.loads(payload)
+    except ValueError:
+        return None
+    for link in bundle.get("link", []):
+        if link.get("relation") == "next":
+            return link.get("url")
+    return None
+
+
+Operation = Callable[[HttpConnection, int, Callable[[str, float, str, bool], None]], Awaitable[None]]
+
+
+async def _timed_request(
+    conn: HttpConnection,
+    record: Callable[[str, float, str, bool], None],
+    workload: str,
+    method: str,
+    target: str,
+    body: Optional[bytes] = None,
+) -> Optional[bytes]:
+    started = time.perf_counter()
+    try:
+        status, payload = await conn.request(method, target, body)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as err:
+        record(workload, time.perf_counter() - started, type(err).__name__, False)
+        return None
+    record(workload, time.perf_counter() - started, str(status), status < 400)
+    return payload if status < 400 else None
+
+
+def build_operations(args: argparse.Namespace) -> Dict[str, Operation]:
+    bundle_size = args.bundle_size
+
+    async def transaction(conn, iteration, record):
+        await _timed_request(conn, record, "transaction", "POST", "", transaction_bundle(bundle_size))
+
+    async def search(conn, iteration, record):
+        payload = await _timed_request(conn, record, "search", "GET", f"Patient?_count={args.count}")
+        for _ in range(args.pages - 1):
+            link = _next_link(payload) if payload else None
+            if not link:
+                break
+            payload = await _timed_request(conn, record, "search", "GET", link)
+
+    def code(iteration: int) -> str:
+        return BENCH_CODES[iteration % len(BENCH_CODES)]
+
+    async def expand(conn, iteration, record):
+        await _timed_request(conn, record, "expand", "GET", f"ValueSet/$expand?url={quote(args.value_set, safe='')}")
+
+    async def validate_code(conn, iteration, record):
+        target = f"CodeSystem/$validate-code?url={quote(args.code_system, safe='')}&code={code(iteration)}"
+        await _timed_request(conn, record, "validate-code", "GET", target)
+
+    async def lookup(conn, iteration, record):
+        target = f"CodeSystem/$lookup?system={quote(args.code_system, safe='')}&code={code(iteration)}"
+        await _timed_request(conn, record, "lookup", "GET", target)
+
+    return {
+        "transaction": transaction,
+        "search": search,
+        "expand": expand,
+        "validate-code": validate_code,
+        "lookup": lookup,
+    }
+
+
+def seed_resources() -> List[Tuple[str, Dict]]:
+    code_system = {
+        "resourceType": "CodeSystem",
+        "id": "hapi-bench",
+        "url": BENCH_CODE_SYSTEM,
+        "status": "active",
+        "content": "complete",
+        "concept": [{"code": code, "display": f"Benchmark concept {code}"} for code in BENCH_CODES],
+    }
+    value_set = {
+        "resourceType": "ValueSet",
+        "id": "hapi-bench",
+        "url": BENCH_VALUE_SET,
+        "status": "active",
+        "compose": {"include": [{"system": BENCH_CODE_SYSTEM}]},
+    }
+    return [("CodeSystem/hapi-bench", code_system), ("ValueSet/hapi-bench", value_set)]
+
+
+async def seed(base_url: str) -> None:
+    conn = HttpConnection(base_url)
+    try:
+        for target, resource in seed_resources():
+            status, payload = await conn.request("PUT", target, json.dumps(resource).encode())
+            if status >= 400:
+                raise RuntimeError(f"PUT {target} returned {status}: {payload[:200]!r}")
+            print(f"Seeded {target} ({status}).", file=sys.stderr)
+    finally:
+        await conn.close()
+
+
+async def run_workload(
+    base_url: str, operation: Operation, concurrency: int, duration: float, max_operations: int
+) -> Tuple[Dict[str, WorkloadStats], float]:
+    """Run ``operation`` from ``concurrency`` workers, one connection each, until time or count runs out."""
+    stats: Dict[str, WorkloadStats] = {}
+    counter = iter(range(max_operations if max_operations > 0 else sys.maxsize))
+    deadline = time.perf_counter() + duration if duration > 0 else float("inf")
+
+    def record(workload: str, seconds: float, status: str, ok: bool) -> None:
+        stats.setdefault(workload, WorkloadStats()).record(seconds, status, ok)
+
+    async def worker() -> None:
+        conn = HttpConnection(base_url)
+        try:
+            for iteration in counter:
+                if time.perf_counter() >= deadline:
+                    break
+                await operation(conn, iteration, record)
+        finally:
+            await conn.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return stats, time.perf_counter() - started
+
+
+async def run_benchmark(base_url: str, args: argparse.Namespace) -> Dict:
+    if args.seed:
+        await seed(base_url)
+    operations = build_operations(args)
+    results: Dict[str, Dict] = {}
+    for name in args.workloads:
+        print(f"Running {name} with concurrency {args.concurrency}...", file=sys.stderr)
+        stats, elapsed = await run_workload(
+            base_url, operations[name], args.concurrency, args.duration, args.requests
+        )
+        for workload, workload_stats in stats.items():
+            results[workload] = {"elapsed_seconds": round(elapsed, 3), **summarize(workload_stats, elapsed)}
+    return {
+        "target": base_url,
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "max_operations": args.requests,
+        "workloads": results,
+    }
+
+
+def discover_target(release: str, namespace: Optional[str] = None) -> str:
+    """Return the FHIR base URL of ``release``'s LoadBalancer service via kubectl."""
+    command = ["kubectl", "get", "svc", "-o", "json"]
+    command += ["-n", namespace] if namespace else ["-A"]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=False)
+    except FileNotFoundError:
+        raise RuntimeError("kubectl is not installed; pass --target instead.")
+    if result.returncode != 0:
+        raise RuntimeError(f"kubectl get svc failed: {result.stderr.strip()}")
+    try:
+        services = json.loads(result.stdout).get("items", [])
+    except ValueError:
+        raise RuntimeError("kubectl get svc did not return JSON.")
+    for service in services:
+        if service["metadata"]["name"] != release:
+            continue
+        ingress = service.get("status", {}).get("loadBalancer", {}).get("ingress") or []
+        if not ingress:
+            raise RuntimeError(f"Service {release} has no LoadBalancer address yet.")
+        host = ingress[0].get("hostname") or ingress[0].get("ip")
+        port = service["spec"]["ports"][0]["port"]
+        return f"http://{host}:{port}/fhir"
+    raise RuntimeError(f"No service named {release} found.")
+
+
+class FhirStubHandler(BaseHTTPRequestHandler):
+    """Just enough of a FHIR server to exercise every workload offline."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle on, the body waits for the
+    # client's delayed ACK and every response picks up ~40 ms.
+    disable_nagle_algorithm = True
+    patients = 250
+    delay = 0.0
+
+    def log_message(self, format, *args) -> None:  # noqa: A002 - signature from BaseHTTPRequestHandler
+        pass
+
+    def _send(self, status: int, resource: Dict) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+        body = json.dumps(resource).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", FHIR_JSON)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _outcome(self, status: int, message: str) -> None:
+        self._send(
+            status,
+            {
+                "resourceType": "OperationOutcome",
+                "issue": [{"severity": "error", "code": "processing", "diagnostics": message}],
+            },
+        )
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        path = re.sub(r"^/fhir", "", parts.path)
+        if path == "/metadata":
+            self._send(200, {"resourceType": "CapabilityStatement", "status": "active", "kind": "instance"})
+        elif path in ("/Patient", "") and ("_count" in query or "_getpages" in query):
+            count = int(query.get("_count", 20))
+            offset = int(query.get("_getpagesoffset", 0))
+            entries = [
+                {"resource": {"resourceType": "Patient", "id": str(index)}}
+                for index in range(offset, min(offset + count, self.patients))
+            ]
+            links = [{"relation": "self", "url": f"http://0.0.0.0:8080/fhir{self.path}"}]
+            if offset + count < self.patients:
+                links.append(
+                    {
+                        "relation": "next",
+                        "url": f"http://0.0.0.0:8080/fhir?_getpages=stub&_getpagesoffset={offset + count}&_count={count}",
+                    }
+                )
+            self._send(
+                200,
+                {"resourceType": "Bundle", "type": "searchset", "total": self.patients, "link": links, "entry": entries},
+            )
+        elif path == "/ValueSet/$expand":
+            contains = [{"system": BENCH_CODE_SYSTEM, "code": code} for code in BENCH_CODES]
+            self._send(200, {"resourceType": "ValueSet", "url": query.get("url"), "expansion": {"contains": contains}})
+        elif path in ("/CodeSystem/$validate-code", "/CodeSystem/$lookup"):
+            known = query.get("code") in BENCH_CODES
+            if path.endswith("$lookup") and not known:
+                self._outcome(404, f"Unknown code {query.get('code')}")
+                return
+            parameter = {"name": "result", "valueBoolean": known} if path.endswith("validate-code") else {
+                "name": "display",
+                "valueString": f"Benchmark concept {query.get('code')}",
+            }
+            self._send(200, {"resourceType": "Parameters", "parameter": [parameter]})
+        else:
+            self._outcome(404, f"Unknown resource {path}")
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        bundle = self._body()
+        if bundle.get("resourceType") != "Bundle" or bundle.get("type") != "transaction":
+            self._outcome(400, "Only transaction Bundles are accepted")
+            return
+        entries = [
+            {"response": {"status": "201 Created", "location": f"Patient/{uuid.uuid4()}/_history/1"}}
+            for _ in bundle.get("entry", [])
+        ]
+        self._send(200, {"resourceType": "Bundle", "type": "transaction-response", "entry": entries})
+
+    def do_PUT(self) -> None:  # noqa: N802 - http.server naming
+        self._send(200, self._body())
+
+
+class FhirStubServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections at benchmark concurrency, which shows up as
+    # one-second SYN retransmits in the latency tail.
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def start_stub_server(port: int = 0, delay: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve FhirStubHandler on 127.0.0.1 from a daemon thread; return the server and its base URL."""
+    handler = type("ConfiguredFhirStubHandler", (FhirStubHandler,), {"delay": delay})
+    server = FhirStubServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/fhir"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measure latency and throughput of the deployed HAPI FHIR releases."
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--target", help="FHIR base URL, e.g. http://host:8080/fhir.")
+    target.add_argument(
+        "--release",
+        choices=RELEASES,
+        default="hapi-fhir-general",
+        help="Find the base URL from this release's LoadBalancer service (default hapi-fhir-general).",
+    )
+    target.add_argument(
+        "--stub", action="store_true", help="Benchmark an in-process FHIR stub (tests the harness offline)."
+    )
+    parser.add_argument("--namespace", help="Namespace of the release's service (default: search all).")
+    parser.add_argument(
+        "--workload",
+        dest="workloads",
+        action="append",
+        choices=WORKLOADS,
+        help="Workload to run; repeat for several. Defaults depend on the release.",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent connections (default 8).")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per workload (default 30; 0 = no limit).")
+    parser.add_argument(
+        "--requests", type=int, default=0, help="Stop each workload after this many operations (default: no limit)."
+    )
+    parser.add_argument("--bundle-size", type=int, default=10, help="Entries per transaction Bundle (default 10).")
+    parser.add_argument("--count", type=int, default=50, help="_count for search pages (default 50).")
+    parser.add_argument("--pages", type=int, default=3, help="Search pages to follow per operation (default 3).")
+    parser.add_argument("--code-system", default=BENCH_CODE_SYSTEM, help="Code system for $validate-code/$lookup.")
+    parser.add_argument("--value-set", default=BENCH_VALUE_SET, help="ValueSet canonical URL for $expand.")
+    parser.add_argument(
+        "--seed", action="store_true", help="Upload the benchmark CodeSystem and ValueSet before running."
+    )
+    parser.add_argument("--stub-delay", type=float, default=0.0, help="Artificial latency of --stub responses (s).")
+    parser.add_argument("--serve-stub", type=int, metavar="PORT", help="Only run the FHIR stub on PORT until Ctrl+C.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args(argv)
+    if args.duration <= 0 and args.requests <= 0:
+        parser.error("set --duration or --requests so the run ends")
+    return args
+
+
+def main(argv=None) -> None:
+    ensure_python_version()
+    args = parse_args(argv)
+
+    if args.serve_stub is not None:
+        server, base_url = start_stub_server(args.serve_stub, args.stub_delay)
+        print(f"FHIR stub listening on {base_url}; press Ctrl+C to stop.")
+        try:
+            threading.Event().wait()
+        finally:
+            server.shutdown()
+        return
+
+    server = None
+    if args.stub:
+        server, base_url = start_stub_server(delay=args.stub_delay)
+        release = "hapi-fhir-general"
+    elif args.target:
+        base_url = args.target.rstrip("/")
+        release = args.release
+    else:
+        release = args.release
+        try:
+            base_url = discover_target(release, args.namespace)
+        except RuntimeError as err:
+            print(f"❌ {err}", file=sys.stderr)
+            sys.exit(1)
+    if not args.workloads:
+        args.workloads = list(WORKLOADS) if args.stub else DEFAULT_WORKLOADS[release]
+    print(f"Benchmarking {base_url}.", file=sys.stderr)
+
+    try:
+        report = asyncio.run(run_benchmark(base_url, args))
+    except RuntimeError as err:
+        print(f"❌ {err}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    document = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(document + "\n")
+        print(f"✅ Report written to {args.output}.", file=sys.stderr)
+    else:
+        print(document)
+    if any(result["errors"] for result in report["workloads"].values()):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nCancelled by user.")
+        sys.exit(1)
@@ -1,7 +1,9 @@
 import os
 import sys
 import time
-from typing import Dict, Iterable, List, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 try:
     import boto3
@@ -10,10 +12,79 @@ except ModuleNotFoundError as exc:  # pragma: no cover - dependency guard
     print("boto3 is required to run cleanup.py. Install it with `pip install boto3`.")
     raise SystemExit(1) from exc
 
-from hapi_cli_common import confirm_destruction, ensure_python_version, load_tfvars, prompt
-
-
-POLL_DELAY = 10
+from hapi_aws_common import (
+    IAM_TAGGING_REGION,
+    LOAD_BALANCER_BATCH_SIZE,
+    environment_filters,
+    iter_resources,
+    iter_tagged_load_balancers,
+    db_cluster_states,
+    db_instance_states,
+    load_balancer_states,
+    nat_gateway_states,
+    network_interface_states,
+    nodegroup_states,
+    poll_stats,
+    poll_until_settled,
+    rds_tag_index,
+    role_tag_index,
+)
+from hapi_cli_common import (
+    aws_client,
+    configure_aws_clients,
+    confirm_destruction,
+    ensure_python_version,
+    format_aws_client_stats,
+    load_tfvars,
+    prompt,
+)
+
+
+NODEGROUP_TIMEOUT = 30 * 60
+LOAD_BALANCER_TIMEOUT = 10 * 60
+NAT_GATEWAY_TIMEOUT = 15 * 60
+ENI_DETACH_TIMEOUT = 5 * 60
+DB_TIMEOUT = 30 * 60
+MAX_WORKERS = 6
+ENI_WORKERS = 8
+LOAD_BALANCER_WORKERS = 4
+
+# Each teardown step runs once every step it lists here has completed successfully.
+# The VPC chain is strictly ordered; IAM, OIDC and launch templates only wait for
+# whatever still uses them, so they run alongside the network teardown.
+TEARDOWN_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "nodegroups": (),
+    "cluster": ("nodegroups",),
+    "launch_templates": ("nodegroups",),
+    "oidc_provider": ("cluster",),
+    "iam_roles": ("cluster",),
+    "load_balancers": ("cluster",),
+    "db_instances": (),
+    "db_clusters": ("db_instances",),
+    "db_subnet_groups": ("db_clusters",),
+    "db_parameter_groups": ("db_clusters",),
+    # ELB-owned ENIs are released only once their load balancer is gone.
+    "network_interfaces": ("cluster", "load_balancers", "db_clusters"),
+    "nat_gateways": ("load_balancers", "network_interfaces"),
+    "route_tables": ("nat_gateways",),
+    "subnets": ("route_tables", "db_subnet_groups"),
+    "internet_gateways": ("subnets",),
+    "security_groups": ("internet_gateways",),
+    "vpcs": ("security_groups",),
+}
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str
+    started: float = 0.0
+    finished: float = 0.0
+    error: str = ""
+
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started
 
 
 def tag_matches(tags: Optional[Iterable[dict]], key: str, value: str) -> bool:
@@ -23,20 +94,42 @@ def tag_matches(tags: Optional[Iterable[dict]], key: str, value: str) -> bool:
 
 
 def delete_nodegroups(eks_client, cluster_name: str) -> None:
-    response = eks_client.list_nodegroups(clusterName=cluster_name)
-    nodegroups: List[str] = response.get("nodegroups", [])
+    nodegroups: List[str] = []
+    deadlines: Dict[str, float] = {}
+    for nodegroup in iter_resources(eks_client, "list_nodegroups", "nodegroups", clusterName=cluster_name):
+        nodegroups.append(nodegroup)
+        print(f"Deleting node group {nodegroup}...")
+        try:
+            eks_client.delete_nodegroup(clusterName=cluster_name, nodegroupName=nodegroup)
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "ResourceInUseException":
+                raise
+            # A deletion is already in progress; keep tracking it below.
+        # Each group gets NODEGROUP_TIMEOUT from its own delete call.
+        deadlines[nodegroup] = time.monotonic() + NODEGROUP_TIMEOUT
     if not nodegroups:
         print("No managed node groups found.")
         return
 
-    for nodegroup in nodegroups:
-        print(f"Deleting node group {nodegroup}...")
-        eks_client.delete_nodegroup(clusterName=cluster_name, nodegroupName=nodegroup)
-        waiter = eks_client.get_waiter("nodegroup_deleted")
-        try:
-            waiter.wait(clusterName=cluster_name, nodegroupName=nodegroup)
-        except WaiterError as err:
-            print(f"Warning: node group {nodegroup} may still exist: {err}")
+    def report(nodegroup: str, status: Optional[str]) -> None:
+        if status == "DELETE_FAILED":
+            print(f"Warning: node group {nodegroup} failed to delete; check the EKS console.")
+        else:
+            print(f"Node group {nodegroup} deleted.")
+
+    # One poller checks every outstanding group per tick instead of a waiter per group.
+    # EKS has no batch describe; nodegroup_states makes one call per group and counts them.
+    remaining = poll_until_settled(
+        nodegroup_states(eks_client, cluster_name),
+        nodegroups,
+        lambda status: status in {None, "DELETE_FAILED"},
+        "node group",
+        NODEGROUP_TIMEOUT,
+        on_settled=report,
+        deadlines=deadlines,
+    )
+    for nodegroup in remaining:
+        print(f"Warning: node group {nodegroup} may still exist.")
 
 
 def delete_cluster(eks_client, cluster_name: str) -> None:
@@ -56,42 +149,57 @@ def delete_cluster(eks_client, cluster_name: str) -> None:
         print(f"Warning: cluster {cluster_name} may still be deleting: {err}")
 
 
-def delete_load_balancers(elbv2_client, env_tag: str) -> None:
-    paginator = elbv2_client.get_paginator("describe_load_balancers")
-    for page in paginator.paginate():
-        arns = [lb["LoadBalancerArn"] for lb in page.get("LoadBalancers", [])]
-        if not arns:
-            continue
-        tag_descriptions = elbv2_client.describe_tags(ResourceArns=arns)["TagDescriptions"]
-        for desc in tag_descriptions:
-            if not tag_matches(desc.get("Tags"), "Environment", env_tag):
-                continue
-            lb_arn = desc["ResourceArn"]
-            print(f"Deleting load balancer {lb_arn}...")
-            tgs = elbv2_client.describe_target_groups(LoadBalancerArn=lb_arn)["TargetGroups"]
-            elbv2_client.delete_load_balancer(LoadBalancerArn=lb_arn)
-            # Wait until the load balancer is actually gone before deleting target groups.
-            while True:
-                time.sleep(POLL_DELAY)
-                try:
-                    elbv2_client.describe_load_balancers(LoadBalancerArns=[lb_arn])
-                except ClientError as err:
-                    if err.response["Error"]["Code"] == "LoadBalancerNotFound":
-                        break
-                    raise
-            for tg in tgs:
-                print(f"Deleting target group {tg['TargetGroupArn']}...")
-                try:
-                    elbv2_client.delete_target_group(TargetGroupArn=tg["TargetGroupArn"])
-                except ClientError as err:
-                    if err.response["Error"]["Code"] == "ResourceNotFound":
-                        continue
-                    raise
+def delete_load_balancers(elbv2_client, env_tag: str, max_workers: int = LOAD_BALANCER_WORKERS) -> None:
+    lb_arns = [
+        lb["LoadBalancerArn"]
+        for lb, tags in iter_tagged_load_balancers(elbv2_client)
+        if tags.get("Environment") == env_tag
+    ]
+    if not lb_arns:
+        return
+
+    def delete(lb_arn: str) -> List[str]:
+        print(f"Deleting load balancer {lb_arn}...")
+        tgs = elbv2_client.describe_target_groups(LoadBalancerArn=lb_arn)["TargetGroups"]
+        elbv2_client.delete_load_balancer(LoadBalancerArn=lb_arn)
+        return [tg["TargetGroupArn"] for tg in tgs]
+
+    def delete_target_groups(tg_arns: List[str]) -> None:
+        for tg_arn in tg_arns:
+            print(f"Deleting target group {tg_arn}...")
+            try:
+                elbv2_client.delete_target_group(TargetGroupArn=tg_arn)
+            except ClientError as err:
+                if err.response["Error"]["Code"] == "ResourceNotFound":
+                    continue
+                raise
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        target_groups = dict(zip(lb_arns, pool.map(delete, lb_arns)))
+        cleanups = []
+
+        # Target groups stay attached until their load balancer is actually gone,
+        # so each LB's target groups are removed as soon as that LB disappears.
+        def on_settled(lb_arn: str, state: Optional[str]) -> None:
+            cleanups.append(pool.submit(delete_target_groups, target_groups[lb_arn]))
+
+        remaining = poll_until_settled(
+            load_balancer_states(elbv2_client),
+            lb_arns,
+            lambda state: state is None,
+            "load balancer",
+            LOAD_BALANCER_TIMEOUT,
+            on_settled=on_settled,
+            batch_size=LOAD_BALANCER_BATCH_SIZE,
+        )
+        for lb_arn in remaining:
+            print(f"Warning: load balancer {lb_arn} still exists; skipping its target groups.")
+        for future in cleanups:
+            future.result()
 
 
 def delete_oidc_provider(iam_client, cluster_name: str) -> None:
-    providers = iam_client.list_open_id_connect_providers().get("OpenIDConnectProviderList", [])
-    for provider in providers:
+    for provider in iter_resources(iam_client, "list_open_id_connect_providers", "OpenIDConnectProviderList"):
         arn = provider["Arn"]
         if cluster_name not in arn:
             continue
@@ -99,76 +207,86 @@ def delete_oidc_provider(iam_client, cluster_name: str) -> None:
         iam_client.delete_open_id_connect_provider(OpenIDConnectProviderArn=arn)
 
 
-def delete_iam_roles(iam_client, cluster_name: str, env_tag: str) -> None:
-    paginator = iam_client.get_paginator("list_roles")
-    for page in paginator.paginate():
-        for role in page.get("Roles", []):
-            role_name = role["RoleName"]
-            if cluster_name not in role_name:
-                try:
-                    tags = iam_client.list_role_tags(RoleName=role_name).get("Tags", [])
-                except ClientError:
-                    continue
-                if not tag_matches(tags, "Environment", env_tag):
-                    continue
-            print(f"Deleting IAM role {role_name}...")
-            attached = iam_client.list_attached_role_policies(RoleName=role_name).get("AttachedPolicies", [])
-            for policy in attached:
-                iam_client.detach_role_policy(RoleName=role_name, PolicyArn=policy["PolicyArn"])
-            inline = iam_client.list_role_policies(RoleName=role_name).get("PolicyNames", [])
-            for policy_name in inline:
-                iam_client.delete_role_policy(RoleName=role_name, PolicyName=policy_name)
-            try:
-                iam_client.delete_role(RoleName=role_name)
-            except ClientError as err:
-                print(f"Warning: could not delete IAM role {role_name}: {err}")
+def delete_iam_roles(iam_client, cluster_name: str, env_tag: str, tagging_client=None) -> None:
+    roles = list(iter_resources(iam_client, "list_roles", "Roles"))
+    unnamed = [role for role in roles if cluster_name not in role["RoleName"]]
+    tag_index = role_tag_index(iam_client, unnamed, env_tag, tagging_client)
+
+    for role in roles:
+        role_name = role["RoleName"]
+        if cluster_name not in role_name:
+            if tag_index.get(role_name, {}).get("Environment") != env_tag:
+                continue
+        print(f"Deleting IAM role {role_name}...")
+        attached = iam_client.list_attached_role_policies(RoleName=role_name).get("AttachedPolicies", [])
+        for policy in attached:
+            iam_client.detach_role_policy(RoleName=role_name, PolicyArn=policy["PolicyArn"])
+        inline = iam_client.list_role_policies(RoleName=role_name).get("PolicyNames", [])
+        for policy_name in inline:
+            iam_client.delete_role_policy(RoleName=role_name, PolicyName=policy_name)
+        try:
+            iam_client.delete_role(RoleName=role_name)
+        except ClientError as err:
+            print(f"Warning: could not delete IAM role {role_name}: {err}")
 
 
 def delete_nat_gateways(ec2_client, env_tag: str) -> None:
-    gateways = ec2_client.describe_nat_gateways(
-        Filters=[{"Name": "tag:Environment", "Values": [env_tag]}]
-    ).get("NatGateways", [])
+    gateways = iter_resources(
+        ec2_client, "describe_nat_gateways", "NatGateways", Filters=environment_filters(env_tag)
+    )
+    allocations: Dict[str, str] = {}
+    deleting: List[str] = []
     for nat in gateways:
         nat_id = nat["NatGatewayId"]
-        allocation_id = None
+        if nat.get("State") in {"deleted", "failed"}:
+            continue
+        deleting.append(nat_id)
         if nat.get("NatGatewayAddresses"):
             allocation_id = nat["NatGatewayAddresses"][0].get("AllocationId")
+            if allocation_id:
+                allocations[nat_id] = allocation_id
         print(f"Deleting NAT gateway {nat_id}...")
         ec2_client.delete_nat_gateway(NatGatewayId=nat_id)
-        while True:
-            time.sleep(POLL_DELAY)
-            current = ec2_client.describe_nat_gateways(NatGatewayIds=[nat_id]).get("NatGateways", [])
-            if not current or current[0]["State"] in {"deleted", "failed"}:
-                break
-        if allocation_id:
-            try:
-                print(f"Releasing Elastic IP {allocation_id}...")
-                ec2_client.release_address(AllocationId=allocation_id)
-            except ClientError as err:
-                if err.response["Error"]["Code"] != "InvalidAllocationID.NotFound":
-                    raise
+
+    def release(nat_id: str, state: Optional[str]) -> None:
+        allocation_id = allocations.get(nat_id)
+        if not allocation_id:
+            return
+        try:
+            print(f"Releasing Elastic IP {allocation_id}...")
+            ec2_client.release_address(AllocationId=allocation_id)
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "InvalidAllocationID.NotFound":
+                raise
+
+    remaining = poll_until_settled(
+        nat_gateway_states(ec2_client),
+        deleting,
+        lambda state: state in {None, "deleted", "failed"},
+        "NAT gateway",
+        NAT_GATEWAY_TIMEOUT,
+        on_settled=release,
+    )
+    for nat_id in remaining:
+        print(f"Warning: NAT gateway {nat_id} is still deleting; release its Elastic IP manually.")
 
 
 def delete_launch_templates(ec2_client, cluster_name: str, env_tag: str) -> None:
-    paginator = ec2_client.get_paginator("describe_launch_templates")
-    for page in paginator.paginate():
-        for template in page.get("LaunchTemplates", []):
-            template_id = template["LaunchTemplateId"]
-            template_name = template["LaunchTemplateName"]
-            tags = template.get("Tags", [])
-            if cluster_name not in template_name and not tag_matches(tags, "Environment", env_tag):
-                continue
-            print(f"Deleting launch template {template_name} ({template_id})...")
-            try:
-                ec2_client.delete_launch_template(LaunchTemplateId=template_id)
-            except ClientError as err:
-                print(f"Warning: could not delete launch template {template_name}: {err}")
+    for template in iter_resources(ec2_client, "describe_launch_templates", "LaunchTemplates"):
+        template_id = template["LaunchTemplateId"]
+        template_name = template["LaunchTemplateName"]
+        tags = template.get("Tags", [])
+        if cluster_name not in template_name and not tag_matches(tags, "Environment", env_tag):
+            continue
+        print(f"Deleting launch template {template_name} ({template_id})...")
+        try:
+            ec2_client.delete_launch_template(LaunchTemplateId=template_id)
+        except ClientError as err:
+            print(f"Warning: could not delete launch template {template_name}: {err}")
 
 
 def delete_route_tables(ec2_client, env_tag: str) -> None:
-    route_tables = ec2_client.describe_route_tables(
-        Filters=[{"Name": "tag:Environment", "Values": [env_tag]}]
-    ).get("RouteTables", [])
+    route_tables = iter_resources(ec2_client, "describe_route_tables", "RouteTables", Filters=environment_filters(env_tag))
     for rt in route_tables:
         rt_id = rt["RouteTableId"]
         associations = rt.get("Associations", [])
@@ -204,49 +322,61 @@ def delete_route_tables(ec2_client, env_tag: str) -> None:
         ec2_client.delete_route_table(RouteTableId=rt_id)
 
 
-def delete_network_interfaces(ec2_client, env_tag: str) -> None:
-    eni_pages = ec2_client.get_paginator("describe_network_interfaces").paginate(
-        Filters=[{"Name": "tag:Environment", "Values": [env_tag]}]
+def delete_network_interfaces(ec2_client, env_tag: str, max_workers: int = ENI_WORKERS) -> None:
+    interfaces = iter_resources(
+        ec2_client, "describe_network_interfaces", "NetworkInterfaces", Filters=environment_filters(env_tag)
     )
-    for page in eni_pages:
-        for eni in page.get("NetworkInterfaces", []):
+
+    def detach(eni_id: str, attachment_id: str) -> bool:
+        print(f"Detaching ENI {eni_id} (attachment {attachment_id})...")
+        try:
+            ec2_client.detach_network_interface(AttachmentId=attachment_id, Force=True)
+        except ClientError as err:
+            print(f"Warning: could not detach ENI {eni_id}: {err}")
+            return False
+        return True
+
+    def delete(eni_id: str) -> None:
+        print(f"Deleting ENI {eni_id}...")
+        ec2_client.delete_network_interface(NetworkInterfaceId=eni_id)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        deletions = []
+        detaching = {}
+        # Stage 1: delete what is already free and fire every force-detach at once.
+        for eni in interfaces:
             eni_id = eni["NetworkInterfaceId"]
             status = eni.get("Status")
-            attachment = eni.get("Attachment")
-            if attachment and status != "available":
-                attachment_id = attachment.get("AttachmentId")
-                if attachment_id:
-                    print(f"Detaching ENI {eni_id} (attachment {attachment_id})...")
-                    try:
-                        ec2_client.detach_network_interface(
-                            AttachmentId=attachment_id, Force=True
-                        )
-                    except ClientError as err:
-                        print(f"Warning: could not detach ENI {eni_id}: {err}")
-                        continue
-                    # Allow AWS time to process the detach.
-                    while True:
-                        time.sleep(POLL_DELAY)
-                        current = ec2_client.describe_network_interfaces(NetworkInterfaceIds=[eni_id])
-                        ni_list = current.get("NetworkInterfaces", [])
-                        if not ni_list:
-                            break
-                        current_status = ni_list[0].get("Status")
-                        if current_status == "available":
-                            status = "available"
-                            break
-                        print(f"  Waiting for ENI {eni_id} to become available (status={current_status})...")
-            if status != "available":
+            attachment_id = (eni.get("Attachment") or {}).get("AttachmentId")
+            if status == "available":
+                deletions.append(pool.submit(delete, eni_id))
+            elif attachment_id:
+                detaching[eni_id] = pool.submit(detach, eni_id, attachment_id)
+            else:
                 print(f"Skipping ENI {eni_id} (status={status}); detach it manually if needed.")
-                continue
-            print(f"Deleting ENI {eni_id}...")
-            ec2_client.delete_network_interface(NetworkInterfaceId=eni_id)
+        detached = [eni_id for eni_id, future in detaching.items() if future.result()]
+
+        # Stage 2: poll the detaching set in batches and delete each ENI once it frees up.
+        def on_settled(eni_id: str, status: Optional[str]) -> None:
+            if status == "available":
+                deletions.append(pool.submit(delete, eni_id))
+
+        remaining = poll_until_settled(
+            network_interface_states(ec2_client),
+            detached,
+            lambda state: state in {None, "available"},
+            "ENI",
+            ENI_DETACH_TIMEOUT,
+            on_settled=on_settled,
+        )
+        for eni_id in remaining:
+            print(f"Skipping ENI {eni_id}; it did not detach in time. Detach it manually if needed.")
+        for future in deletions:
+            future.result()
 
 
 def delete_subnets(ec2_client, env_tag: str) -> None:
-    subnets = ec2_client.describe_subnets(
-        Filters=[{"Name": "tag:Environment", "Values": [env_tag]}]
-    ).get("Subnets", [])
+    subnets = iter_resources(ec2_client, "describe_subnets", "Subnets", Filters=environment_filters(env_tag))
     for subnet in subnets:
         subnet_id = subnet["SubnetId"]
         print(f"Deleting subnet {subnet_id}...")
@@ -254,9 +384,7 @@ def delete_subnets(ec2_client, env_tag: str) -> None:
 
 
 def delete_internet_gateways(ec2_client, env_tag: str) -> None:
-    gateways = ec2_client.describe_internet_gateways(
-        Filters=[{"Name": "tag:Environment", "Values": [env_tag]}]
-    ).get("InternetGateways", [])
+    gateways = iter_resources(ec2_client, "describe_internet_gateways", "InternetGateways", Filters=environment_filters(env_tag))
     for gateway in gateways:
         igw_id = gateway["InternetGatewayId"]
         print(f"Deleting internet gateway {igw_id}...")
@@ -268,9 +396,7 @@ def delete_internet_gateways(ec2_client, env_tag: str) -> None:
 
 
 def delete_security_groups(ec2_client, env_tag: str) -> None:
-    sgs = ec2_client.describe_security_groups(
-        Filters=[{"Name": "tag:Environment", "Values": [env_tag]}]
-    ).get("SecurityGroups", [])
+    sgs = iter_resources(ec2_client, "describe_security_groups", "SecurityGroups", Filters=environment_filters(env_tag))
     for sg in sgs:
         sg_id = sg["GroupId"]
         if sg.get("GroupName") == "default":
@@ -283,15 +409,286 @@ def delete_security_groups(ec2_client, env_tag: str) -> None:
 
 
 def delete_vpcs(ec2_client, cluster_name: str) -> None:
-    vpcs = ec2_client.describe_vpcs(
-        Filters=[{"Name": "tag:Name", "Values": [f"{cluster_name}-vpc"]}]
-    ).get("Vpcs", [])
+    vpcs = iter_resources(
+        ec2_client, "describe_vpcs", "Vpcs", Filters=[{"Name": "tag:Name", "Values": [f"{cluster_name}-vpc"]}]
+    )
     for vpc in vpcs:
         vpc_id = vpc["VpcId"]
         print(f"Deleting VPC {vpc_id}...")
         ec2_client.delete_vpc(VpcId=vpc_id)
 
 
+def delete_db_instances(rds_client, env_tag: str) -> None:
+    instances = [
+        db
+        for db in iter_resources(rds_client, "describe_db_instances", "DBInstances")
+        if tag_matches(db.get("TagList"), "Environment", env_tag)
+    ]
+    if not instances:
+        print("No RDS DB instances found.")
+        return
+
+    for db in instances:
+        identifier = db["DBInstanceIdentifier"]
+        print(f"Deleting RDS DB instance {identifier}...")
+        kwargs = {"DBInstanceIdentifier": identifier}
+        if not db.get("DBClusterIdentifier"):
+            # Aurora instances have no snapshots of their own; the cluster does.
+            kwargs.update(SkipFinalSnapshot=True, DeleteAutomatedBackups=True)
+        try:
+            rds_client.delete_db_instance(**kwargs)
+        except ClientError as err:
+            code = err.response["Error"]["Code"]
+            if code == "DBInstanceNotFound":
+                continue
+            if code != "InvalidDBInstanceState":
+                raise
+            # Already deleting; keep tracking it below.
+
+    remaining = poll_until_settled(
+        db_instance_states(rds_client),
+        [db["DBInstanceIdentifier"] for db in instances],
+        lambda status: status is None,
+        "RDS DB instance",
+        DB_TIMEOUT,
+        on_settled=lambda identifier, _: print(f"RDS DB instance {identifier} deleted."),
+    )
+    for identifier in remaining:
+        print(f"Warning: RDS DB instance {identifier} may still exist.")
+
+
+def delete_db_clusters(rds_client, env_tag: str) -> None:
+    clusters = [
+        cluster["DBClusterIdentifier"]
+        for cluster in iter_resources(rds_client, "describe_db_clusters", "DBClusters")
+        if tag_matches(cluster.get("TagList"), "Environment", env_tag)
+    ]
+    if not clusters:
+        return
+
+    for identifier in clusters:
+        print(f"Deleting RDS DB cluster {identifier} (no final snapshot)...")
+        try:
+            rds_client.delete_db_cluster(DBClusterIdentifier=identifier, SkipFinalSnapshot=True)
+        except ClientError as err:
+            code = err.response["Error"]["Code"]
+            if code == "DBClusterNotFoundFault":
+                continue
+            if code != "InvalidDBClusterStateFault":
+                raise
+
+    remaining = poll_until_settled(
+        db_cluster_states(rds_client),
+        clusters,
+        lambda status: status is None,
+        "RDS DB cluster",
+        DB_TIMEOUT,
+        on_settled=lambda identifier, _: print(f"RDS DB cluster {identifier} deleted."),
+    )
+    for identifier in remaining:
+        print(f"Warning: RDS DB cluster {identifier} may still exist.")
+
+
+def delete_db_subnet_groups(rds_client, env_tag: str, tagging_client=None) -> None:
+    groups = {
+        group["DBSubnetGroupArn"]: group["DBSubnetGroupName"]
+        for group in iter_resources(rds_client, "describe_db_subnet_groups", "DBSubnetGroups")
+    }
+    tag_index = rds_tag_index(rds_client, groups, env_tag, tagging_client)
+    for arn, name in groups.items():
+        if tag_index.get(arn, {}).get("Environment") != env_tag:
+            continue
+        print(f"Deleting DB subnet group {name}...")
+        rds_client.delete_db_subnet_group(DBSubnetGroupName=name)
+
+
+def delete_db_parameter_groups(rds_client, env_tag: str, tagging_client=None) -> None:
+    # (describe operation, result key, name key, ARN key, delete operation)
+    kinds = (
+        (
+            "describe_db_cluster_parameter_groups",
+            "DBClusterParameterGroups",
+            "DBClusterParameterGroupName",
+            "DBClusterParameterGroupArn",
+            "delete_db_cluster_parameter_group",
+        ),
+        (
+            "describe_db_parameter_groups",
+            "DBParameterGroups",
+            "DBParameterGroupName",
+            "DBParameterGroupArn",
+            "delete_db_parameter_group",
+        ),
+    )
+    # ARN -> (delete operation, name key, name); the AWS-managed default.* groups are never touched.
+    groups = {
+        group[arn_key]: (delete, name_key, group[name_key])
+        for operation, result_key, name_key, arn_key, delete in kinds
+        for group in iter_resources(rds_client, operation, result_key)
+        if not group[name_key].startswith("default.")
+    }
+    tag_index = rds_tag_index(rds_client, groups, env_tag, tagging_client)
+    for arn, (delete, name_key, name) in groups.items():
+        if tag_index.get(arn, {}).get("Environment") != env_tag:
+            continue
+        print(f"Deleting DB parameter group {name}...")
+        getattr(rds_client, delete)(**{name_key: name})
+
+
+def build_teardown_steps(
+    eks_client,
+    elbv2_client,
+    iam_client,
+    ec2_client,
+    rds_client,
+    cluster_name: str,
+    env_tag: str,
+    tagging_client=None,
+    rds_tagging_client=None,
+) -> Dict[str, Callable[[], None]]:
+    """Map each teardown step to its callable.
+
+    ``tagging_client`` answers for IAM (us-east-1); ``rds_tagging_client`` must be in
+    the RDS region.
+    """
+    return {
+        "nodegroups": lambda: delete_nodegroups(eks_client, cluster_name),
+        "cluster": lambda: delete_cluster(eks_client, cluster_name),
+        "load_balancers": lambda: delete_load_balancers(elbv2_client, env_tag),
+        "oidc_provider": lambda: delete_oidc_provider(iam_client, cluster_name),
+        "iam_roles": lambda: delete_iam_roles(iam_client, cluster_name, env_tag, tagging_client),
+        "launch_templates": lambda: delete_launch_templates(ec2_client, cluster_name, env_tag),
+        "nat_gateways": lambda: delete_nat_gateways(ec2_client, env_tag),
+        "route_tables": lambda: delete_route_tables(ec2_client, env_tag),
+        "db_instances": lambda: delete_db_instances(rds_client, env_tag),
+        "db_clusters": lambda: delete_db_clusters(rds_client, env_tag),
+        "db_subnet_groups": lambda: delete_db_subnet_groups(rds_client, env_tag, rds_tagging_client),
+        "db_parameter_groups": lambda: delete_db_parameter_groups(rds_client, env_tag, rds_tagging_client),
+        "network_interfaces": lambda: delete_network_interfaces(ec2_client, env_tag),
+        "subnets": lambda: delete_subnets(ec2_client, env_tag),
+        "internet_gateways": lambda: delete_internet_gateways(ec2_client, env_tag),
+        "security_groups": lambda: delete_security_groups(ec2_client, env_tag),
+        "vpcs": lambda: delete_vpcs(ec2_client, cluster_name),
+    }
+
+
+def _check_dependencies(steps: Dict[str, Callable[[], None]], dependencies: Dict[str, Tuple[str, ...]]) -> None:
+    for name in steps:
+        for dep in dependencies.get(name, ()):
+            if dep not in steps:
+                raise ValueError(f"Teardown step {name} depends on unknown step {dep}.")
+
+    visiting = set()
+    visited = set()
+
+    def visit(name: str) -> None:
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Teardown dependencies contain a cycle through {name}.")
+        visiting.add(name)
+        for dep in dependencies.get(name, ()):
+            visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in steps:
+        visit(name)
+
+
+def _timed_step(name: str, func: Callable[[], None], origin: float) -> StepResult:
+    started = time.monotonic() - origin
+    try:
+        func()
+    except Exception as err:  # reported by the caller; dependents are skipped
+        return StepResult(name, "failed", started, time.monotonic() - origin, str(err))
+    return StepResult(name, "ok", started, time.monotonic() - origin)
+
+
+def run_teardown(
+    steps: Dict[str, Callable[[], None]],
+    dependencies: Dict[str, Tuple[str, ...]] = TEARDOWN_DEPENDENCIES,
+    max_workers: int = MAX_WORKERS,
+) -> Dict[str, StepResult]:
+    """Run each step as soon as its prerequisites succeed, sharing one worker pool."""
+    _check_dependencies(steps, dependencies)
+    pending = {name: set(dependencies.get(name, ())) for name in steps}
+    results: Dict[str, StepResult] = {}
+    running = {}
+    origin = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while pending or running:
+            for name in list(pending):
+                blocked = [dep for dep in pending[name] if dep in results and results[dep].status != "ok"]
+                if blocked:
+                    now = time.monotonic() - origin
+                    results[name] = StepResult(
+                        name, "skipped", now, now, f"prerequisite {blocked[0]} did not complete"
+                    )
+                    del pending[name]
+
+            ready = [
+                name
+                for name, deps in pending.items()
+                if all(dep in results and results[dep].status == "ok" for dep in deps)
+            ]
+            for name in ready:
+                del pending[name]
+                running[pool.submit(_timed_step, name, steps[name], origin)] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                result = future.result()
+                results[result.name] = result
+                if result.status == "failed":
+                    print(f"❌ Teardown step {result.name} failed: {result.error}")
+    return results
+
+
+def critical_path(
+    results: Dict[str, StepResult], dependencies: Dict[str, Tuple[str, ...]] = TEARDOWN_DEPENDENCIES
+) -> Tuple[float, List[str]]:
+    """Return the longest chain of dependent step durations and the steps on it."""
+    memo: Dict[str, Tuple[float, List[str]]] = {}
+
+    def longest(name: str) -> Tuple[float, List[str]]:
+        if name not in memo:
+            best: Tuple[float, List[str]] = (0.0, [])
+            for dep in dependencies.get(name, ()):
+                if dep in results:
+                    candidate = longest(dep)
+                    if candidate[0] > best[0]:
+                        best = candidate
+            memo[name] = (best[0] + results[name].seconds, best[1] + [name])
+        return memo[name]
+
+    paths = [longest(name) for name in results]
+    return max(paths, key=lambda item: item[0]) if paths else (0.0, [])
+
+
+def print_teardown_report(
+    results: Dict[str, StepResult], dependencies: Dict[str, Tuple[str, ...]] = TEARDOWN_DEPENDENCIES
+) -> None:
+    print("\nTeardown timing:")
+    for result in sorted(results.values(), key=lambda item: (item.started, item.name)):
+        detail = f" ({result.error})" if result.error else ""
+        print(
+            f"  {result.name:<20} start {result.started:7.1f}s | took {result.seconds:7.1f}s | {result.status}{detail}"
+        )
+    serial = sum(result.seconds for result in results.values())
+    wall_clock = max((result.finished for result in results.values()), default=0.0)
+    path_seconds, path = critical_path(results, dependencies)
+    print(
+        f"Serial time {serial:.1f}s | critical path {path_seconds:.1f}s | wall clock {wall_clock:.1f}s"
+    )
+    if path:
+        print(f"Critical path: {' -> '.join(path)}")
+
+
 def main() -> None:
     ensure_python_version()
 
@@ -311,33 +708,51 @@ def main() -> None:
         or "us-east-1",
     ) or "us-east-1"
 
-    print("WARNING: this will remove AWS resources tagged with the chosen environment.")
+    print(
+        "WARNING: this will remove AWS resources tagged with the chosen environment, "
+        "including RDS databases (without final snapshots)."
+    )
     if not confirm_destruction():
         print("Aborted.")
         return
 
-    session = boto3.Session(region_name=region)
-    eks_client = session.client("eks")
-    elbv2_client = session.client("elbv2")
-    iam_client = session.client("iam")
-    ec2_client = session.client("ec2")
-
     try:
-        delete_nodegroups(eks_client, cluster_name)
-        delete_cluster(eks_client, cluster_name)
-        delete_load_balancers(elbv2_client, env_tag)
-        delete_oidc_provider(iam_client, cluster_name)
-        delete_iam_roles(iam_client, cluster_name, env_tag)
-        delete_launch_templates(ec2_client, cluster_name, env_tag)
-        delete_nat_gateways(ec2_client, env_tag)
-        delete_route_tables(ec2_client, env_tag)
-        delete_network_interfaces(ec2_client, env_tag)
-        delete_subnets(ec2_client, env_tag)
-        delete_internet_gateways(ec2_client, env_tag)
-        delete_security_groups(ec2_client, env_tag)
-        delete_vpcs(ec2_client, cluster_name)
-    except ClientError as err:
-        print(f"❌ AWS reported an error: {err}")
+        max_workers = int(os.environ.get("HAPI_CLEANUP_WORKERS", MAX_WORKERS))
+    except ValueError:
+        max_workers = MAX_WORKERS
+
+    # Each teardown step may run its own pool on top of the step workers.
+    configure_aws_clients(max_workers * max(ENI_WORKERS, LOAD_BALANCER_WORKERS))
+    session = boto3.Session(region_name=region)
+    eks_client = aws_client("eks", region, session)
+    elbv2_client = aws_client("elbv2", region, session)
+    iam_client = aws_client("iam", region, session)
+    ec2_client = aws_client("ec2", region, session)
+    rds_client = aws_client("rds", region, session)
+    tagging_client = aws_client("resourcegroupstaggingapi", IAM_TAGGING_REGION, session)
+    rds_tagging_client = aws_client("resourcegroupstaggingapi", region, session)
+
+    steps = build_teardown_steps(
+        eks_client,
+        elbv2_client,
+        iam_client,
+        ec2_client,
+        rds_client,
+        cluster_name,
+        env_tag,
+        tagging_client,
+        rds_tagging_client,
+    )
+    results = run_teardown(steps, max_workers=max_workers)
+    print_teardown_report(results)
+    stats = poll_stats()
+    print(
+        f"Polling: {stats['api_calls']} describe calls over {stats['ticks']} ticks, "
+        f"{stats['settled']} resources settled, {stats['timed_out']} timed out."
+    )
+    print(format_aws_client_stats())
+    if any(result.status != "ok" for result in results.values()):
+        print("❌ Cleanup did not finish; rerun cleanup.py once the errors above are resolved.")
         sys.exit(1)
 
     print("✅ Cleanup completed. Double-check the AWS Console for any remaining artifacts.")
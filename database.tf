@@ -0,0 +1,158 @@
+locals {
+  database_external = var.database_mode == "external"
+  database_modes    = local.database_external ? local.hapi_modes : []
+  database_port     = 5432
+  database_user     = "hapi"
+  database_family   = "aurora-postgresql${split(".", var.database_engine_version)[0]}"
+
+  # Where each release's database lives. In embedded mode the chart's Bitnami subchart is
+  # "<release>-postgresql" and, without auth.username, HAPI connects as "postgres" with the
+  # "postgres-password" key of that secret. hapi_values.py mirrors this.
+  hapi_database = {
+    for mode, values in local.hapi_values : mode => {
+      host       = local.database_external ? try(aws_rds_cluster.hapi[mode].endpoint, "") : "${local.hapi_release_names[mode]}-postgresql"
+      user       = local.database_external ? local.database_user : "postgres"
+      secret     = local.database_external ? "${values.fullnameOverride}-database" : "${local.hapi_release_names[mode]}-postgresql"
+      secret_key = local.database_external ? "postgresql-password" : "postgres-password"
+      database   = values.postgresql.auth.database
+    }
+  }
+}
+
+resource "aws_db_subnet_group" "hapi" {
+  count = local.database_external ? 1 : 0
+
+  name       = "${var.cluster_name}-db"
+  subnet_ids = module.vpc.private_subnets
+
+  tags = {
+    Environment = var.environment
+  }
+}
+
+resource "aws_security_group" "database" {
+  count = local.database_external ? 1 : 0
+
+  name_prefix = "${var.cluster_name}-db-"
+  description = "PostgreSQL from the EKS private subnets"
+  vpc_id      = module.vpc.vpc_id
+
+  ingress {
+    description = "PostgreSQL from HAPI and PgBouncer pods"
+    from_port   = local.database_port
+    to_port     = local.database_port
+    protocol    = "tcp"
+    cidr_blocks = module.vpc.private_subnets_cidr_blocks
+  }
+
+  tags = {
+    Name        = "${var.cluster_name}-db"
+    Environment = var.environment
+  }
+}
+
+resource "aws_rds_cluster_parameter_group" "hapi" {
+  count = local.database_external ? 1 : 0
+
+  name   = "${var.cluster_name}-hapi"
+  family = local.database_family
+
+  # Log slow statements so expensive searches and $expand calls show up in the PostgreSQL log.
+  parameter {
+    name  = "log_min_duration_statement"
+    value = tostring(var.database_log_min_duration_ms)
+  }
+
+  tags = {
+    Environment = var.environment
+  }
+}
+
+resource "random_password" "database" {
+  for_each = toset(local.database_modes)
+
+  length  = 32
+  special = false
+}
+
+resource "aws_rds_cluster" "hapi" {
+  for_each = toset(local.database_modes)
+
+  cluster_identifier              = "${var.cluster_name}-${each.key}"
+  engine                          = "aurora-postgresql"
+  engine_version                  = var.database_engine_version
+  database_name                   = local.hapi_values[each.key].postgresql.auth.database
+  master_username                 = local.database_user
+  master_password                 = random_password.database[each.key].result
+  port                            = local.database_port
+  db_subnet_group_name            = aws_db_subnet_group.hapi[0].name
+  db_cluster_parameter_group_name = aws_rds_cluster_parameter_group.hapi[0].name
+  vpc_security_group_ids          = [aws_security_group.database[0].id]
+  storage_encrypted               = true
+  backup_retention_period         = var.database_backup_retention_days
+  skip_final_snapshot             = var.database_skip_final_snapshot
+  final_snapshot_identifier       = var.database_skip_final_snapshot ? null : "${var.cluster_name}-${each.key}-final"
+  apply_immediately               = true
+
+  tags = {
+    Environment = var.environment
+  }
+}
+
+resource "aws_rds_cluster_instance" "writer" {
+  for_each = aws_rds_cluster.hapi
+
+  identifier           = "${each.value.cluster_identifier}-1"
+  cluster_identifier   = each.value.id
+  engine               = each.value.engine
+  engine_version       = each.value.engine_version
+  instance_class       = var.database_instance_class
+  db_subnet_group_name = each.value.db_subnet_group_name
+  promotion_tier       = 0
+
+  tags = {
+    Environment = var.environment
+  }
+}
+
+# A standby the writer fails over to. HAPI has a single datasource pointed at the writer
+# endpoint, so this instance receives no HAPI queries.
+resource "aws_rds_cluster_instance" "failover_replica" {
+  for_each = { for mode, cluster in aws_rds_cluster.hapi : mode => cluster if var.database_failover_replica_enabled }
+
+  identifier           = "${each.value.cluster_identifier}-2"
+  cluster_identifier   = each.value.id
+  engine               = each.value.engine
+  engine_version       = each.value.engine_version
+  instance_class       = var.database_instance_class
+  db_subnet_group_name = each.value.db_subnet_group_name
+  promotion_tier       = 1
+
+  tags = {
+    Environment = var.environment
+  }
+
+  depends_on = [aws_rds_cluster_instance.writer]
+}
+
+# Renamed from "reader"; keeps existing replicas in place.
+moved {
+  from = aws_rds_cluster_instance.reader
+  to   = aws_rds_cluster_instance.failover_replica
+}
+
+# Holds the key the chart's externalDatabase.existingSecret settings point at.
+resource "kubernetes_secret_v1" "database" {
+  for_each = toset(local.database_modes)
+
+  metadata {
+    name      = local.hapi_database[each.key].secret
+    namespace = "default"
+  }
+
+  data = {
+    (local.hapi_database[each.key].secret_key) = random_password.database[each.key].result
+  }
+
+  depends_on = [module.eks]
+}
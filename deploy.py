@@ -1,21 +1,45 @@
 import argparse
+import importlib.util
 import os
-import shutil
+import subprocess
 import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 
+from hapi_chart_cache import ChartCacheError, cache_dir, ensure_chart
 from hapi_cli_common import (
+    AWS_BACKENDS,
     MIN_K8S_VERSION,
+    aws_client,
     enforce_min_k8s_version,
     ensure_dependency,
     ensure_python_version,
+    gather_commands,
     load_tfvars,
+    print_captured,
     prompt,
-    run_captured,
+    resolve_aws_backend,
     run_streamed,
     save_tfvars,
     set_env_persistent,
 )
+from hapi_deploy_state import (
+    PLAN_FILE,
+    changed_inputs,
+    deployed_modes,
+    forget_deployment,
+    helm_only_targets,
+    init_fingerprint,
+    init_needed,
+    input_fingerprints,
+    load_state,
+    record_success,
+    save_state,
+)
+from hapi_values import DEFAULT_PROFILE, PERFORMANCE_PROFILES, validate_modes
 
 
 DEPENDENCY_COMMANDS = {
@@ -28,90 +52,235 @@ DEPENDENCY_COMMANDS = {
     "aws": "choco install awscli -y",
     "kubectl": "choco install kubernetes-cli -y",
 }
+PREFLIGHT_WORKERS = 4
 
 
-def ensure_local_chart(chart_version: str) -> Path:
-    """Download the HAPI FHIR Helm chart archive next to the Terraform configs."""
-    chart_filename = f"hapi-fhir-jpaserver-{chart_version}.tgz"
-    chart_path = Path.cwd() / chart_filename
-    if chart_path.exists():
-        print(f"Found existing Helm chart archive: {chart_filename}")
-        return chart_path
+@dataclass
+class PreflightJob:
+    """A preflight check running in the background, with how long it took and was waited on."""
 
-    chart_url = (
-        "https://github.com/hapifhir/hapi-fhir-jpaserver-starter/"
-        f"releases/download/helm-v{chart_version}/{chart_filename}"
-    )
+    name: str
+    future: Future
+    waited: float = 0.0
 
-    curl_binary = shutil.which("curl.exe") or shutil.which("curl")
-    if not curl_binary:
-        print(
-            "curl.exe is required to download the Helm chart automatically. "
-            "Install curl or download the archive manually and rerun the script."
-        )
-        sys.exit(1)
+    def result(self):
+        started = time.monotonic()
+        value, _ = self.future.result()
+        self.waited += time.monotonic() - started
+        return value
 
-    print(f"Downloading HAPI FHIR Helm chart {chart_version}...")
-    download_rc = run_streamed(
-        [curl_binary, "-L", "-o", str(chart_path), chart_url]
-    )
-    if download_rc != 0 or not chart_path.exists():
-        print("❌ Failed to download the Helm chart archive. Check network access and retry.")
-        sys.exit(download_rc if download_rc != 0 else 1)
+    @property
+    def seconds(self) -> float:
+        return self.future.result()[1] if self.future.done() else 0.0
+
+
+def _timed(func: Callable, *args) -> Tuple[object, float]:
+    started = time.monotonic()
+    return func(*args), time.monotonic() - started
+
+
+def start_job(pool: ThreadPoolExecutor, name: str, func: Callable, *args) -> PreflightJob:
+    return PreflightJob(name, pool.submit(_timed, func, *args))
+
+
+def run_quietly(name: str, command: List[str]) -> subprocess.CompletedProcess:
+    """Run ``command`` without echoing, so it can overlap with interactive prompts."""
+    return gather_commands({name: command}, capture=True, echo=False)[name]
 
-    print(f"Saved Helm chart archive to {chart_filename}.")
+
+def print_preflight_report(jobs: List[PreflightJob], serial: Dict[str, float], started: float) -> None:
+    print("\nPreflight timing:")
+    for name, seconds in serial.items():
+        print(f"  {name:<18} {seconds:6.1f}s (in sequence)")
+    for job in jobs:
+        print(f"  {job.name:<18} {job.seconds:6.1f}s (background, waited {job.waited:.1f}s)")
+    overlapped = sum(job.seconds - job.waited for job in jobs)
+    print(f"  Total {time.monotonic() - started:.1f}s; {max(0.0, overlapped):.1f}s hidden behind other work.")
+
+
+def download_chart(
+    chart_version: str, expected_sha256: Optional[str] = None, offline: bool = False
+) -> Tuple[Optional[Path], str]:
+    """Place the chart archive next to the Terraform configs from the shared chart cache."""
+    try:
+        return ensure_chart(chart_version, Path.cwd(), expected_sha256, offline)
+    except ChartCacheError as err:
+        return None, str(err)
+
+
+def finish_chart_download(chart_version: str, chart_path: Optional[Path], source: str) -> Path:
+    if chart_path is None:
+        print(f"❌ Failed to obtain the Helm chart archive: {source}")
+        sys.exit(1)
+    if source == "cached":
+        print(f"Using cached HAPI FHIR Helm chart {chart_version} ({chart_path.name}).")
+    else:
+        print(f"{source.capitalize()} HAPI FHIR Helm chart {chart_version} into the cache at {cache_dir()}.")
     return chart_path
 
 
-def list_key_pairs(region: str):
-    result = run_captured(
-        [
-            "aws",
-            "ec2",
-            "describe-key-pairs",
-            "--query",
-            "KeyPairs[].KeyName",
-            "--output",
-            "text",
-            "--region",
-            region,
-        ]
-    )
-    if result.returncode != 0 or not result.stdout.strip():
+def key_pairs_command(region: str) -> List[str]:
+    return [
+        "aws",
+        "ec2",
+        "describe-key-pairs",
+        "--query",
+        "KeyPairs[].KeyName",
+        "--output",
+        "text",
+        "--region",
+        region,
+    ]
+
+
+def fetch_key_pairs(region: str, backend: str = "sdk") -> Tuple[List[str], str]:
+    """Return the key pair names in ``region`` and any error text from AWS."""
+    if backend == "sdk":
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            key_pairs = aws_client("ec2", region).describe_key_pairs().get("KeyPairs", [])
+        except (BotoCoreError, ClientError) as err:
+            return [], str(err)
+        return [pair["KeyName"] for pair in key_pairs if pair.get("KeyName")], ""
+
+    result = run_quietly("key-pairs", key_pairs_command(region))
+    if result.returncode != 0:
+        return [], result.stderr.strip()
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()], result.stderr.strip()
+
+
+def report_key_pairs(found: Tuple[List[str], str], region: str) -> List[str]:
+    key_names, error = found
+    if not key_names:
         print(
             "Unable to list key pairs automatically. "
             "Enter a name manually or create one in AWS Console > EC2 > Key Pairs."
         )
-        if result.stderr:
-            print(f"AWS CLI reported: {result.stderr.strip()}")
+        if error:
+            print(f"AWS reported: {error}")
         return []
-    key_names = [line.strip() for line in result.stdout.splitlines() if line.strip()]
-    if key_names:
-        print(f"Available key pairs in {region}:")
-        for name in key_names:
-            print(f"  {name}")
-        print("Enter one of the key names above, or press Enter to skip SSH access.")
+    print(f"Available key pairs in {region}:")
+    for name in key_names:
+        print(f"  {name}")
+    print("Enter one of the key names above, or press Enter to skip SSH access.")
     return key_names
 
 
-def check_existing_cluster(name: str, region: str) -> bool:
-    result = run_captured(
-        ["aws", "eks", "describe-cluster", "--name", name, "--region", region]
-    )
+def list_key_pairs(region: str, backend: str = "sdk"):
+    return report_key_pairs(fetch_key_pairs(region, backend), region)
+
+
+def cluster_check_command(name: str, region: str) -> List[str]:
+    return ["aws", "eks", "describe-cluster", "--name", name, "--region", region]
+
+
+def fetch_cluster_status(name: str, region: str, backend: str = "sdk") -> Tuple[Optional[bool], str]:
+    """Return whether cluster ``name`` exists (``None`` if unknown) and any error text."""
+    if backend == "sdk":
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            aws_client("eks", region).describe_cluster(name=name)
+        except ClientError as err:
+            if err.response["Error"]["Code"] == "ResourceNotFoundException":
+                return False, ""
+            return None, str(err)
+        except BotoCoreError as err:
+            return None, str(err)
+        return True, ""
+
+    result = run_quietly("cluster", cluster_check_command(name, region))
     if result.returncode == 0:
+        return True, ""
+    if "ResourceNotFoundException" in result.stderr:
+        return False, ""
+    return None, result.stderr.strip()
+
+
+def report_existing_cluster(status: Tuple[Optional[bool], str], name: str) -> bool:
+    exists, error = status
+    if exists:
         print(f'Found existing EKS cluster "{name}".')
         return True
-    if "ResourceNotFoundException" in result.stderr:
+    if exists is False:
         print("No existing EKS cluster found; proceeding with a new deployment.")
         return False
     print("Warning: Unable to confirm duplicate deployment automatically.")
-    if result.stderr.strip():
-        print("  AWS CLI output:")
-        for line in result.stderr.strip().splitlines():
+    if error:
+        print("  AWS output:")
+        for line in error.splitlines():
             print(f"    {line}")
     return False
 
 
+def check_existing_cluster(name: str, region: str, backend: str = "sdk") -> bool:
+    return report_existing_cluster(fetch_cluster_status(name, region, backend), name)
+
+
+def check_scaling_settings(hapi_mode: str) -> bool:
+    """Validate the autoscaling and disruption budget settings offline; False if Terraform would fail."""
+    if importlib.util.find_spec("yaml") is None:
+        print("PyYAML is not installed; skipping the scaling settings check (pip install -r requirements.txt).")
+        return True
+    _, errors = validate_modes(deployed_modes(hapi_mode))
+    for error in errors:
+        print(f"❌ {error}")
+    return not errors
+
+
+def check_dependencies() -> None:
+    # PATH lookups are instant; installs stay serial because Chocolatey holds a global lock.
+    for name, command in DEPENDENCY_COMMANDS.items():
+        ensure_dependency(name, command)
+
+
+def run_init() -> int:
+    return run_streamed(["terraform", "init", "-input=false"])
+
+
+def plan_and_apply(var_args: List[str], init_skipped: bool, targets: Optional[List[str]] = None) -> str:
+    """Plan to PLAN_FILE and apply it only if there is a diff; return "applied" or "no-changes".
+
+    ``targets`` limits both the plan and the apply to those resource addresses. The
+    targets depend on module.eks, which -target would otherwise pull in and refresh,
+    so targeted plans read the rest of the stack from state (-refresh=false).
+    """
+    target_args = [f"-target={address}" for address in targets or []]
+    if targets:
+        target_args.append("-refresh=false")
+    plan_cmd = [
+        "terraform",
+        "plan",
+        "-input=false",
+        "-detailed-exitcode",
+        f"-out={PLAN_FILE}",
+        *target_args,
+        *var_args,
+    ]
+    plan_rc = run_streamed(plan_cmd)
+    if plan_rc == 1 and init_skipped:
+        # A skipped init is the likeliest cause; initialise once and plan again.
+        print("Plan failed with init skipped; running terraform init and retrying.")
+        if run_init() != 0:
+            print("❌ Deployment failed during terraform init.")
+            sys.exit(1)
+        plan_rc = run_streamed(plan_cmd)
+    if plan_rc == 0:
+        PLAN_FILE.unlink(missing_ok=True)
+        return "no-changes"
+    if plan_rc != 2:
+        print("❌ Deployment failed during terraform plan.")
+        sys.exit(plan_rc)
+
+    apply_rc = run_streamed(["terraform", "apply", "-input=false", str(PLAN_FILE)])
+    PLAN_FILE.unlink(missing_ok=True)
+    if apply_rc != 0:
+        print("❌ Deployment failed.")
+        sys.exit(apply_rc)
+    return "applied"
+
+
 def choose_hapi_mode(default: str) -> str:
     mode_to_choice = {"general": "1", "terminology": "2", "both": "3"}
     choice_to_mode = {"1": "general", "2": "terminology", "3": "both"}
@@ -126,6 +295,41 @@ def choose_hapi_mode(default: str) -> str:
     return choice_to_mode.get(selection, "general")
 
 
+def choose_performance_profile(default: str) -> str:
+    names = list(PERFORMANCE_PROFILES)
+    default_choice = str(names.index(default) + 1) if default in names else "1"
+    print("Choose the HAPI FHIR performance profile (hapi-profiles.yaml):")
+    for index, name in enumerate(names, start=1):
+        print(f"  {index} - {name}: {PERFORMANCE_PROFILES[name]}")
+    selection = prompt(
+        f"Enter choice 1-{len(names)}", default_choice, display_default=default_choice
+    )
+    if selection in names:
+        return selection
+    return names[int(selection) - 1] if selection.isdigit() and 1 <= int(selection) <= len(names) else DEFAULT_PROFILE
+
+
+def choose_pgbouncer(default: str) -> bool:
+    default_answer = "Y" if default.lower() == "true" else "N"
+    choices = "Y/n" if default_answer == "Y" else "y/N"
+    answer = prompt(
+        "Route HAPI database connections through PgBouncer (transaction pooling; needed to scale "
+        f"the general server past a few replicas)? [{choices}]",
+        default_answer,
+        display_default=default_answer,
+    )
+    return answer.lower() in {"y", "yes"}
+
+
+def choose_database_mode(default: str) -> str:
+    default_choice = "2" if default.lower() == "external" else "1"
+    print("Choose where HAPI FHIR stores its data:")
+    print("  1 - Embedded PostgreSQL inside each Helm release (default)")
+    print("  2 - External Aurora PostgreSQL cluster per release (RDS, in the VPC's private subnets)")
+    selection = prompt("Enter choice 1/2", default_choice, display_default=default_choice)
+    return "external" if selection in {"2", "external"} else "embedded"
+
+
 def parse_args(argv=None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Provision the HAPI FHIR EKS infrastructure."
@@ -135,6 +339,36 @@ def parse_args(argv=None) -> argparse.Namespace:
         action="store_true",
         help="Accept defaults from environment/terraform.auto.tfvars without prompting.",
     )
+    parser.add_argument(
+        "--aws-backend",
+        choices=AWS_BACKENDS,
+        default="auto",
+        help="Answer the key pair and cluster lookups with boto3 (sdk) or the AWS CLI (cli). "
+        "auto uses boto3 when it is installed.",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Use only the local Helm chart cache; fail instead of downloading.",
+    )
+    parser.add_argument(
+        "--chart-sha256",
+        default=os.environ.get("HAPI_CHART_SHA256"),
+        help="Expected SHA-256 of the chart archive (defaults to HAPI_CHART_SHA256). "
+        "Without it the digest recorded on first download is enforced.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip terraform init when providers and modules are unchanged, skip Terraform "
+        "entirely when no input changed since the last successful deploy, and otherwise "
+        "apply a saved plan only when it has changes.",
+    )
+    parser.add_argument(
+        "--replan",
+        action="store_true",
+        help="With --incremental, plan even when no input changed (to pick up drift).",
+    )
     return parser.parse_args(argv)
 
 
@@ -150,12 +384,28 @@ def main(argv=None):
     print("===============================================")
 
     tf_values = load_tfvars()
+    aws_backend = resolve_aws_backend(args.aws_backend)
+    preflight_started = time.monotonic()
+    serial_timings: Dict[str, float] = {}
 
     print("Checking dependencies...")
-    for name, command in DEPENDENCY_COMMANDS.items():
-        ensure_dependency(name, command)
+    _, serial_timings["dependencies"] = _timed(check_dependencies)
     print("Dependencies verified.")
 
+    # Neither depends on the answers below, so they run while the user is prompted.
+    chart_version = tf_values.get("hapi_chart_version", "0.21.0")
+    deploy_state = load_state()
+    skip_init = args.incremental and not init_needed(deploy_state)
+    pool = ThreadPoolExecutor(max_workers=PREFLIGHT_WORKERS)
+    chart_job = start_job(pool, "chart download", download_chart, chart_version, args.chart_sha256, args.offline)
+    jobs = [chart_job]
+    init_job = None
+    if skip_init:
+        print("Providers and modules unchanged since the last init; skipping terraform init.")
+    else:
+        init_job = start_job(pool, "terraform init", run_quietly, "init", ["terraform", "init", "-input=false"])
+        jobs.append(init_job)
+
     aws_access_key = prompt(
         "AWS Access Key ID (find in AWS Console > IAM > Users > your user > "
         "Security credentials > Access keys",
@@ -191,6 +441,10 @@ def main(argv=None):
         cluster_default,
     ) or "hapi-eks-cluster"
 
+    key_pairs_job = start_job(pool, "key pair listing", fetch_key_pairs, aws_region, aws_backend)
+    cluster_job = start_job(pool, "cluster check", fetch_cluster_status, cluster_name, aws_region, aws_backend)
+    jobs += [key_pairs_job, cluster_job]
+
     k8s_default = tf_values.get("k8s_version", MIN_K8S_VERSION)
     raw_k8s_version = prompt(
         f"Kubernetes version (minimum {MIN_K8S_VERSION} for EKS Auto Mode support; "
@@ -200,7 +454,7 @@ def main(argv=None):
     k8s_version = enforce_min_k8s_version(raw_k8s_version)
     print(f"Using Kubernetes version {k8s_version}.")
 
-    list_key_pairs(aws_region)
+    report_key_pairs(key_pairs_job.result(), aws_region)
     ssh_key = prompt(
         "Existing EC2 key pair name (optional; AWS Console > EC2 > Key Pairs). "
         "Leave blank to skip SSH access",
@@ -214,7 +468,7 @@ def main(argv=None):
         environment_default,
     ) or "dev"
 
-    existing_cluster = check_existing_cluster(cluster_name, aws_region)
+    existing_cluster = report_existing_cluster(cluster_job.result(), cluster_name)
     if existing_cluster:
         proceed = prompt(
             "Cluster already exists. Continue and let Terraform reconcile it? [y/N]",
@@ -223,12 +477,17 @@ def main(argv=None):
         )
         if proceed.lower() not in {"y", "yes"}:
             print("Deployment cancelled at user request.")
+            pool.shutdown(wait=True)
             return
 
     hapi_mode = choose_hapi_mode(tf_values.get("hapi_mode", "general"))
     print(f"Selected mode: {hapi_mode}")
-
-    chart_version = tf_values.get("hapi_chart_version", "0.21.0")
+    performance_profile = choose_performance_profile(tf_values.get("hapi_performance_profile", DEFAULT_PROFILE))
+    print(f"Selected performance profile: {performance_profile}")
+    pgbouncer_enabled = "true" if choose_pgbouncer(tf_values.get("pgbouncer_enabled", "false")) else "false"
+    print(f"PgBouncer: {'enabled' if pgbouncer_enabled == 'true' else 'disabled'}")
+    database_mode = choose_database_mode(tf_values.get("database_mode", "embedded"))
+    print(f"Database: {database_mode}")
 
     tf_values.update(
         {
@@ -236,6 +495,9 @@ def main(argv=None):
             "cluster_name": cluster_name,
             "environment": environment,
             "hapi_mode": hapi_mode,
+            "hapi_performance_profile": performance_profile,
+            "pgbouncer_enabled": pgbouncer_enabled,
+            "database_mode": database_mode,
             "ssh_key_name": ssh_key or "",
             "k8s_version": k8s_version,
             "hapi_chart_version": chart_version,
@@ -243,6 +505,11 @@ def main(argv=None):
     )
     save_tfvars(tf_values)
 
+    if not check_scaling_settings(hapi_mode):
+        print("❌ Fix the scaling settings above (values files or terraform.auto.tfvars) and rerun.")
+        pool.shutdown(wait=True)
+        sys.exit(1)
+
     updated_env = {
         "AWS_ACCESS_KEY_ID": aws_access_key,
         "AWS_SECRET_ACCESS_KEY": aws_secret_key,
@@ -267,13 +534,16 @@ def main(argv=None):
     os.environ.update(updated_env)
 
     os.environ["HAPI_CHART_VERSION"] = chart_version
-    ensure_local_chart(chart_version)
+    chart_path = finish_chart_download(chart_version, *chart_job.result())
 
     tf_var_exports = {
         "TF_VAR_aws_region": aws_region,
         "TF_VAR_cluster_name": cluster_name,
         "TF_VAR_environment": environment,
         "TF_VAR_hapi_mode": hapi_mode,
+        "TF_VAR_hapi_performance_profile": performance_profile,
+        "TF_VAR_pgbouncer_enabled": pgbouncer_enabled,
+        "TF_VAR_database_mode": database_mode,
         "TF_VAR_ssh_key_name": ssh_key,
         "TF_VAR_k8s_version": k8s_version,
         "TF_VAR_hapi_chart_version": chart_version,
@@ -284,28 +554,65 @@ def main(argv=None):
     os.environ.update(tf_var_exports)
     set_env_persistent(tf_var_exports)
 
-    terraform_init_rc = run_streamed(["terraform", "init"])
-    if terraform_init_rc != 0:
-        print("❌ Deployment failed during terraform init.")
-        sys.exit(terraform_init_rc)
-
-    terraform_apply_cmd = [
-        "terraform",
-        "apply",
-        "-auto-approve",
+    if init_job is not None:
+        init_result = init_job.result()
+        if init_result.returncode != 0:
+            print_captured(init_result, "init")
+            print("❌ Deployment failed during terraform init.")
+            sys.exit(init_result.returncode)
+        print("terraform init completed.")
+        deploy_state["init"] = init_fingerprint()
+        save_state(deploy_state)
+    pool.shutdown(wait=True)
+    print_preflight_report(jobs, serial_timings, preflight_started)
+
+    var_args = [
         f'-var=aws_region={aws_region}',
         f'-var=ssh_key_name={ssh_key}',
         f'-var=environment={environment}',
         f'-var=hapi_mode={hapi_mode}',
+        f'-var=hapi_performance_profile={performance_profile}',
+        f'-var=pgbouncer_enabled={pgbouncer_enabled}',
+        f'-var=database_mode={database_mode}',
         f'-var=cluster_name={cluster_name}',
         f'-var=k8s_version={k8s_version}',
         f'-var=hapi_chart_version={chart_version}',
     ]
-
-    apply_rc = run_streamed(terraform_apply_cmd)
-    if apply_rc != 0:
-        print("❌ Deployment failed.")
-        sys.exit(apply_rc)
+    inputs = input_fingerprints(tf_var_exports, chart_path)
+
+    if args.incremental:
+        changed = changed_inputs(deploy_state.get("inputs"), inputs)
+        if not changed and deploy_state.get("result") and not args.replan:
+            print(
+                f"No inputs changed since the last successful deploy ({deploy_state.get('completed_at')}); "
+                "skipping Terraform. Pass --replan to check for drift."
+            )
+            print("✅ Deployment is up to date.")
+            return
+        if changed:
+            print(f"Changed inputs: {', '.join(changed)}")
+        targets = None if args.replan else helm_only_targets(changed, hapi_mode)
+        if targets == []:
+            print("Only values for modes that are not deployed changed; nothing to apply.")
+            record_success(deploy_state, inputs, "no-changes")
+            print("✅ Deployment is up to date.")
+            return
+        if targets:
+            print(f"Only Helm values or profiles changed; applying {', '.join(targets)} without refreshing the VPC and EKS resources.")
+        # Until this run succeeds the stack may match neither the old inputs nor the new ones.
+        forget_deployment(deploy_state)
+        result = plan_and_apply(var_args, init_skipped=skip_init, targets=targets)
+        record_success(deploy_state, inputs, result)
+        if result == "no-changes":
+            print("✅ Terraform reported no changes; nothing to apply.")
+            return
+    else:
+        forget_deployment(deploy_state)
+        apply_rc = run_streamed(["terraform", "apply", "-auto-approve", *var_args])
+        if apply_rc != 0:
+            print("❌ Deployment failed.")
+            sys.exit(apply_rc)
+        record_success(deploy_state, inputs, "applied")
 
     print("✅ Deployment completed successfully!")
     print("To get the LoadBalancer URL run: kubectl get svc -A")
@@ -12,6 +12,7 @@ from hapi_cli_common import (
     run_streamed,
     save_tfvars,
 )
+from hapi_deploy_state import forget_deployment
 
 
 DEPENDENCY_COMMANDS = {
@@ -114,6 +115,8 @@ def main():
         f'-var=k8s_version={k8s_version}',
     ]
 
+    # Even a partial destroy invalidates what deploy.py --incremental last recorded.
+    forget_deployment()
     rc = run_streamed(terraform_destroy_cmd)
     if rc != 0:
         print("❌ Destroy failed.")
@@ -0,0 +1,373 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+POLL_INITIAL_DELAY = 2.0
+POLL_MAX_DELAY = 30.0
+POLL_BACKOFF = 1.6
+POLL_BATCH_SIZE = 100
+# DescribeLoadBalancers and DescribeTags accept at most 20 ARNs per call.
+LOAD_BALANCER_BATCH_SIZE = 20
+LOAD_BALANCER_TAG_WORKERS = 4
+
+TAG_LOOKUP_WORKERS = 8
+# IAM is global; the tagging API reports its resources from us-east-1.
+IAM_TAGGING_REGION = "us-east-1"
+# RDS resources whose describe calls omit tags: subnet, parameter and cluster parameter groups.
+RDS_GROUP_RESOURCE_TYPES = ("rds:subgrp", "rds:pg", "rds:cluster-pg")
+
+StateLookup = Callable[[List[str]], Dict[str, Optional[str]]]
+
+_STATS_LOCK = threading.Lock()
+_POLL_STATS: Dict[str, int] = {
+    "api_calls": 0,
+    "ticks": 0,
+    "settled": 0,
+    "timed_out": 0,
+}
+
+_TAG_CACHE_LOCK = threading.Lock()
+_TAGGED_RESOURCES: Dict[tuple, Dict[str, Dict[str, str]]] = {}
+_ROLE_TAGS: Dict[str, Dict[str, str]] = {}
+
+
+def tag_dict(tag_input: Optional[Iterable[Dict[str, str]]]) -> Dict[str, str]:
+    if not tag_input:
+        return {}
+    if isinstance(tag_input, dict):
+        return dict(tag_input)
+    tags: Dict[str, str] = {}
+    for tag in tag_input:
+        key = tag.get("Key")
+        value = tag.get("Value")
+        if key:
+            tags[key] = value
+    return tags
+
+
+def environment_filters(env_tag: Optional[str]) -> List[Dict[str, object]]:
+    """EC2-style filters that match the Environment tag server-side."""
+    return [{"Name": "tag:Environment", "Values": [env_tag]}] if env_tag else []
+
+
+def iter_resources(client, operation: str, result_key: str, **kwargs) -> Iterator[dict]:
+    """Yield ``result_key`` items from ``operation`` across every page, as each page arrives.
+
+    Operations without a paginator are called once. DescribeNatGateways names its
+    filter parameter ``Filter``; ``Filters`` is translated for it here.
+    """
+    if operation == "describe_nat_gateways" and "Filters" in kwargs:
+        kwargs["Filter"] = kwargs.pop("Filters")
+    if client.can_paginate(operation):
+        for page in client.get_paginator(operation).paginate(**kwargs):
+            yield from page.get(result_key, [])
+    else:
+        yield from getattr(client, operation)(**kwargs).get(result_key, [])
+
+
+def _count(key: str, amount: int = 1) -> None:
+    with _STATS_LOCK:
+        _POLL_STATS[key] += amount
+
+
+def count_api_calls(amount: int = 1) -> None:
+    """Record describe calls a state lookup makes beyond the one the poller counts."""
+    _count("api_calls", amount)
+
+
+def poll_stats() -> Dict[str, int]:
+    with _STATS_LOCK:
+        return dict(_POLL_STATS)
+
+
+def poll_until_settled(
+    lookup: StateLookup,
+    resource_ids: Iterable[str],
+    settled: Callable[[Optional[str]], bool],
+    label: str,
+    timeout: float,
+    on_settled: Optional[Callable[[str, Optional[str]], None]] = None,
+    batch_size: int = POLL_BATCH_SIZE,
+    initial_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+    deadlines: Optional[Dict[str, float]] = None,
+) -> List[str]:
+    """Poll many resources per describe call until each settles or its deadline passes.
+
+    ``lookup`` receives a batch of IDs and returns their current state; IDs missing
+    from the result are passed to ``settled`` as ``None`` (the resource is gone).
+    The delay grows with jitter while nothing changes and resets once something
+    settles. Every ID gets ``timeout`` seconds from now unless ``deadlines`` gives
+    it its own ``time.monotonic()`` deadline; an ID that runs out stops being
+    polled while the rest carry on. Returns the IDs that ran out of time.
+    """
+    outstanding = list(dict.fromkeys(resource_ids))
+    deadline = time.monotonic() + timeout
+    deadlines = deadlines or {}
+    expired: List[str] = []
+    initial_delay = POLL_INITIAL_DELAY if initial_delay is None else initial_delay
+    max_delay = POLL_MAX_DELAY if max_delay is None else max_delay
+    delay = initial_delay
+
+    while outstanding:
+        time.sleep(random.uniform(delay / 2, delay))
+        _count("ticks")
+        states: Dict[str, Optional[str]] = {}
+        for start in range(0, len(outstanding), batch_size):
+            _count("api_calls")
+            states.update(lookup(outstanding[start : start + batch_size]))
+
+        finished = [rid for rid in outstanding if settled(states.get(rid))]
+        if finished:
+            _count("settled", len(finished))
+            finished_set = set(finished)
+            outstanding = [rid for rid in outstanding if rid not in finished_set]
+            if on_settled:
+                for rid in finished:
+                    on_settled(rid, states.get(rid))
+        if not outstanding:
+            break
+
+        now = time.monotonic()
+        timed_out = [rid for rid in outstanding if now >= deadlines.get(rid, deadline)]
+        if timed_out:
+            _count("timed_out", len(timed_out))
+            expired.extend(timed_out)
+            timed_out_set = set(timed_out)
+            outstanding = [rid for rid in outstanding if rid not in timed_out_set]
+            if not outstanding:
+                break
+
+        counts: Dict[str, int] = {}
+        for rid in outstanding:
+            state = states.get(rid) or "unknown"
+            counts[state] = counts.get(state, 0) + 1
+        summary = ", ".join(f"{state}={count}" for state, count in sorted(counts.items()))
+        print(f"  Waiting for {len(outstanding)} {label}(s) ({summary})...")
+        delay = initial_delay if finished else min(max_delay, delay * POLL_BACKOFF)
+    return expired
+
+
+def nat_gateway_states(ec2_client) -> StateLookup:
+    def lookup(ids: List[str]) -> Dict[str, Optional[str]]:
+        gateways = ec2_client.describe_nat_gateways(
+            Filter=[{"Name": "nat-gateway-id", "Values": ids}]
+        ).get("NatGateways", [])
+        return {gw["NatGatewayId"]: gw.get("State") for gw in gateways}
+
+    return lookup
+
+
+def network_interface_states(ec2_client) -> StateLookup:
+    def lookup(ids: List[str]) -> Dict[str, Optional[str]]:
+        # A filter (unlike NetworkInterfaceIds) tolerates IDs that no longer exist.
+        interfaces = ec2_client.describe_network_interfaces(
+            Filters=[{"Name": "network-interface-id", "Values": ids}]
+        ).get("NetworkInterfaces", [])
+        return {eni["NetworkInterfaceId"]: eni.get("Status") for eni in interfaces}
+
+    return lookup
+
+
+def load_balancer_states(elbv2_client) -> StateLookup:
+    def describe(arns: List[str]) -> Dict[str, Optional[str]]:
+        try:
+            balancers = elbv2_client.describe_load_balancers(LoadBalancerArns=arns)["LoadBalancers"]
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "LoadBalancerNotFound":
+                raise
+            if len(arns) == 1:
+                return {}
+            # One missing ARN fails the whole call; split the batch to find the survivors.
+            middle = len(arns) // 2
+            count_api_calls(2)
+            return {**describe(arns[:middle]), **describe(arns[middle:])}
+        return {lb["LoadBalancerArn"]: lb["State"]["Code"] for lb in balancers}
+
+    return describe
+
+
+def nodegroup_states(eks_client, cluster_name: str) -> StateLookup:
+    def lookup(names: List[str]) -> Dict[str, Optional[str]]:
+        states: Dict[str, Optional[str]] = {}
+        for index, name in enumerate(names):
+            if index:
+                count_api_calls()
+            try:
+                nodegroup = eks_client.describe_nodegroup(
+                    clusterName=cluster_name, nodegroupName=name
+                )["nodegroup"]
+            except ClientError as err:
+                if err.response["Error"]["Code"] != "ResourceNotFoundException":
+                    raise
+                continue
+            states[name] = nodegroup.get("status")
+        return states
+
+    return lookup
+
+
+def db_instance_states(rds_client) -> StateLookup:
+    def lookup(ids: List[str]) -> Dict[str, Optional[str]]:
+        # A filter (unlike DBInstanceIdentifier) tolerates identifiers that no longer exist.
+        instances = rds_client.describe_db_instances(
+            Filters=[{"Name": "db-instance-id", "Values": ids}]
+        ).get("DBInstances", [])
+        return {db["DBInstanceIdentifier"]: db.get("DBInstanceStatus") for db in instances}
+
+    return lookup
+
+
+def db_cluster_states(rds_client) -> StateLookup:
+    def lookup(ids: List[str]) -> Dict[str, Optional[str]]:
+        clusters = rds_client.describe_db_clusters(
+            Filters=[{"Name": "db-cluster-id", "Values": ids}]
+        ).get("DBClusters", [])
+        return {cluster["DBClusterIdentifier"]: cluster.get("Status") for cluster in clusters}
+
+    return lookup
+
+
+def _tagged_resources(
+    tagging_client, resource_types: Tuple[str, ...], env_tag: Optional[str], fallback: str
+) -> Optional[Dict[str, Dict[str, str]]]:
+    """Map ARN to tags for ``resource_types`` with one tagging API listing, or ``None`` if unavailable."""
+    key = (tagging_client.meta.region_name, resource_types, env_tag)
+    with _TAG_CACHE_LOCK:
+        if key in _TAGGED_RESOURCES:
+            return _TAGGED_RESOURCES[key]
+    kwargs = {"ResourceTypeFilters": list(resource_types)}
+    if env_tag:
+        kwargs["TagFilters"] = [{"Key": "Environment", "Values": [env_tag]}]
+    index: Dict[str, Dict[str, str]] = {}
+    try:
+        for page in tagging_client.get_paginator("get_resources").paginate(**kwargs):
+            for mapping in page.get("ResourceTagMappingList", []):
+                index[mapping["ResourceARN"]] = tag_dict(mapping.get("Tags"))
+    except (BotoCoreError, ClientError) as err:
+        print(f"Tagging API unavailable for {', '.join(resource_types)} ({err}); falling back to {fallback}.")
+        return None
+    if not index:
+        # An empty answer cannot be told apart from a partition (or endpoint) that does
+        # not index these resources, so only a non-empty listing is trusted.
+        return None
+    with _TAG_CACHE_LOCK:
+        _TAGGED_RESOURCES[key] = index
+    return index
+
+
+def _tagged_roles(tagging_client, env_tag: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    return _tagged_resources(tagging_client, ("iam:role",), env_tag, "list_role_tags")
+
+
+def _list_role_tags(iam_client, role_name: str) -> Optional[Dict[str, str]]:
+    with _TAG_CACHE_LOCK:
+        if role_name in _ROLE_TAGS:
+            return _ROLE_TAGS[role_name]
+    try:
+        tags = tag_dict(iam_client.list_role_tags(RoleName=role_name).get("Tags", []))
+    except ClientError:
+        return None
+    with _TAG_CACHE_LOCK:
+        _ROLE_TAGS[role_name] = tags
+    return tags
+
+
+def role_tag_index(
+    iam_client,
+    roles: Iterable[dict],
+    env_tag: Optional[str] = None,
+    tagging_client=None,
+    max_workers: int = TAG_LOOKUP_WORKERS,
+) -> Dict[str, Dict[str, str]]:
+    """Return tags keyed by role name for ``roles`` without one IAM call per role.
+
+    The Resource Groups Tagging API answers for every role at once; when it is
+    not available the roles are looked up with ``list_role_tags`` on a bounded
+    pool. With ``env_tag`` set, roles outside that environment may map to ``{}``.
+    Roles whose tags cannot be read are left out. Results are cached for the run.
+    """
+    roles = list(roles)
+    if tagging_client is not None:
+        tagged = _tagged_roles(tagging_client, env_tag)
+        if tagged is not None:
+            return {role["RoleName"]: tagged.get(role["Arn"], {}) for role in roles}
+
+    names = [role["RoleName"] for role in roles]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        looked_up = pool.map(lambda name: _list_role_tags(iam_client, name), names)
+        return {name: tags for name, tags in zip(names, looked_up) if tags is not None}
+
+
+def _list_rds_tags(rds_client, arn: str) -> Optional[Dict[str, str]]:
+    try:
+        return tag_dict(rds_client.list_tags_for_resource(ResourceName=arn).get("TagList"))
+    except ClientError:
+        return None
+
+
+def rds_tag_index(
+    rds_client,
+    arns: Iterable[str],
+    env_tag: Optional[str] = None,
+    tagging_client=None,
+    max_workers: int = TAG_LOOKUP_WORKERS,
+) -> Dict[str, Dict[str, str]]:
+    """Return tags keyed by ARN for RDS subnet and parameter groups, whose describes omit them.
+
+    Like role_tag_index: one tagging API listing (``tagging_client`` must be in the
+    RDS region) answers for every group, and ``list_tags_for_resource`` on a bounded
+    pool is the fallback. With ``env_tag`` set, groups outside that environment may
+    map to ``{}``. Groups whose tags cannot be read are left out.
+    """
+    arns = list(arns)
+    if not arns:
+        return {}
+    if tagging_client is not None:
+        tagged = _tagged_resources(tagging_client, RDS_GROUP_RESOURCE_TYPES, env_tag, "list_tags_for_resource")
+        if tagged is not None:
+            return {arn: tagged.get(arn, {}) for arn in arns}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(arns)))) as pool:
+        looked_up = pool.map(lambda arn: _list_rds_tags(rds_client, arn), arns)
+        return {arn: tags for arn, tags in zip(arns, looked_up) if tags is not None}
+
+
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+def load_balancer_tags(
+    elbv2_client, arns: List[str], max_workers: int = LOAD_BALANCER_TAG_WORKERS
+) -> Dict[str, Dict[str, str]]:
+    """Fetch tags for ``arns`` in 20-ARN describe_tags batches, keyed by ARN."""
+
+    def fetch(batch: List[str]) -> List[dict]:
+        return elbv2_client.describe_tags(ResourceArns=batch)["TagDescriptions"]
+
+    batches = _chunks(arns, LOAD_BALANCER_BATCH_SIZE)
+    if len(batches) <= 1:
+        descriptions = [fetch(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+            descriptions = list(pool.map(fetch, batches))
+    return {
+        desc["ResourceArn"]: tag_dict(desc.get("Tags"))
+        for batch in descriptions
+        for desc in batch
+    }
+
+
+def iter_tagged_load_balancers(elbv2_client) -> Iterable[tuple]:
+    """Yield ``(load_balancer, tags)`` for every ELBv2, one paginator page at a time."""
+    for page in elbv2_client.get_paginator("describe_load_balancers").paginate():
+        balancers = page.get("LoadBalancers", [])
+        if not balancers:
+            continue
+        tags = load_balancer_tags(elbv2_client, [lb["LoadBalancerArn"] for lb in balancers])
+        for lb in balancers:
+            yield lb, tags.get(lb["LoadBalancerArn"], {})
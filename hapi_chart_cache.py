@@ -0,0 +1,184 @@
+import hashlib
+import os
+import shutil
+import sys
+import tarfile
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Optional, Tuple
+
+CHART_NAME = "hapi-fhir-jpaserver"
+CHART_URL_TEMPLATE = (
+    "https://github.com/hapifhir/hapi-fhir-jpaserver-starter/"
+    "releases/download/helm-v{version}/{filename}"
+)
+DOWNLOAD_TIMEOUT = 60
+CHUNK_SIZE = 64 * 1024
+
+
+class ChartCacheError(Exception):
+    """The chart could not be served from the cache or downloaded intact."""
+
+
+def chart_filename(version: str) -> str:
+    return f"{CHART_NAME}-{version}.tgz"
+
+
+def chart_url(version: str) -> str:
+    template = os.environ.get("HAPI_CHART_URL") or CHART_URL_TEMPLATE
+    return template.format(version=version, filename=chart_filename(version))
+
+
+def cache_dir() -> Path:
+    """Per-user cache shared by every checkout (override with HAPI_CACHE_DIR)."""
+    override = os.environ.get("HAPI_CACHE_DIR")
+    if override:
+        return Path(override).expanduser()
+    if os.name == "nt":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+        return base / "hapi-terra" / "Cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "hapi-terra"
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "hapi-terra"
+
+
+def _blob_path(sha256: str) -> Path:
+    return cache_dir() / "charts" / "sha256" / f"{sha256}.tgz"
+
+
+def _ref_path(version: str) -> Path:
+    return cache_dir() / "charts" / "refs" / version
+
+
+def _partial_path(version: str) -> Path:
+    return cache_dir() / "charts" / "partial" / f"{chart_filename(version)}.part"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(text, encoding="utf-8")
+    os.replace(temporary, path)
+
+
+def cached_chart(version: str, expected_sha256: Optional[str] = None) -> Optional[Path]:
+    """Return the verified cached archive for ``version``, or ``None`` on a miss.
+
+    Without ``expected_sha256`` the digest recorded when the version was first
+    downloaded is used. A blob whose content no longer matches is discarded.
+    """
+    ref = _ref_path(version)
+    sha256 = expected_sha256 or (ref.read_text(encoding="utf-8").strip() if ref.exists() else "")
+    if not sha256:
+        return None
+    blob = _blob_path(sha256)
+    if not blob.exists():
+        return None
+    if file_sha256(blob) != sha256:
+        blob.unlink()
+        return None
+    return blob
+
+
+def _download(url: str, partial: Path) -> bool:
+    """Fetch ``url`` into ``partial``, resuming from its current size; return True if resumed."""
+    partial.parent.mkdir(parents=True, exist_ok=True)
+    offset = partial.stat().st_size if partial.exists() else 0
+    request = urllib.request.Request(url, headers={"User-Agent": "hapi-terra-deploy"})
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+    try:
+        response = urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT)
+    except urllib.error.HTTPError as err:
+        if err.code == 416 and offset:
+            # The partial file already holds the whole archive.
+            return True
+        raise
+    with response:
+        resumed = offset > 0 and response.status == 206
+        expected = response.headers.get("Content-Length")
+        with partial.open("ab" if resumed else "wb") as handle:
+            received = 0
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                handle.write(chunk)
+                received += len(chunk)
+    # http.client returns a short body without complaint when the connection drops.
+    if expected is not None and received < int(expected):
+        raise OSError(f"connection closed after {received} of {expected} bytes")
+    return resumed
+
+
+def _is_complete_archive(path: Path) -> bool:
+    try:
+        with tarfile.open(path, "r:gz") as archive:
+            archive.getmembers()
+    except (tarfile.TarError, EOFError, OSError):
+        return False
+    return True
+
+
+def fetch_chart(
+    version: str, expected_sha256: Optional[str] = None, offline: bool = False
+) -> Tuple[Path, str]:
+    """Return the cached archive for ``version``, downloading it on a miss.
+
+    Returns the blob path and how it was obtained ("cached", "downloaded" or
+    "resumed"). Interrupted downloads are resumed with an HTTP range request;
+    the archive only enters the cache once it is a readable tarball with the
+    expected digest.
+    """
+    expected_sha256 = expected_sha256.lower() if expected_sha256 else None
+    blob = cached_chart(version, expected_sha256)
+    if blob is not None:
+        return blob, "cached"
+    if offline:
+        raise ChartCacheError(f"Chart {version} is not in the cache ({cache_dir()}) and offline mode is on.")
+
+    partial = _partial_path(version)
+    url = chart_url(version)
+    try:
+        resumed = _download(url, partial)
+    except (OSError, urllib.error.URLError) as err:
+        raise ChartCacheError(f"Download of {url} failed: {err}. Rerun to resume.") from err
+
+    sha256 = file_sha256(partial)
+    if expected_sha256 and sha256 != expected_sha256:
+        partial.unlink()
+        raise ChartCacheError(f"Chart {version} has SHA-256 {sha256}, expected {expected_sha256}.")
+    if not _is_complete_archive(partial):
+        partial.unlink()
+        raise ChartCacheError(f"{url} did not return a chart archive.")
+
+    blob = _blob_path(sha256)
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(partial, blob)
+    _write_atomic(_ref_path(version), sha256 + "\n")
+    return blob, "resumed" if resumed else "downloaded"
+
+
+def install_chart(blob: Path, destination: Path) -> None:
+    """Atomically place ``blob`` at ``destination`` unless an identical file is already there."""
+    if destination.exists() and file_sha256(destination) == blob.stem:
+        return
+    temporary = destination.with_name(f"{destination.name}.{os.getpid()}.tmp")
+    shutil.copyfile(blob, temporary)
+    os.replace(temporary, destination)
+
+
+def ensure_chart(
+    version: str, directory: Path, expected_sha256: Optional[str] = None, offline: bool = False
+) -> Tuple[Path, str]:
+    """Make ``<directory>/hapi-fhir-jpaserver-<version>.tgz`` a verified copy from the cache."""
+    blob, source = fetch_chart(version, expected_sha256, offline)
+    destination = directory / chart_filename(version)
+    install_chart(blob, destination)
+    return destination, source
@@ -1,10 +1,13 @@
+import asyncio
+import importlib.util
 import os
 import shlex
 import shutil
 import subprocess
 import sys
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 TF_AUTOVARS_FILE = Path("terraform.auto.tfvars")
 _MANAGED_TFVAR_KEYS = {
@@ -12,6 +15,9 @@ _MANAGED_TFVAR_KEYS = {
     "cluster_name",
     "environment",
     "hapi_mode",
+    "hapi_performance_profile",
+    "pgbouncer_enabled",
+    "database_mode",
     "ssh_key_name",
     "k8s_version",
     "hapi_chart_version",
@@ -20,6 +26,34 @@ _MANAGED_TFVAR_KEYS = {
 # Keep aligned with the highest Kubernetes version Amazon EKS currently supports.
 MIN_K8S_VERSION = "1.33"
 
+# asyncio's default 64 KiB line limit is too small for terraform's JSON diagnostics.
+_ASYNC_LINE_LIMIT = 1024 * 1024
+
+# botocore's default pool is 10 connections per client; size it to the worker count instead.
+AWS_DEFAULT_POOL_CONNECTIONS = 10
+AWS_RETRY_MODE = "adaptive"
+AWS_MAX_ATTEMPTS = 10
+_THROTTLE_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottled",
+    "RequestThrottledException",
+    "RequestLimitExceeded",
+    "TooManyRequestsException",
+    "SlowDown",
+    "EC2ThrottledException",
+}
+
+# "sdk" answers AWS lookups in-process with boto3; "cli" shells out to the aws CLI.
+AWS_BACKENDS = ("auto", "sdk", "cli")
+
+_AWS_LOCK = threading.Lock()
+_AWS_CLIENTS: Dict[Tuple[int, str, Optional[str]], Any] = {}
+_AWS_SESSIONS: Dict[Tuple[Optional[str], Optional[str]], Any] = {}
+_AWS_STATS: Dict[str, int] = {"calls": 0, "requests": 0, "throttles": 0}
+_aws_pool_connections = AWS_DEFAULT_POOL_CONNECTIONS
+
 _RESET = "\033[0m"
 _TAG_COLORS = {
     "CMD": "\033[95m",
@@ -244,6 +278,104 @@ def run_captured(command: List[str]) -> subprocess.CompletedProcess:
     return result
 
 
+def _prefixed(label: str, name: str, text: str) -> str:
+    return f"{_tag(label)} {name}> {text}" if name else f"{_tag(label)} {text}"
+
+
+def print_captured(result: subprocess.CompletedProcess, name: str = "") -> None:
+    """Replay a command that ran silently, in the same tagged layout as run_captured."""
+    print(_prefixed("CMD", name, _format_command(result.args)))
+    for line in (result.stdout or "").splitlines():
+        print(_prefixed("OUT", name, line.rstrip()))
+    for line in (result.stderr or "").splitlines():
+        print(_prefixed("ERR", name, line.rstrip()))
+    print(_prefixed("EXIT", name, str(result.returncode)))
+
+
+async def _pump(
+    stream: Optional[asyncio.StreamReader], label: str, name: str, lines: List[str], echo: bool
+) -> None:
+    if stream is None:
+        return
+    async for raw_line in stream:
+        line = raw_line.decode(errors="replace").rstrip("\r\n")
+        lines.append(line)
+        if echo:
+            print(_prefixed(label, name, line), flush=True)
+
+
+async def _run_async(
+    command: List[str], name: str, merge_stderr: bool, echo: bool = True
+) -> subprocess.CompletedProcess:
+    if echo:
+        print(_prefixed("CMD", name, _format_command(command)), flush=True)
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT if merge_stderr else asyncio.subprocess.PIPE,
+        limit=_ASYNC_LINE_LIMIT,
+    )
+    out_lines: List[str] = []
+    err_lines: List[str] = []
+    try:
+        await asyncio.gather(
+            _pump(process.stdout, "OUT", name, out_lines, echo),
+            _pump(process.stderr, "ERR", name, err_lines, echo),
+        )
+        rc = await process.wait()
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.terminate()
+            await process.wait()
+        if echo:
+            print(_prefixed("EXIT", name, str(process.returncode)), flush=True)
+        raise
+    if echo:
+        print(_prefixed("EXIT", name, str(rc)), flush=True)
+    stdout = "\n".join(out_lines) + "\n" if out_lines else ""
+    stderr = "\n".join(err_lines) + "\n" if err_lines else ""
+    return subprocess.CompletedProcess(command, rc, stdout, stderr)
+
+
+async def run_streamed_async(command: List[str], name: str = "") -> int:
+    """Async counterpart of run_streamed; output lines carry ``name`` as a prefix."""
+    return (await _run_async(command, name, merge_stderr=True)).returncode
+
+
+async def run_captured_async(
+    command: List[str], name: str = "", echo: bool = True
+) -> subprocess.CompletedProcess:
+    """Async counterpart of run_captured; with ``echo`` output is printed as it arrives."""
+    return await _run_async(command, name, merge_stderr=False, echo=echo)
+
+
+def gather_commands(
+    commands: Mapping[str, List[str]], capture: bool = False, echo: bool = True
+) -> Dict[str, subprocess.CompletedProcess]:
+    """Run ``commands`` (name -> argv) concurrently and wait for all of them.
+
+    Output is tagged as usual and prefixed with the command's name so the
+    interleaved lines stay readable. With ``capture`` stderr is kept separate
+    (``[ERR]``); otherwise it is merged into ``[OUT]`` like run_streamed. A
+    command that cannot be started reports exit code 127. ``echo=False`` runs
+    silently, for work started in the background while the user is prompted.
+    """
+
+    async def run_one(name: str, command: List[str]) -> subprocess.CompletedProcess:
+        try:
+            return await _run_async(command, name, merge_stderr=not capture, echo=echo)
+        except OSError as err:
+            if echo:
+                print(_prefixed("ERR", name, str(err)), flush=True)
+                print(_prefixed("EXIT", name, "127"), flush=True)
+            return subprocess.CompletedProcess(command, 127, "", str(err))
+
+    async def run_all() -> List[subprocess.CompletedProcess]:
+        return await asyncio.gather(*(run_one(name, command) for name, command in commands.items()))
+
+    return dict(zip(commands, asyncio.run(run_all())))
+
+
 def confirm_destruction() -> bool:
     response = input('Type "DESTROY" to continue: ').strip()
     return response.upper() == "DESTROY"
@@ -253,3 +385,90 @@ def ensure_python_version() -> None:
     if sys.version_info < (3, 9):
         print("Python 3.9 or later is required for these automation scripts.")
         sys.exit(1)
+
+
+def resolve_aws_backend(requested: str = "auto") -> str:
+    """Pick "sdk" when boto3 is importable (unless "cli" was asked for), else "cli"."""
+    if requested == "cli":
+        return "cli"
+    if importlib.util.find_spec("boto3") is None:
+        if requested == "sdk":
+            print("boto3 is not installed; falling back to the AWS CLI. Install it with `pip install boto3`.")
+        return "cli"
+    return "sdk"
+
+
+def configure_aws_clients(max_workers: int) -> None:
+    """Size the connection pool of clients created from now on for ``max_workers`` threads."""
+    global _aws_pool_connections
+    with _AWS_LOCK:
+        _aws_pool_connections = max(AWS_DEFAULT_POOL_CONNECTIONS, max_workers)
+
+
+def _count_aws(key: str) -> None:
+    with _AWS_LOCK:
+        _AWS_STATS[key] += 1
+
+
+def _on_aws_retry_check(response=None, **_kwargs) -> None:
+    if not response:
+        return
+    http_response, parsed = response
+    code = (parsed or {}).get("Error", {}).get("Code")
+    if code in _THROTTLE_CODES or getattr(http_response, "status_code", None) == 429:
+        _count_aws("throttles")
+
+
+def aws_session(profile: Optional[str] = None, region: Optional[str] = None):
+    """Return one boto3 session per (profile, region), created on first use."""
+    import boto3
+
+    key = (profile, region)
+    with _AWS_LOCK:
+        if key not in _AWS_SESSIONS:
+            _AWS_SESSIONS[key] = boto3.Session(profile_name=profile, region_name=region)
+        return _AWS_SESSIONS[key]
+
+
+def aws_client(service: str, region: Optional[str] = None, session=None):
+    """Return a cached client for (service, region) with adaptive retries and a sized pool.
+
+    boto3 clients are thread-safe, so one client per service and region is shared
+    by every worker. Calls, HTTP requests and throttled responses are counted for
+    aws_client_stats().
+    """
+    from botocore.config import Config
+
+    session = session or aws_session(region=region)
+    region = region or session.region_name
+    key = (id(session), service, region)
+    with _AWS_LOCK:
+        client = _AWS_CLIENTS.get(key)
+        if client is None:
+            config = Config(
+                retries={"mode": AWS_RETRY_MODE, "total_max_attempts": AWS_MAX_ATTEMPTS},
+                max_pool_connections=_aws_pool_connections,
+            )
+            # Session.client() is not thread-safe; creating under the lock covers it.
+            client = session.client(service, region_name=region, config=config)
+            client.meta.events.register("before-call", lambda **_: _count_aws("calls"))
+            client.meta.events.register("before-send", lambda **_: _count_aws("requests"))
+            client.meta.events.register("needs-retry", _on_aws_retry_check)
+            _AWS_CLIENTS[key] = client
+        return client
+
+
+def aws_client_stats() -> Dict[str, int]:
+    """Return API calls, HTTP requests, retries (requests beyond one per call) and throttles."""
+    with _AWS_LOCK:
+        stats = dict(_AWS_STATS)
+    stats["retries"] = max(0, stats["requests"] - stats["calls"])
+    return stats
+
+
+def format_aws_client_stats() -> str:
+    stats = aws_client_stats()
+    return (
+        f"AWS API: {stats['calls']} calls, {stats['requests']} requests, "
+        f"{stats['retries']} retries, {stats['throttles']} throttled."
+    )
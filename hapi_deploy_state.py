@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+STATE_FILE = Path(".hapi-deploy-state.json")
+PLAN_FILE = Path(".hapi-deploy.tfplan")
+TF_LOCK_FILE = Path(".terraform.lock.hcl")
+TF_MODULES_MANIFEST = Path(".terraform") / "modules" / "modules.json"
+VALUES_FILES = {
+    "general": Path("hapi-values-general.yaml"),
+    "terminology": Path("hapi-values-terminology.yaml"),
+}
+PROFILES_FILE = Path("hapi-profiles.yaml")
+# Resources that read a mode's values file; a values-only change is applied to just these.
+VALUES_RESOURCE_ADDRESSES = (
+    'helm_release.hapi_fhir["{mode}"]',
+    'kubernetes_horizontal_pod_autoscaler_v2.hapi_fhir["{mode}"]',
+    'kubernetes_deployment_v1.pgbouncer["{mode}"]',
+    'kubernetes_service_v1.pgbouncer["{mode}"]',
+)
+# Lines that decide what `terraform init` installs: module blocks, sources and version pins.
+_INIT_SPEC_LINE = re.compile(r'^\s*(module\s+"|source\s*=|version\s*=|required_version\s*=)')
+_MISSING = b"\0missing\0"
+
+
+def _digest(parts: Iterable[bytes]) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _read(path: Path) -> bytes:
+    return path.read_bytes() if path.is_file() else _MISSING
+
+
+def _terraform_files(root: Path) -> List[Path]:
+    return sorted(root.glob("*.tf"))
+
+
+def init_fingerprint(root: Path = Path(".")) -> str:
+    """Digest of what `terraform init` depends on: lock file, module manifest and version pins."""
+    spec_lines = [
+        line.strip().encode()
+        for path in _terraform_files(root)
+        for line in path.read_text(encoding="utf-8").splitlines()
+        if _INIT_SPEC_LINE.match(line)
+    ]
+    return _digest([_read(root / TF_LOCK_FILE), _read(root / TF_MODULES_MANIFEST), *spec_lines])
+
+
+def init_needed(state: Dict, root: Path = Path(".")) -> bool:
+    if not (root / ".terraform").is_dir():
+        return True
+    return state.get("init") != init_fingerprint(root)
+
+
+def input_fingerprints(variables: Dict[str, str], chart_path: Path, root: Path = Path(".")) -> Dict[str, str]:
+    """Digest each deploy input separately so later runs can tell which ones changed."""
+    fingerprints = {
+        "terraform": _digest(
+            part for path in _terraform_files(root) for part in (path.name.encode(), path.read_bytes())
+        ),
+        "variables": _digest([json.dumps(variables, sort_keys=True).encode()]),
+        # Terraform also reads any TF_VAR_* the user exported, not just the ones deploy.py sets.
+        "environment": _digest(
+            f"{name}={value}".encode()
+            for name, value in sorted(os.environ.items())
+            if name.startswith("TF_VAR_")
+        ),
+        "tfvars": _digest([_read(root / "terraform.auto.tfvars")]),
+        "chart": _digest([_read(chart_path)]),
+    }
+    for mode, path in VALUES_FILES.items():
+        fingerprints[f"values:{mode}"] = _digest([_read(root / path)])
+    fingerprints["profiles"] = _digest([_read(root / PROFILES_FILE)])
+    return fingerprints
+
+
+def changed_inputs(previous: Optional[Dict[str, str]], current: Dict[str, str]) -> List[str]:
+    if not previous:
+        return sorted(current)
+    return sorted(name for name in set(previous) | set(current) if previous.get(name) != current.get(name))
+
+
+def deployed_modes(hapi_mode: str) -> List[str]:
+    """Mirror local.hapi_modes in helm-hapi.tf."""
+    return ["general", "terminology"] if hapi_mode == "both" else [hapi_mode]
+
+
+def helm_only_targets(changed: List[str], hapi_mode: str) -> Optional[List[str]]:
+    """Return the resource addresses to apply when only values files or profiles changed.
+
+    ``None`` means some other input changed and the whole stack needs a plan. An
+    empty list means only values of modes that are not deployed changed.
+    """
+    if not changed or any(name != "profiles" and not name.startswith("values:") for name in changed):
+        return None
+    if "profiles" in changed:
+        changed_modes = set(VALUES_FILES)
+    else:
+        changed_modes = {name.split(":", 1)[1] for name in changed}
+    return [
+        address.format(mode=mode)
+        for mode in deployed_modes(hapi_mode)
+        if mode in changed_modes
+        for address in VALUES_RESOURCE_ADDRESSES
+    ]
+
+
+def load_state(path: Path = STATE_FILE) -> Dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: Dict, path: Path = STATE_FILE) -> None:
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(temporary, path)
+
+
+def forget_deployment(state: Optional[Dict] = None) -> None:
+    """Drop the recorded successful inputs, e.g. before an apply or after a destroy.
+
+    The init fingerprint is kept; only the "nothing changed, skip Terraform" shortcut is disabled.
+    """
+    state = load_state() if state is None else state
+    if "inputs" in state or "result" in state:
+        state.pop("inputs", None)
+        state.pop("result", None)
+        save_state(state)
+
+
+def record_success(state: Dict, inputs: Dict[str, str], result: str) -> None:
+    """Remember the inputs of a run that left the stack matching them ("applied" or "no-changes")."""
+    state.update(
+        {
+            "inputs": inputs,
+            "result": result,
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+    )
+    save_state(state)
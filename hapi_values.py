@@ -0,0 +1,551 @@
+import argparse
+import copy
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from hapi_cli_common import load_tfvars
+from hapi_deploy_state import PROFILES_FILE, VALUES_FILES, deployed_modes
+
+VARIABLES_FILE = Path("variables.tf")
+# Mirrors local.hapi_release_names in helm-hapi.tf.
+RELEASE_NAMES = {"general": "hapi-fhir", "terminology": "hapi-fhir-terminology"}
+
+# Terraform variables that override the values files' autoscaling blocks (see helm-hapi.tf).
+AUTOSCALING_OVERRIDES = {
+    "minReplicas": "{mode}_min_replicas",
+    "maxReplicas": "{mode}_max_replicas",
+    "targetCPUUtilizationPercentage": "{mode}_target_cpu_utilization",
+    "targetRequestsPerSecond": "{mode}_target_requests_per_second",
+}
+AUTOSCALING_ENABLED_VAR = "hapi_autoscaling_enabled"
+PDB_ENABLED_VAR = "hapi_pdb_enabled"
+
+# Keep aligned with the hapi_performance_profile validation in variables.tf.
+PROFILE_VAR = "hapi_performance_profile"
+PERFORMANCE_PROFILES = {
+    "small": "Current sizing: 1Gi pods, serial GC, small connection pools",
+    "throughput": "Larger general pods with G1 and a 20-connection pool for write/search load",
+    "terminology-heavy": "3Gi terminology pods with long-lived search caches for $expand/$validate-code",
+}
+DEFAULT_PROFILE = "small"
+# The embedded Bitnami PostgreSQL default, less a few connections for maintenance sessions.
+POSTGRES_MAX_CONNECTIONS = 100
+POSTGRES_RESERVED_CONNECTIONS = 10
+EMBEDDED_DATABASE = (POSTGRES_MAX_CONNECTIONS - POSTGRES_RESERVED_CONNECTIONS, "the embedded PostgreSQL")
+# Metaspace, thread stacks, code cache and direct buffers live outside the heap.
+MIN_NON_HEAP_MIB = 256
+
+# Mirrors pgbouncer.tf.
+PGBOUNCER_ENABLED_VAR = "pgbouncer_enabled"
+PGBOUNCER_SIZING_VARS = ("replicas", "default_pool_size", "reserve_pool_size", "max_client_conn")
+PGBOUNCER_PORT = 5432
+PGBOUNCER_RESOURCES = {"requests": {"cpu": "50m", "memory": "64Mi"}}
+
+# Mirrors database.tf.
+DATABASE_MODE_VAR = "database_mode"
+DATABASE_USER = "hapi"
+DATABASE_PORT = 5432
+DATABASE_INSTANCE_CLASS_VAR = "database_instance_class"
+# Aurora PostgreSQL defaults max_connections to LEAST(DBInstanceClassMemory / 9531392, 5000).
+AURORA_CONNECTION_MEMORY_BYTES = 9531392
+AURORA_MAX_CONNECTIONS = 5000
+# Memory (GiB) of instance classes commonly used for the Aurora cluster. The nominal size is a
+# little above DBInstanceClassMemory, so limits derived from it are slightly optimistic.
+AURORA_INSTANCE_MEMORY = {
+    "db.t3.medium": 4,
+    "db.t3.large": 8,
+    "db.t4g.medium": 4,
+    "db.t4g.large": 8,
+    "db.r5.large": 16,
+    "db.r5.xlarge": 32,
+    "db.r6g.large": 16,
+    "db.r6g.xlarge": 32,
+    "db.r6g.2xlarge": 64,
+    "db.r6i.large": 16,
+    "db.r6i.xlarge": 32,
+    "db.r7g.large": 16,
+    "db.r7g.xlarge": 32,
+}
+
+# Managed node groups in vpc-eks.tf, keyed by their "role" label.
+NODE_GROUPS = {
+    "general": ("node_instance_type", "node_max_capacity"),
+    "terminology": ("terminology_node_instance_type", "terminology_node_max_capacity"),
+}
+# vCPU (millicores) and memory (MiB) of instance types commonly used for the node groups.
+INSTANCE_CAPACITY = {
+    "t3.medium": (2000, 4096),
+    "t3.large": (2000, 8192),
+    "t3.xlarge": (4000, 16384),
+    "t3.2xlarge": (8000, 32768),
+    "m5.large": (2000, 8192),
+    "m5.xlarge": (4000, 16384),
+    "m5.2xlarge": (8000, 32768),
+    "m6i.large": (2000, 8192),
+    "m6i.xlarge": (4000, 16384),
+    "c5.large": (2000, 4096),
+    "c5.xlarge": (4000, 8192),
+    "r5.large": (2000, 16384),
+    "r5.xlarge": (4000, 32768),
+}
+# Rough allowance for kubelet/system reservations and the aws-node, kube-proxy and EBS CSI daemonsets.
+NODE_OVERHEAD = (300, 1024)
+
+_MEMORY_UNITS = {
+    "Ki": 1 / 1024,
+    "Mi": 1,
+    "Gi": 1024,
+    "Ti": 1024 * 1024,
+    "K": 1000 / 1024 / 1024,
+    "M": 1000 * 1000 / 1024 / 1024,
+    "G": 1000 * 1000 * 1000 / 1024 / 1024,
+}
+
+
+def terraform_defaults(path: Path = VARIABLES_FILE) -> Dict[str, str]:
+    """Read the scalar ``default`` of each variable block in ``path``."""
+    defaults: Dict[str, str] = {}
+    current: Optional[str] = None
+    depth = 0
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        match = re.match(r'variable\s+"([^"]+)"\s*{', stripped)
+        if match and depth == 0:
+            current = match.group(1)
+        elif current and depth == 1 and stripped.startswith("default"):
+            value = stripped.split("=", 1)[1].strip()
+            defaults[current] = value[1:-1] if value.startswith('"') else value
+        depth += stripped.count("{") - stripped.count("}")
+        if depth == 0:
+            current = None
+    return defaults
+
+
+def terraform_variables() -> Dict[str, str]:
+    """Variable values as Terraform resolves them: defaults, then TF_VAR_*, then terraform.auto.tfvars."""
+    variables = terraform_defaults()
+    variables.update(
+        {key[len("TF_VAR_"):]: value for key, value in os.environ.items() if key.startswith("TF_VAR_")}
+    )
+    variables.update(load_tfvars())
+    return {key: value for key, value in variables.items() if value not in ("", "null")}
+
+
+def _as_bool(value: str) -> bool:
+    return str(value).lower() == "true"
+
+
+def _as_number(value: str) -> float:
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def load_values(mode: str) -> Dict:
+    import yaml
+
+    return yaml.safe_load(VALUES_FILES[mode].read_text(encoding="utf-8")) or {}
+
+
+def load_profiles(path: Path = PROFILES_FILE) -> Dict:
+    import yaml
+
+    return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+
+
+def java_tool_options(jvm: Dict) -> str:
+    """Container-aware JVM flags: the heap is sized as a share of the memory limit."""
+    options = [
+        "-XX:+UseContainerSupport",
+        f"-XX:InitialRAMPercentage={float(jvm['initialRamPercentage']):.1f}",
+        f"-XX:MaxRAMPercentage={float(jvm['maxRamPercentage']):.1f}",
+        f"-XX:+Use{jvm['gc']}",
+        "-XX:+ExitOnOutOfMemoryError",
+    ]
+    return " ".join(options + list(jvm.get("extraOptions") or []))
+
+
+def profile_env(settings: Dict) -> Dict[str, str]:
+    """Environment variables one mode of a performance profile sets (mirrors hapi_profile_env)."""
+    return {
+        "JAVA_TOOL_OPTIONS": java_tool_options(settings["jvm"]),
+        "SPRING_DATASOURCE_HIKARI_MAXIMUMPOOLSIZE": str(settings["database"]["maxPoolSize"]),
+        "SPRING_DATASOURCE_HIKARI_MINIMUMIDLE": str(settings["database"]["minIdle"]),
+        "HAPI_FHIR_REUSE_CACHED_SEARCH_RESULTS_MILLIS": str(settings["searchCache"]["reuseMillis"]),
+        "HAPI_FHIR_RETAIN_CACHED_SEARCHES_MINS": str(settings["searchCache"]["retainMinutes"]),
+    }
+
+
+def merge_env(entries: List[Dict], env: Dict[str, str]) -> List[Dict]:
+    """Helm replaces lists, so return the full extraEnv with ``env`` replacing same-named entries."""
+    kept = [entry for entry in entries if entry.get("name") not in env]
+    return kept + [{"name": name, "value": env[name]} for name in sorted(env)]
+
+
+def pgbouncer_settings(variables: Dict[str, str]) -> Optional[Dict[str, int]]:
+    """PgBouncer sizing from the Terraform variables, or ``None`` when it is disabled."""
+    if not _as_bool(variables.get(PGBOUNCER_ENABLED_VAR, "false")):
+        return None
+    return {key: int(_as_number(variables[f"pgbouncer_{key}"])) for key in PGBOUNCER_SIZING_VARS}
+
+
+def database_external(variables: Dict[str, str]) -> bool:
+    return variables.get(DATABASE_MODE_VAR, "embedded") == "external"
+
+
+def database_connection(mode: str, values: Dict, variables: Dict[str, str]) -> Dict:
+    """The chart's externalDatabase settings helm-hapi.tf passes (mirrors hapi_database).
+
+    The Aurora endpoint is only known after apply, so a placeholder stands in for it.
+    """
+    if database_external(variables):
+        host = f"<aurora {mode} writer endpoint>"
+        user, secret, secret_key = DATABASE_USER, f"{values['fullnameOverride']}-database", "postgresql-password"
+    else:
+        host = f"{RELEASE_NAMES[mode]}-postgresql"
+        user, secret, secret_key = "postgres", f"{RELEASE_NAMES[mode]}-postgresql", "postgres-password"
+    return {
+        "host": host,
+        "port": DATABASE_PORT,
+        "user": user,
+        "database": values["postgresql"]["auth"]["database"],
+        "existingSecret": secret,
+        "existingSecretKey": secret_key,
+    }
+
+
+def database_limit(variables: Dict[str, str]) -> Tuple[Optional[int], str]:
+    """Connections the database serves HAPI (after the reserve), and how to describe it.
+
+    ``None`` means the Aurora instance class is not in AURORA_INSTANCE_MEMORY.
+    """
+    if not database_external(variables):
+        return EMBEDDED_DATABASE
+    instance_class = variables.get(DATABASE_INSTANCE_CLASS_VAR, "")
+    if instance_class not in AURORA_INSTANCE_MEMORY:
+        return None, f"an Aurora {instance_class} writer"
+    memory = AURORA_INSTANCE_MEMORY[instance_class] * 1024 ** 3
+    limit = min(memory // AURORA_CONNECTION_MEMORY_BYTES, AURORA_MAX_CONNECTIONS)
+    return limit - POSTGRES_RESERVED_CONNECTIONS, f"an Aurora {instance_class} writer"
+
+
+def datasource_env(values: Dict, pgbouncer: Optional[Dict[str, int]]) -> Dict[str, str]:
+    """Point HAPI at the mode's PgBouncer service (mirrors hapi_datasource_env)."""
+    if pgbouncer is None:
+        return {}
+    database = values["postgresql"]["auth"]["database"]
+    return {
+        "SPRING_DATASOURCE_URL": (
+            f"jdbc:postgresql://{values['fullnameOverride']}-pgbouncer:{PGBOUNCER_PORT}/{database}?prepareThreshold=0"
+        )
+    }
+
+
+def apply_profile(values: Dict, settings: Dict, extra_env: Optional[Dict[str, str]] = None) -> Dict:
+    """Return ``values`` with one mode of a performance profile, plus ``extra_env``, applied."""
+    values = copy.deepcopy(values)
+    values["resources"] = copy.deepcopy(settings["resources"])
+    env = {**profile_env(settings), **(extra_env or {})}
+    values["extraEnv"] = merge_env(values.get("extraEnv") or [], env)
+    return values
+
+
+def effective_values(mode: str, variables: Dict[str, str], profiles: Optional[Dict] = None) -> Dict:
+    """Return the values Helm receives for ``mode``: the values file plus helm-hapi.tf's overlay."""
+    profiles = load_profiles() if profiles is None else profiles
+    profile = profiles[variables.get(PROFILE_VAR, DEFAULT_PROFILE)]
+    base = load_values(mode)
+    values = apply_profile(base, profile[mode], datasource_env(base, pgbouncer_settings(variables)))
+    values.setdefault("postgresql", {})["enabled"] = not database_external(variables)
+    values["externalDatabase"] = database_connection(mode, base, variables)
+    autoscaling = values.setdefault("autoscaling", {})
+    if AUTOSCALING_ENABLED_VAR in variables:
+        autoscaling["enabled"] = _as_bool(variables[AUTOSCALING_ENABLED_VAR])
+    for key, template in AUTOSCALING_OVERRIDES.items():
+        name = template.format(mode=mode)
+        if name in variables:
+            autoscaling[key] = _as_number(variables[name])
+    if PDB_ENABLED_VAR in variables:
+        values.setdefault("podDisruptionBudget", {})["enabled"] = _as_bool(variables[PDB_ENABLED_VAR])
+    if autoscaling.get("enabled"):
+        # A new release starts at the HPA floor; helm-hapi.tf carries over the live count after that.
+        values["replicaCount"] = autoscaling.get("minReplicas")
+    return values
+
+
+def parse_cpu(quantity) -> int:
+    """Kubernetes CPU quantity in millicores."""
+    text = str(quantity)
+    return int(float(text[:-1])) if text.endswith("m") else int(float(text) * 1000)
+
+
+def parse_memory(quantity) -> int:
+    """Kubernetes memory quantity in MiB (rounded up)."""
+    match = re.fullmatch(r"([0-9.]+)([KMGT]i?)?", str(quantity))
+    if not match:
+        raise ValueError(f"Unrecognised memory quantity {quantity!r}")
+    number, unit = match.groups()
+    mib = float(number) * _MEMORY_UNITS[unit] if unit else float(number) / 1024 / 1024
+    return int(-(-mib // 1))
+
+
+def _requests(resources: Optional[Dict]) -> Tuple[int, int]:
+    requests = (resources or {}).get("requests") or {}
+    return parse_cpu(requests.get("cpu", 0)), parse_memory(requests.get("memory", 0))
+
+
+def _one_pod_per_node(values: Dict) -> bool:
+    terms = (values.get("affinity") or {}).get("podAntiAffinity", {}).get(
+        "requiredDuringSchedulingIgnoredDuringExecution", []
+    )
+    return any(term.get("topologyKey") == "kubernetes.io/hostname" for term in terms)
+
+
+def _node_role(values: Dict) -> str:
+    return (values.get("nodeSelector") or {}).get("role", "general")
+
+
+def validate_scaling(values: Dict) -> List[str]:
+    """Check one mode's autoscaling and disruption budget settings; return error messages."""
+    errors: List[str] = []
+    autoscaling = values.get("autoscaling") or {}
+    replicas = values.get("replicaCount", 1)
+    if autoscaling.get("enabled"):
+        min_replicas = autoscaling.get("minReplicas")
+        max_replicas = autoscaling.get("maxReplicas")
+        cpu_target = autoscaling.get("targetCPUUtilizationPercentage")
+        rps_target = autoscaling.get("targetRequestsPerSecond", 0)
+        if not isinstance(min_replicas, int) or min_replicas < 1:
+            errors.append("autoscaling.minReplicas must be a whole number of at least 1")
+        if not isinstance(max_replicas, int) or (isinstance(min_replicas, int) and max_replicas < min_replicas):
+            errors.append("autoscaling.maxReplicas must be a whole number no smaller than minReplicas")
+        if not isinstance(cpu_target, (int, float)) or cpu_target <= 0:
+            errors.append("autoscaling.targetCPUUtilizationPercentage must be greater than 0")
+        elif not _requests(values.get("resources"))[0]:
+            errors.append("a CPU utilization target needs resources.requests.cpu")
+        if not isinstance(rps_target, (int, float)) or rps_target < 0:
+            errors.append("autoscaling.targetRequestsPerSecond must be 0 (off) or a positive rate")
+        replicas = min_replicas
+
+    pdb = values.get("podDisruptionBudget") or {}
+    if pdb.get("enabled"):
+        min_available = pdb.get("minAvailable")
+        max_unavailable = pdb.get("maxUnavailable")
+        if (min_available in (None, "")) == (max_unavailable in (None, "")):
+            errors.append("podDisruptionBudget needs exactly one of minAvailable or maxUnavailable")
+        elif isinstance(min_available, int) and isinstance(replicas, int) and min_available >= replicas:
+            errors.append(
+                f"podDisruptionBudget.minAvailable={min_available} with {replicas} replica(s) "
+                "blocks every node drain; raise the replica floor or use maxUnavailable"
+            )
+    return errors
+
+
+def validate_profile(
+    settings: Dict,
+    values: Dict,
+    pgbouncer: Optional[Dict[str, int]] = None,
+    database: Tuple[Optional[int], str] = EMBEDDED_DATABASE,
+) -> List[str]:
+    """Check one mode of a performance profile against the rendered values; return error messages.
+
+    ``database`` is the (connections, description) pair from database_limit.
+    """
+    errors: List[str] = []
+    jvm = settings.get("jvm") or {}
+    pool_settings = settings.get("database") or {}
+    limit = ((settings.get("resources") or {}).get("limits") or {}).get("memory")
+    if not limit:
+        errors.append("resources.limits.memory is required; the heap is sized as a share of it")
+    max_ram = jvm.get("maxRamPercentage", 0)
+    if not 25 <= max_ram <= 90:
+        errors.append("jvm.maxRamPercentage should be between 25 and 90")
+    elif jvm.get("initialRamPercentage", 0) > max_ram:
+        errors.append("jvm.initialRamPercentage cannot exceed maxRamPercentage")
+    elif limit and parse_memory(limit) * (100 - max_ram) / 100 < MIN_NON_HEAP_MIB:
+        errors.append(
+            f"jvm.maxRamPercentage={max_ram} of {limit} leaves under {MIN_NON_HEAP_MIB}Mi "
+            "for metaspace, threads and buffers"
+        )
+
+    pool = pool_settings.get("maxPoolSize", 0)
+    if not isinstance(pool, int) or pool < 1:
+        errors.append("database.maxPoolSize must be a whole number of at least 1")
+        return errors
+    if pool_settings.get("minIdle", 0) > pool:
+        errors.append("database.minIdle cannot exceed maxPoolSize")
+    autoscaling = values.get("autoscaling") or {}
+    ceiling = autoscaling.get("maxReplicas") if autoscaling.get("enabled") else values.get("replicaCount", 1)
+    if not isinstance(ceiling, int):
+        return errors
+    if pgbouncer is None:
+        available, description = database
+        if available is not None and pool * ceiling > available:
+            errors.append(
+                f"{ceiling} replicas x database.maxPoolSize={pool} exceeds the {available} connections "
+                f"{description} can serve; enable pgbouncer_enabled or shrink the pool"
+            )
+    else:
+        clients = pgbouncer["max_client_conn"] * pgbouncer["replicas"]
+        if pool * ceiling > clients:
+            errors.append(
+                f"{ceiling} replicas x database.maxPoolSize={pool} exceeds the {clients} client connections "
+                "PgBouncer accepts (pgbouncer_max_client_conn x pgbouncer_replicas)"
+            )
+    return errors
+
+
+def validate_pgbouncer(
+    pgbouncer: Dict[str, int],
+    database: Tuple[Optional[int], str] = EMBEDDED_DATABASE,
+) -> List[str]:
+    """Check that PgBouncer's server-side pools fit the database's connection limit."""
+    errors: List[str] = []
+    if pgbouncer["replicas"] < 1 or pgbouncer["default_pool_size"] < 1:
+        errors.append("pgbouncer_replicas and pgbouncer_default_pool_size must be at least 1")
+    server = pgbouncer["replicas"] * (pgbouncer["default_pool_size"] + pgbouncer["reserve_pool_size"])
+    available, description = database
+    if available is not None and server > available:
+        errors.append(
+            f"{pgbouncer['replicas']} pods x (default {pgbouncer['default_pool_size']} + reserve "
+            f"{pgbouncer['reserve_pool_size']}) server connections exceed the {available} {description} "
+            "can serve"
+        )
+    return errors
+
+
+def check_node_capacity(rendered: Dict[str, Dict], variables: Dict[str, str]) -> List[str]:
+    """Check that every mode's replica ceiling fits the node groups' maximum size.
+
+    Pods go to the group named by their ``role`` node selector; the embedded
+    PostgreSQL primaries have no selector and land on the general group.
+    """
+    errors: List[str] = []
+    pgbouncer = pgbouncer_settings(variables)
+    demand: Dict[str, List[Tuple[str, int, int, int]]] = {role: [] for role in NODE_GROUPS}
+    for mode, values in rendered.items():
+        autoscaling = values.get("autoscaling") or {}
+        ceiling = autoscaling.get("maxReplicas") if autoscaling.get("enabled") else values.get("replicaCount", 1)
+        if not isinstance(ceiling, int):
+            continue
+        role = _node_role(values)
+        max_nodes = int(variables[NODE_GROUPS[role][1]])
+        if _one_pod_per_node(values) and ceiling > max_nodes:
+            errors.append(
+                f"{mode}: up to {ceiling} replicas with one pod per node, but the {role} node group "
+                f"allows at most {max_nodes} nodes ({NODE_GROUPS[role][1]})"
+            )
+        demand[role].append((f"{mode} server", ceiling, *_requests(values.get("resources"))))
+        postgres = (values.get("postgresql") or {}).get("primary") or {}
+        if (values.get("postgresql") or {}).get("enabled", True):
+            demand["general"].append((f"{mode} PostgreSQL", 1, *_requests(postgres.get("resources"))))
+        if pgbouncer is not None:
+            demand[role].append((f"{mode} PgBouncer", pgbouncer["replicas"], *_requests(PGBOUNCER_RESOURCES)))
+
+    for role, pods in demand.items():
+        if not pods:
+            continue
+        type_var, max_var = NODE_GROUPS[role]
+        instance_type = variables[type_var]
+        if instance_type not in INSTANCE_CAPACITY:
+            print(f"  Skipping the {role} node capacity check: {instance_type} is not in INSTANCE_CAPACITY.")
+            continue
+        capacity = INSTANCE_CAPACITY[instance_type]
+        allocatable = (capacity[0] - NODE_OVERHEAD[0], capacity[1] - NODE_OVERHEAD[1])
+        max_nodes = int(variables[max_var])
+        cpu = sum(count * pod_cpu for _, count, pod_cpu, _ in pods)
+        memory = sum(count * pod_memory for _, count, _, pod_memory in pods)
+        for name, _, pod_cpu, pod_memory in pods:
+            if pod_cpu > allocatable[0] or pod_memory > allocatable[1]:
+                errors.append(f"{name}: requests {pod_cpu}m/{pod_memory}Mi do not fit on one {instance_type} node")
+        if cpu > allocatable[0] * max_nodes or memory > allocatable[1] * max_nodes:
+            errors.append(
+                f"{role} node group: pods at their replica ceilings request {cpu}m CPU / {memory}Mi, "
+                f"more than {max_nodes} x {instance_type} can schedule "
+                f"(~{allocatable[0] * max_nodes}m / {allocatable[1] * max_nodes}Mi); raise {max_var}"
+            )
+    return errors
+
+
+def validate_modes(modes: List[str], variables: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Dict], List[str]]:
+    """Render and validate ``modes`` offline; return the rendered values and any errors."""
+    variables = terraform_variables() if variables is None else variables
+    profiles = load_profiles()
+    profile_name = variables.get(PROFILE_VAR, DEFAULT_PROFILE)
+    missing = [mode for mode in modes if mode not in (profiles.get(profile_name) or {})]
+    if missing:
+        return {}, [f"{PROFILES_FILE} has no {profile_name!r} profile for {', '.join(missing)}"]
+    pgbouncer = pgbouncer_settings(variables)
+    database = database_limit(variables)
+    if database[0] is None:
+        print(f"  Skipping the connection limit checks: {database[1]} is not in AURORA_INSTANCE_MEMORY.")
+    rendered = {mode: effective_values(mode, variables, profiles) for mode in modes}
+    errors = [f"{mode}: {error}" for mode, values in rendered.items() for error in validate_scaling(values)]
+    errors += [
+        f"{mode} ({profile_name} profile): {error}"
+        for mode, values in rendered.items()
+        for error in validate_profile(profiles[profile_name][mode], values, pgbouncer, database)
+    ]
+    if pgbouncer is not None:
+        errors += [f"pgbouncer: {error}" for error in validate_pgbouncer(pgbouncer, database)]
+    if not errors:
+        errors += check_node_capacity(rendered, variables)
+    return rendered, errors
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Render the effective Helm values per HAPI mode and validate scaling settings offline."
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["general", "terminology", "both"],
+        help="Mode to check (default: hapi_mode from terraform.auto.tfvars).",
+    )
+    parser.add_argument("--render", action="store_true", help="Print the effective values as YAML.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    import yaml
+
+    args = parse_args(argv)
+    variables = terraform_variables()
+    modes = deployed_modes(args.mode or variables.get("hapi_mode", "general"))
+    rendered, errors = validate_modes(modes, variables)
+    print(f"Performance profile: {variables.get(PROFILE_VAR, DEFAULT_PROFILE)}")
+    connections, description = database_limit(variables)
+    print(
+        f"Database: {description}"
+        + (f", {connections} connections for HAPI per release" if connections is not None else "")
+    )
+    pgbouncer = pgbouncer_settings(variables)
+    if pgbouncer is not None:
+        print(
+            f"PgBouncer: {pgbouncer['replicas']} pod(s) per mode, {pgbouncer['default_pool_size']} server "
+            f"connections each, up to {pgbouncer['max_client_conn']} clients each"
+        )
+    for mode, values in rendered.items():
+        if args.render:
+            print(f"# {mode} ({VALUES_FILES[mode]} + helm-hapi.tf overlay)")
+            print(yaml.safe_dump(values, default_flow_style=False, sort_keys=False))
+        autoscaling = values.get("autoscaling") or {}
+        if autoscaling.get("enabled"):
+            print(
+                f"{mode}: HPA {autoscaling['minReplicas']}-{autoscaling['maxReplicas']} replicas, "
+                f"CPU target {autoscaling['targetCPUUtilizationPercentage']}%, "
+                f"request-rate target {autoscaling.get('targetRequestsPerSecond') or 'off'}"
+            )
+        else:
+            print(f"{mode}: fixed at {values.get('replicaCount', 1)} replica(s)")
+    if errors:
+        for error in errors:
+            print(f"❌ {error}")
+        sys.exit(1)
+    print("✅ Scaling settings are valid.")
+
+
+if __name__ == "__main__":
+    main()
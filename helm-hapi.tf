@@ -27,19 +27,131 @@ locals {
     general     = "${path.module}/hapi-values-general.yaml"
     terminology = "${path.module}/hapi-values-terminology.yaml"
   }
+  hapi_release_names = {
+    general     = "hapi-fhir"
+    terminology = "hapi-fhir-terminology"
+  }
+  hapi_values = { for mode, values_file in local.hapi_values_files : mode => yamldecode(file(values_file)) }
+
+  # Terraform variables override the autoscaling blocks of the values files; hapi_values.py mirrors this.
+  hapi_scaling_overrides = {
+    general = {
+      minReplicas                    = var.general_min_replicas
+      maxReplicas                    = var.general_max_replicas
+      targetCPUUtilizationPercentage = var.general_target_cpu_utilization
+      targetRequestsPerSecond        = var.general_target_requests_per_second
+    }
+    terminology = {
+      minReplicas                    = var.terminology_min_replicas
+      maxReplicas                    = var.terminology_max_replicas
+      targetCPUUtilizationPercentage = var.terminology_target_cpu_utilization
+      targetRequestsPerSecond        = var.terminology_target_requests_per_second
+    }
+  }
+  hapi_autoscaling = {
+    for mode, values in local.hapi_values : mode => {
+      enabled                        = var.hapi_autoscaling_enabled != null ? var.hapi_autoscaling_enabled : values.autoscaling.enabled
+      minReplicas                    = coalesce(local.hapi_scaling_overrides[mode].minReplicas, values.autoscaling.minReplicas)
+      maxReplicas                    = coalesce(local.hapi_scaling_overrides[mode].maxReplicas, values.autoscaling.maxReplicas)
+      targetCPUUtilizationPercentage = coalesce(local.hapi_scaling_overrides[mode].targetCPUUtilizationPercentage, values.autoscaling.targetCPUUtilizationPercentage)
+      targetRequestsPerSecond        = coalesce(local.hapi_scaling_overrides[mode].targetRequestsPerSecond, values.autoscaling.targetRequestsPerSecond)
+    }
+  }
+
+  # Performance profile settings rendered into environment variables; hapi_values.py mirrors this.
+  hapi_profile = yamldecode(file("${path.module}/hapi-profiles.yaml"))[var.hapi_performance_profile]
+  hapi_profile_env = {
+    for mode, settings in local.hapi_profile : mode => {
+      JAVA_TOOL_OPTIONS = join(" ", concat(
+        [
+          "-XX:+UseContainerSupport",
+          format("-XX:InitialRAMPercentage=%.1f", settings.jvm.initialRamPercentage),
+          format("-XX:MaxRAMPercentage=%.1f", settings.jvm.maxRamPercentage),
+          "-XX:+Use${settings.jvm.gc}",
+          "-XX:+ExitOnOutOfMemoryError",
+        ],
+        settings.jvm.extraOptions
+      ))
+      SPRING_DATASOURCE_HIKARI_MAXIMUMPOOLSIZE     = tostring(settings.database.maxPoolSize)
+      SPRING_DATASOURCE_HIKARI_MINIMUMIDLE         = tostring(settings.database.minIdle)
+      HAPI_FHIR_REUSE_CACHED_SEARCH_RESULTS_MILLIS = tostring(settings.searchCache.reuseMillis)
+      HAPI_FHIR_RETAIN_CACHED_SEARCHES_MINS        = tostring(settings.searchCache.retainMinutes)
+    }
+  }
+  # With PgBouncer enabled HAPI connects through it; prepareThreshold=0 keeps the JDBC driver
+  # from relying on server-side prepared statements, which transaction pooling does not pin.
+  hapi_datasource_env = {
+    for mode, values in local.hapi_values : mode => {
+      for name, value in {
+        SPRING_DATASOURCE_URL = "jdbc:postgresql://${values.fullnameOverride}-pgbouncer:${local.pgbouncer_port}/${values.postgresql.auth.database}?prepareThreshold=0"
+      } : name => value if var.pgbouncer_enabled
+    }
+  }
+  hapi_release_env = {
+    for mode, env in local.hapi_profile_env : mode => merge(env, local.hapi_datasource_env[mode])
+  }
+
+  # Helm replaces lists instead of merging them, so the overlay carries the whole extraEnv:
+  # the values file entries, with the profile's variables replacing any of the same name.
+  hapi_extra_env = {
+    for mode, env in local.hapi_release_env : mode => concat(
+      [for entry in local.hapi_values[mode].extraEnv : entry if !contains(keys(env), entry.name)],
+      [for name in sort(keys(env)) : { name = name, value = env[name] }]
+    )
+  }
+
+  # The chart always renders spec.replicas, so while the HPA owns a Deployment the release
+  # carries over its live replica count (kept within the HPA bounds); a new release starts at
+  # minReplicas. hapi_values.py renders the minReplicas case.
+  hapi_live_replicas = {
+    for mode, deployment in data.kubernetes_resources.hapi_deployment : mode => try(deployment.objects[0].spec.replicas, null)
+  }
+  hapi_overlay_values = {
+    for mode, scaling in local.hapi_autoscaling : mode => {
+      replicaCount = scaling.enabled ? min(max(coalesce(lookup(local.hapi_live_replicas, mode, null), scaling.minReplicas), scaling.minReplicas), scaling.maxReplicas) : local.hapi_values[mode].replicaCount
+      podDisruptionBudget = {
+        enabled = var.hapi_pdb_enabled != null ? var.hapi_pdb_enabled : local.hapi_values[mode].podDisruptionBudget.enabled
+      }
+      resources = local.hapi_profile[mode].resources
+      extraEnv  = local.hapi_extra_env[mode]
+      # externalDatabase is only read by the chart once the embedded PostgreSQL is disabled.
+      postgresql = {
+        enabled = !local.database_external
+      }
+      externalDatabase = {
+        host              = local.hapi_database[mode].host
+        port              = local.database_port
+        user              = local.hapi_database[mode].user
+        database          = local.hapi_database[mode].database
+        existingSecret    = local.hapi_database[mode].secret
+        existingSecretKey = local.hapi_database[mode].secret_key
+      }
+    }
+  }
+}
+
+# Finds nothing before the first deploy of a mode; the release then starts at minReplicas.
+data "kubernetes_resources" "hapi_deployment" {
+  for_each = { for mode in local.hapi_modes : mode => mode if local.hapi_autoscaling[mode].enabled }
+
+  api_version    = "apps/v1"
+  kind           = "Deployment"
+  namespace      = "default"
+  field_selector = "metadata.name==${local.hapi_values[each.key].fullnameOverride}"
 }
 
 resource "helm_release" "hapi_fhir" {
   for_each = { for mode in local.hapi_modes : mode => mode }
 
-  name = each.key == "terminology" ? "hapi-fhir-terminology" : "hapi-fhir"
+  name = local.hapi_release_names[each.key]
   # repository = "https://hapifhir.github.io/hapi-fhir-jpaserver-starter"
   # chart      = "hapi-fhir-jpaserver"
   chart = "hapi-fhir-jpaserver-0.21.0.tgz"
   # version    = var.hapi_chart_version
 
   values = [
-    file(local.hapi_values_files[each.key])
+    file(local.hapi_values_files[each.key]),
+    yamlencode(local.hapi_overlay_values[each.key])
   ]
 
   timeout           = 1000
@@ -49,6 +161,82 @@ resource "helm_release" "hapi_fhir" {
   depends_on = [
     module.eks,
     aws_eks_addon.ebs_csi,
-    kubernetes_storage_class_v1.gp3
+    kubernetes_storage_class_v1.gp3,
+    kubernetes_service_v1.pgbouncer,
+    kubernetes_deployment_v1.pgbouncer,
+    kubernetes_secret_v1.database,
+    aws_rds_cluster_instance.writer
   ]
 }
+
+resource "kubernetes_horizontal_pod_autoscaler_v2" "hapi_fhir" {
+  for_each = { for mode in local.hapi_modes : mode => local.hapi_autoscaling[mode] if local.hapi_autoscaling[mode].enabled }
+
+  metadata {
+    name      = local.hapi_values[each.key].fullnameOverride
+    namespace = helm_release.hapi_fhir[each.key].namespace
+  }
+
+  spec {
+    min_replicas = each.value.minReplicas
+    max_replicas = each.value.maxReplicas
+
+    scale_target_ref {
+      api_version = "apps/v1"
+      kind        = "Deployment"
+      name        = local.hapi_values[each.key].fullnameOverride
+    }
+
+    metric {
+      type = "Resource"
+      resource {
+        name = "cpu"
+        target {
+          type                = "Utilization"
+          average_utilization = each.value.targetCPUUtilizationPercentage
+        }
+      }
+    }
+
+    dynamic "metric" {
+      for_each = each.value.targetRequestsPerSecond > 0 ? [each.value.targetRequestsPerSecond] : []
+      content {
+        type = "Pods"
+        pods {
+          metric {
+            name = var.hapi_request_rate_metric
+          }
+          target {
+            type          = "AverageValue"
+            average_value = tostring(metric.value)
+          }
+        }
+      }
+    }
+
+    behavior {
+      # HAPI pods take a while to warm their caches; shed capacity slowly.
+      scale_down {
+        stabilization_window_seconds = 300
+        select_policy                = "Max"
+        policy {
+          type           = "Pods"
+          value          = 1
+          period_seconds = 60
+        }
+      }
+    }
+  }
+
+  lifecycle {
+    precondition {
+      # The terminology pods use required anti-affinity: one replica per terminology node.
+      condition     = each.key != "terminology" || each.value.maxReplicas <= var.terminology_node_max_capacity
+      error_message = "terminology max replicas exceed terminology_node_max_capacity; extra pods could never be scheduled."
+    }
+    precondition {
+      condition     = each.value.minReplicas >= 1 && each.value.maxReplicas >= each.value.minReplicas
+      error_message = "HPA replica bounds need 1 <= minReplicas <= maxReplicas."
+    }
+  }
+}
@@ -29,7 +29,7 @@ if %ERRORLEVEL% neq 0 (
 )
 
 echo Running inventory.py ...
-python inventory.py
+python inventory.py %*
 
 popd
 endlocal
@@ -1,6 +1,15 @@
+import argparse
+import gzip
+import hashlib
+import json
 import os
 import sys
-from typing import Dict, Iterable, List, Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Optional, Tuple
 
 try:
     import boto3
@@ -9,21 +18,98 @@ except ModuleNotFoundError as exc:  # pragma: no cover - dependency guard
     print("boto3 is required to run inventory.py. Install it with `pip install boto3`.")
     raise SystemExit(1) from exc
 
-from hapi_cli_common import ensure_python_version, load_tfvars, prompt
+from hapi_aws_common import (
+    IAM_TAGGING_REGION,
+    environment_filters,
+    iter_resources,
+    iter_tagged_load_balancers,
+    rds_tag_index,
+    role_tag_index,
+    tag_dict,
+)
+from hapi_cli_common import (
+    aws_client,
+    configure_aws_clients,
+    ensure_python_version,
+    format_aws_client_stats,
+    load_tfvars,
+    prompt,
+)
 
+COLLECTOR_WORKERS = 12
+# describe_cluster / list_nodegroups / describe_nodegroup calls in flight per EKS collector.
+EKS_WORKERS = 8
+REGION_WORKERS = 4
+# Upper bound on in-flight collectors per AWS service, to stay clear of throttling.
+SERVICE_CONCURRENCY = {"ec2": 4, "eks": 2, "elbv2": 2, "iam": 1, "kms": 1, "logs": 1, "rds": 1}
+OUTPUT_FORMATS = ("table", "json", "ndjson")
+SNAPSHOT_DIR = Path(".inventory-snapshots")
+SNAPSHOT_KEEP = 20
+# Fields that change on their own and would drown out real drift in --diff.
+DIFF_IGNORED_FIELDS = {"stored_bytes"}
 
-def tag_dict(tag_input: Optional[Iterable[Dict[str, str]]]) -> Dict[str, str]:
-    if not tag_input:
-        return {}
-    if isinstance(tag_input, dict):
-        return dict(tag_input)
-    tags: Dict[str, str] = {}
-    for tag in tag_input:
-        key = tag.get("Key")
-        value = tag.get("Value")
-        if key:
-            tags[key] = value
-    return tags
+SECTIONS = [
+    "EKS Clusters",
+    "VPCs",
+    "Subnets",
+    "Route Tables",
+    "NAT Gateways",
+    "Internet Gateways",
+    "Security Groups",
+    "Network Interfaces",
+    "Application Load Balancers",
+    "RDS Databases",
+    "IAM Roles",
+    "KMS Keys",
+    "CloudWatch Log Groups",
+]
+
+# Upper bounds (seconds) of the latency buckets shown by --timings.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# IAM is account-wide; multi-region scans collect these sections once under GLOBAL_SCOPE.
+GLOBAL_SECTIONS = ("IAM Roles",)
+GLOBAL_SCOPE = "global"
+
+# RDS parameter group listings: (describe operation, result key, name key, ARN key, resource type).
+DB_PARAMETER_GROUPS = (
+    (
+        "describe_db_cluster_parameter_groups",
+        "DBClusterParameterGroups",
+        "DBClusterParameterGroupName",
+        "DBClusterParameterGroupArn",
+        "db_cluster_parameter_group",
+    ),
+    (
+        "describe_db_parameter_groups",
+        "DBParameterGroups",
+        "DBParameterGroupName",
+        "DBParameterGroupArn",
+        "db_parameter_group",
+    ),
+)
+
+# Section -> (describe operation, result key, VPC filter name, tag key, resource type).
+VPC_COMPONENTS = {
+    "Subnets": ("describe_subnets", "Subnets", "vpc-id", "Tags", "subnet"),
+    "Route Tables": ("describe_route_tables", "RouteTables", "vpc-id", "Tags", "route_table"),
+    "NAT Gateways": ("describe_nat_gateways", "NatGateways", "vpc-id", "Tags", "nat_gateway"),
+    "Internet Gateways": (
+        "describe_internet_gateways",
+        "InternetGateways",
+        "attachment.vpc-id",
+        "Tags",
+        "internet_gateway",
+    ),
+    "Security Groups": ("describe_security_groups", "SecurityGroups", "vpc-id", "Tags", "security_group"),
+    "Network Interfaces": (
+        "describe_network_interfaces",
+        "NetworkInterfaces",
+        "vpc-id",
+        "TagSet",
+        "network_interface",
+    ),
+}
 
 
 def format_tags(tags: Dict[str, str]) -> str:
@@ -43,337 +129,1067 @@ def print_section(title: str) -> None:
     print(f"\n=== {title} ===")
 
 
-def show_eks(session, cluster_name: Optional[str], env_tag: Optional[str]) -> None:
-    eks_client = session.client("eks")
-    clusters: List[Dict] = []
-    if cluster_name:
+@dataclass
+class EksCluster:
+    __slots__ = ("name", "version", "status", "arn", "tags")
+    kind: ClassVar[str] = "eks_cluster"
+    name: str
+    version: str
+    status: str
+    arn: Optional[str]
+    tags: Dict[str, str]
+
+    def line(self) -> str:
+        return f"  - {self.name} | version {self.version} | status {self.status} | tags: {format_tags(self.tags)}"
+
+
+@dataclass
+class EksNodeGroup:
+    __slots__ = ("cluster", "name", "status", "desired_size", "instance_types", "ami_type", "tags")
+    kind: ClassVar[str] = "eks_nodegroup"
+    cluster: str
+    name: str
+    status: Optional[str]
+    desired_size: Optional[int]
+    instance_types: List[str]
+    ami_type: Optional[str]
+    tags: Dict[str, str]
+
+    def line(self) -> str:
+        return (
+            f"      * {self.name} | status {self.status} | desired {self.desired_size} "
+            f"| instance types {', '.join(self.instance_types) or '-'} | ami {self.ami_type} | tags: {format_tags(self.tags)}"
+        )
+
+
+@dataclass
+class VpcResource:
+    """A VPC or one of its components; ``details`` holds the type-specific fields."""
+
+    __slots__ = ("resource_type", "resource_id", "vpc_id", "state", "details", "tags")
+    kind: ClassVar[str] = "vpc_resource"
+    resource_type: str
+    resource_id: str
+    vpc_id: Optional[str]
+    state: Optional[str]
+    details: Dict[str, Any]
+    tags: Dict[str, str]
+
+    def line(self) -> str:
+        d = self.details
+        tags = format_tags(self.tags)
+        if self.resource_type == "vpc":
+            return f"  - {self.resource_id} | cidr {d['cidr']} | state {self.state} | tags: {tags}"
+        if self.resource_type == "subnet":
+            return (
+                f"  - {self.resource_id} | {d['availability_zone']} | cidr {d['cidr']} "
+                f"| mapPublicIpOnLaunch={d['map_public_ip_on_launch']} | tags: {tags}"
+            )
+        if self.resource_type == "route_table":
+            return (
+                f"  - {self.resource_id} | main={d['main']} | associations={d['associations'] or '[]'} "
+                f"| routes={d['routes']} | tags: {tags}"
+            )
+        if self.resource_type == "nat_gateway":
+            return (
+                f"  - {self.resource_id} | state {self.state} | subnet {d['subnet_id']} "
+                f"| eips={d['allocation_ids'] or '[]'} | tags: {tags}"
+            )
+        if self.resource_type == "internet_gateway":
+            return f"  - {self.resource_id} | attachments={d['attachments'] or '[]'} | tags: {tags}"
+        if self.resource_type == "security_group":
+            return f"  - {self.resource_id} | name {d['name']} | vpc {self.vpc_id} | tags: {tags}"
+        return (
+            f"  - {self.resource_id} | status {self.state} | subnet {d['subnet_id']} "
+            f"| attachment {d['attachment']} | tags: {tags}"
+        )
+
+
+@dataclass
+class LoadBalancer:
+    __slots__ = ("arn", "name", "type", "state", "scheme", "tags")
+    kind: ClassVar[str] = "load_balancer"
+    arn: str
+    name: str
+    type: str
+    state: str
+    scheme: str
+    tags: Dict[str, str]
+
+    def line(self) -> str:
+        return (
+            f"  - {self.arn} | type {self.type} | state {self.state} "
+            f"| scheme {self.scheme} | tags: {format_tags(self.tags)}"
+        )
+
+
+@dataclass
+class DbResource:
+    """An RDS cluster, instance, subnet group or parameter group."""
+
+    __slots__ = ("resource_type", "resource_id", "state", "details", "tags")
+    kind: ClassVar[str] = "db_resource"
+    resource_type: str
+    resource_id: str
+    state: Optional[str]
+    details: Dict[str, Any]
+    tags: Dict[str, str]
+
+    def line(self) -> str:
+        d = self.details
+        tags = format_tags(self.tags)
+        if self.resource_type == "db_cluster":
+            return (
+                f"  - cluster {self.resource_id} | {d['engine']} | status {self.state} "
+                f"| writer {d['endpoint']} | reader {d['reader_endpoint']} | tags: {tags}"
+            )
+        if self.resource_type == "db_instance":
+            return (
+                f"  - instance {self.resource_id} | {d['instance_class']} | status {self.state} "
+                f"| cluster {d['cluster'] or '-'} | tags: {tags}"
+            )
+        if self.resource_type == "db_subnet_group":
+            return f"  - subnet group {self.resource_id} | vpc {d['vpc_id']} | subnets={d['subnets']} | tags: {tags}"
+        return f"  - parameter group {self.resource_id} | family {d['family']} | tags: {tags}"
+
+
+@dataclass
+class IamRole:
+    __slots__ = ("name", "arn", "tags")
+    kind: ClassVar[str] = "iam_role"
+    name: str
+    arn: str
+    tags: Dict[str, str]
+
+    def line(self) -> str:
+        return f"  - {self.name} | arn {self.arn} | tags: {format_tags(self.tags)}"
+
+
+@dataclass
+class KmsKey:
+    __slots__ = ("arn", "state", "deletion_date", "alias")
+    kind: ClassVar[str] = "kms_key"
+    arn: str
+    state: str
+    deletion_date: Optional[str]
+    alias: str
+
+    def line(self) -> str:
+        return f"  - {self.arn} | state {self.state} | deletion date {self.deletion_date} | alias {self.alias}"
+
+
+@dataclass
+class LogGroup:
+    __slots__ = ("name", "stored_bytes", "retention_days")
+    kind: ClassVar[str] = "log_group"
+    name: str
+    stored_bytes: int
+    retention_days: Optional[int]
+
+    def line(self) -> str:
+        retention = self.retention_days if self.retention_days is not None else "Never expires"
+        return f"  - {self.name} | stored bytes {self.stored_bytes} | retention {retention}"
+
+
+@dataclass
+class SectionNote:
+    """Explains why a section has no records (missing cluster, access errors, ...)."""
+
+    __slots__ = ("section", "message")
+    kind: ClassVar[str] = "note"
+    section: str
+    message: str
+
+    def line(self) -> str:
+        return f"  {self.message}"
+
+
+def record_to_dict(record) -> Dict[str, Any]:
+    data = {"kind": record.kind}
+    for field in fields(record):
+        data[field.name] = getattr(record, field.name)
+    return data
+
+
+RECORD_TYPES = {
+    cls.kind: cls
+    for cls in (EksCluster, EksNodeGroup, VpcResource, LoadBalancer, DbResource, IamRole, KmsKey, LogGroup, SectionNote)
+}
+
+
+def record_from_dict(data: Dict[str, Any]):
+    cls = RECORD_TYPES[data["kind"]]
+    return cls(*(data.get(field.name) for field in fields(cls)))
+
+
+class CallTimings:
+    """Thread-safe per-operation latency samples for the --timings report."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = {}
+
+    def call(self, operation: str, func: Callable[..., Any], **kwargs) -> Any:
+        started = time.perf_counter()
         try:
-            detail = eks_client.describe_cluster(name=cluster_name)["cluster"]
-            clusters.append(detail)
-        except ClientError as err:
-            print_section("EKS Clusters")
-            print(f"  No EKS cluster named {cluster_name}: {err.response['Error']['Message']}")
-            return
-    else:
-        for name in eks_client.list_clusters().get("clusters", []):
-            detail = eks_client.describe_cluster(name=name)["cluster"]
-            clusters.append(detail)
+            return func(**kwargs)
+        finally:
+            self.record(operation, time.perf_counter() - started)
 
-    filtered = []
-    for cluster in clusters:
-        tags = tag_dict(cluster.get("tags"))
-        if matches_env(tags, env_tag):
-            filtered.append((cluster, tags))
+    def record(self, operation: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(operation, []).append(seconds)
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return {operation: sorted(samples) for operation, samples in self._samples.items()}
+
+
+CALL_TIMINGS = CallTimings()
 
-    print_section("EKS Clusters")
-    if not filtered:
-        print("  (none)")
-        return
 
-    for cluster, tags in filtered:
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def render_timings(timings: CallTimings, stream=sys.stderr) -> None:
+    samples = timings.snapshot()
+    if not samples:
+        print("No AWS calls were timed.", file=stream)
+        return
+    labels = [f"<{bound * 1000:g}ms" for bound in LATENCY_BUCKETS] + [f">={LATENCY_BUCKETS[-1] * 1000:g}ms"]
+    print("\n=== Call latency ===", file=stream)
+    for operation, ordered in sorted(samples.items()):
+        counts = [0] * len(labels)
+        for seconds in ordered:
+            index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds < bound), len(LATENCY_BUCKETS))
+            counts[index] += 1
         print(
-            f"  - {cluster['name']} | version {cluster['version']} | status {cluster['status']} | tags: {format_tags(tags)}"
+            f"- {operation}: n={len(ordered)} total={sum(ordered):.2f}s "
+            f"p50={_percentile(ordered, 0.5) * 1000:.0f}ms p90={_percentile(ordered, 0.9) * 1000:.0f}ms "
+            f"max={ordered[-1] * 1000:.0f}ms",
+            file=stream,
         )
-        nodegroups = eks_client.list_nodegroups(clusterName=cluster["name"]).get("nodegroups", [])
-        if nodegroups:
-            print("    Node groups:")
-            for ng in nodegroups:
-                desc = eks_client.describe_nodegroup(clusterName=cluster["name"], nodegroupName=ng)["nodegroup"]
-                ng_tags = tag_dict(desc.get("tags"))
-                scaling = desc.get("scalingConfig", {})
-                print(
-                    f"      * {ng} | status {desc.get('status')} | desired {scaling.get('desiredSize')} "
-                    f"| instance types {', '.join(desc.get('instanceTypes', [])) or '-'} | ami {desc.get('amiType')} | tags: {format_tags(ng_tags)}"
+        print("    " + "  ".join(f"{label}:{count}" for label, count in zip(labels, counts) if count), file=stream)
+
+
+def collect_eks(
+    eks_client,
+    cluster_name: Optional[str],
+    env_tag: Optional[str],
+    max_workers: int = EKS_WORKERS,
+) -> Iterator:
+    """Describe clusters and node groups on a bounded pool, yielding in listing order.
+
+    Each level (clusters, node group listings, node groups) is submitted as a whole,
+    so the wall clock is about three round trips rather than one per resource.
+    """
+
+    def call(operation: str, **kwargs) -> Any:
+        return CALL_TIMINGS.call(f"eks.{operation}", getattr(eks_client, operation), **kwargs)
+
+    def list_nodegroups(name: str) -> List[str]:
+        return list(iter_resources(eks_client, "list_nodegroups", "nodegroups", clusterName=name))
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        if cluster_name:
+            try:
+                clusters = [call("describe_cluster", name=cluster_name)["cluster"]]
+            except ClientError as err:
+                yield SectionNote(
+                    "EKS Clusters",
+                    f"No EKS cluster named {cluster_name}: {err.response['Error']['Message']}",
                 )
+                return
         else:
-            print("    Node groups: (none)")
+            described = [
+                pool.submit(call, "describe_cluster", name=name)
+                for name in iter_resources(eks_client, "list_clusters", "clusters")
+            ]
+            clusters = [future.result()["cluster"] for future in described]
+
+        matched = [cluster for cluster in clusters if matches_env(tag_dict(cluster.get("tags")), env_tag)]
+        listings = [
+            pool.submit(CALL_TIMINGS.call, "eks.list_nodegroups", list_nodegroups, name=cluster["name"])
+            for cluster in matched
+        ]
+        nodegroups = [
+            [
+                pool.submit(call, "describe_nodegroup", clusterName=cluster["name"], nodegroupName=ng)
+                for ng in listing.result()
+            ]
+            for cluster, listing in zip(matched, listings)
+        ]
+
+        for cluster, described_groups in zip(matched, nodegroups):
+            yield EksCluster(
+                cluster["name"], cluster["version"], cluster["status"], cluster.get("arn"), tag_dict(cluster.get("tags"))
+            )
+            for future in described_groups:
+                desc = future.result()["nodegroup"]
+                yield EksNodeGroup(
+                    cluster["name"],
+                    desc["nodegroupName"],
+                    desc.get("status"),
+                    desc.get("scalingConfig", {}).get("desiredSize"),
+                    desc.get("instanceTypes", []),
+                    desc.get("amiType"),
+                    tag_dict(desc.get("tags")),
+                )
 
 
-def show_vpc_resources(session, cluster_name: Optional[str], env_tag: Optional[str]) -> None:
-    ec2 = session.client("ec2")
-    filters = []
-    if env_tag:
-        filters.append({"Name": "tag:Environment", "Values": [env_tag]})
+def collect_vpcs(ec2, cluster_name: Optional[str], env_tag: Optional[str]) -> Iterator[VpcResource]:
+    filters = environment_filters(env_tag)
     if cluster_name:
         filters.append({"Name": "tag:Name", "Values": [f"{cluster_name}-vpc"]})
-    vpcs = ec2.describe_vpcs(Filters=filters)["Vpcs"] if filters else ec2.describe_vpcs()["Vpcs"]
-    vpc_ids = [vpc["VpcId"] for vpc in vpcs]
-
-    print_section("VPCs")
-    if not vpcs:
-        print("  (none)")
-    for vpc in vpcs:
+    for vpc in iter_resources(ec2, "describe_vpcs", "Vpcs", Filters=filters):
         tags = tag_dict(vpc.get("Tags"))
-        if not matches_env(tags, env_tag):
-            continue
-        print(
-            f"  - {vpc['VpcId']} | cidr {vpc['CidrBlock']} | state {vpc['State']} | tags: {format_tags(tags)}"
-        )
+        if matches_env(tags, env_tag):
+            yield VpcResource(
+                "vpc", vpc["VpcId"], vpc["VpcId"], vpc["State"], {"cidr": vpc["CidrBlock"]}, tags
+            )
 
-    # Subnets
-    subnet_filters = [{"Name": "tag:Environment", "Values": [env_tag]}] if env_tag else []
-    if vpc_ids:
-        subnet_filters.append({"Name": "vpc-id", "Values": vpc_ids})
-    subnets = ec2.describe_subnets(Filters=subnet_filters)["Subnets"] if subnet_filters else []
-    print_section("Subnets")
-    if not subnets:
-        print("  (none)")
-    for subnet in subnets:
-        tags = tag_dict(subnet.get("Tags"))
-        if not matches_env(tags, env_tag):
-            continue
-        print(
-            f"  - {subnet['SubnetId']} | {subnet['AvailabilityZone']} | cidr {subnet['CidrBlock']} | mapPublicIpOnLaunch={subnet.get('MapPublicIpOnLaunch')} | tags: {format_tags(tags)}"
-        )
 
-    # Route tables
-    rt_filters = [{"Name": "tag:Environment", "Values": [env_tag]}] if env_tag else []
-    if vpc_ids:
-        rt_filters.append({"Name": "vpc-id", "Values": vpc_ids})
-    route_tables = ec2.describe_route_tables(Filters=rt_filters)["RouteTables"] if rt_filters else []
-    print_section("Route Tables")
-    if not route_tables:
-        print("  (none)")
-    for rt in route_tables:
-        tags = tag_dict(rt.get("Tags"))
-        if not matches_env(tags, env_tag):
-            continue
-        associations = [
-            assoc["SubnetId"] for assoc in rt.get("Associations", []) if not assoc.get("Main")
-        ]
-        is_main = any(assoc.get("Main") for assoc in rt.get("Associations", []))
-        print(
-            f"  - {rt['RouteTableId']} | main={is_main} | associations={associations or '[]'} | routes={len(rt.get('Routes', []))} | tags: {format_tags(tags)}"
+def _vpc_component_record(resource_type: str, resource: Dict, tags: Dict[str, str]) -> VpcResource:
+    if resource_type == "subnet":
+        return VpcResource(
+            resource_type,
+            resource["SubnetId"],
+            resource.get("VpcId"),
+            resource.get("State"),
+            {
+                "availability_zone": resource["AvailabilityZone"],
+                "cidr": resource["CidrBlock"],
+                "map_public_ip_on_launch": resource.get("MapPublicIpOnLaunch"),
+            },
+            tags,
         )
-
-    # Gateways
-    nat_filters = []
-    if env_tag:
-        nat_filters.append({"Name": "tag:Environment", "Values": [env_tag]})
-    if vpc_ids:
-        nat_filters.append({"Name": "vpc-id", "Values": vpc_ids})
-    nat_gws = (
-        ec2.describe_nat_gateways(Filters=nat_filters)["NatGateways"]
-        if nat_filters
-        else []
-    )
-    print_section("NAT Gateways")
-    if not nat_gws:
-        print("  (none)")
-    for gw in nat_gws:
-        tags = tag_dict(gw.get("Tags"))
-        if not matches_env(tags, env_tag):
-            continue
-        allocation_ids = [addr.get("AllocationId") for addr in gw.get("NatGatewayAddresses", []) if addr.get("AllocationId")]
-        print(
-            f"  - {gw['NatGatewayId']} | state {gw['State']} | subnet {gw.get('SubnetId')} | eips={allocation_ids or '[]'} | tags: {format_tags(tags)}"
+    if resource_type == "route_table":
+        associations = resource.get("Associations", [])
+        return VpcResource(
+            resource_type,
+            resource["RouteTableId"],
+            resource.get("VpcId"),
+            None,
+            {
+                "main": any(assoc.get("Main") for assoc in associations),
+                "associations": [assoc["SubnetId"] for assoc in associations if not assoc.get("Main")],
+                "routes": len(resource.get("Routes", [])),
+            },
+            tags,
         )
-
-    igw_filters = []
-    if env_tag:
-        igw_filters.append({"Name": "tag:Environment", "Values": [env_tag]})
-    if vpc_ids:
-        igw_filters.append({"Name": "attachment.vpc-id", "Values": vpc_ids})
-    igws = (
-        ec2.describe_internet_gateways(Filters=igw_filters)["InternetGateways"]
-        if igw_filters
-        else []
-    )
-    print_section("Internet Gateways")
-    if not igws:
-        print("  (none)")
-    for igw in igws:
-        tags = tag_dict(igw.get("Tags"))
-        if not matches_env(tags, env_tag):
-            continue
-        attachments = [att.get("VpcId") for att in igw.get("Attachments", [])]
-        print(
-            f"  - {igw['InternetGatewayId']} | attachments={attachments or '[]'} | tags: {format_tags(tags)}"
+    if resource_type == "nat_gateway":
+        return VpcResource(
+            resource_type,
+            resource["NatGatewayId"],
+            resource.get("VpcId"),
+            resource["State"],
+            {
+                "subnet_id": resource.get("SubnetId"),
+                "allocation_ids": [
+                    addr.get("AllocationId")
+                    for addr in resource.get("NatGatewayAddresses", [])
+                    if addr.get("AllocationId")
+                ],
+            },
+            tags,
         )
-
-    # Security groups
-    sg_filters = []
-    if env_tag:
-        sg_filters.append({"Name": "tag:Environment", "Values": [env_tag]})
-    if vpc_ids:
-        sg_filters.append({"Name": "vpc-id", "Values": vpc_ids})
-    sgs = (
-        ec2.describe_security_groups(Filters=sg_filters)["SecurityGroups"]
-        if sg_filters
-        else []
-    )
-    print_section("Security Groups")
-    if not sgs:
-        print("  (none)")
-    for sg in sgs:
-        tags = tag_dict(sg.get("Tags"))
-        if not matches_env(tags, env_tag):
-            continue
-        print(
-            f"  - {sg['GroupId']} | name {sg['GroupName']} | vpc {sg.get('VpcId')} | tags: {format_tags(tags)}"
+    if resource_type == "internet_gateway":
+        attachments = [att.get("VpcId") for att in resource.get("Attachments", [])]
+        return VpcResource(
+            resource_type,
+            resource["InternetGatewayId"],
+            attachments[0] if attachments else None,
+            None,
+            {"attachments": attachments},
+            tags,
+        )
+    if resource_type == "security_group":
+        return VpcResource(
+            resource_type,
+            resource["GroupId"],
+            resource.get("VpcId"),
+            None,
+            {"name": resource["GroupName"]},
+            tags,
         )
+    attachment = resource.get("Attachment", {})
+    return VpcResource(
+        resource_type,
+        resource["NetworkInterfaceId"],
+        resource.get("VpcId"),
+        resource.get("Status"),
+        {
+            "subnet_id": resource.get("SubnetId"),
+            "attachment": attachment.get("InstanceId") or attachment.get("AttachmentId"),
+        },
+        tags,
+    )
+
 
-    # Network interfaces
-    paginator = ec2.get_paginator("describe_network_interfaces")
-    print_section("Network Interfaces")
-    eni_count = 0
-    eni_filters = []
-    if env_tag:
-        eni_filters.append({"Name": "tag:Environment", "Values": [env_tag]})
+def collect_vpc_component(
+    ec2, section: str, env_tag: Optional[str], vpc_ids: List[str]
+) -> Iterator[VpcResource]:
+    operation, result_key, vpc_filter, tag_key, resource_type = VPC_COMPONENTS[section]
+    filters = environment_filters(env_tag)
     if vpc_ids:
-        eni_filters.append({"Name": "vpc-id", "Values": vpc_ids})
-    paginate_kwargs = {"Filters": eni_filters} if eni_filters else {}
-    for page in paginator.paginate(**paginate_kwargs):
-        for eni in page.get("NetworkInterfaces", []):
-            tags = tag_dict(eni.get("TagSet"))
-            if not matches_env(tags, env_tag):
-                continue
-            eni_count += 1
-            attachment = eni.get("Attachment", {})
-            print(
-                f"  - {eni['NetworkInterfaceId']} | status {eni.get('Status')} | subnet {eni.get('SubnetId')} "
-                f"| attachment {attachment.get('InstanceId') or attachment.get('AttachmentId')} | tags: {format_tags(tags)}"
+        filters.append({"Name": vpc_filter, "Values": vpc_ids})
+    if not filters and section != "Network Interfaces":
+        return
+
+    for resource in iter_resources(ec2, operation, result_key, Filters=filters):
+        tags = tag_dict(resource.get(tag_key))
+        if matches_env(tags, env_tag):
+            yield _vpc_component_record(resource_type, resource, tags)
+
+
+def collect_load_balancers(elbv2, env_tag: Optional[str]) -> Iterator[LoadBalancer]:
+    for lb, tags in iter_tagged_load_balancers(elbv2):
+        if matches_env(tags, env_tag):
+            yield LoadBalancer(
+                lb["LoadBalancerArn"],
+                lb.get("LoadBalancerName", ""),
+                lb["Type"],
+                lb["State"]["Code"],
+                lb["Scheme"],
+                tags,
             )
-    if eni_count == 0:
-        print("  (none)")
 
 
-def show_load_balancers(session, env_tag: Optional[str]) -> None:
-    elbv2 = session.client("elbv2")
-    paginator = elbv2.get_paginator("describe_load_balancers")
-    matched = []
-    for page in paginator.paginate():
-        arns = [lb["LoadBalancerArn"] for lb in page.get("LoadBalancers", [])]
-        if not arns:
-            continue
-        tag_desc = elbv2.describe_tags(ResourceArns=arns)["TagDescriptions"]
-        for lb in page["LoadBalancers"]:
-            tags = {}
-            for desc in tag_desc:
-                if desc["ResourceArn"] == lb["LoadBalancerArn"]:
-                    tags = tag_dict(desc.get("Tags"))
-                    break
-            if matches_env(tags, env_tag):
-                matched.append((lb, tags))
-
-    print_section("Application Load Balancers")
-    if not matched:
-        print("  (none)")
-        return
-    for lb, tags in matched:
-        print(
-            f"  - {lb['LoadBalancerArn']} | type {lb['Type']} | state {lb['State']['Code']} | scheme {lb['Scheme']} | tags: {format_tags(tags)}"
-        )
+def collect_rds(rds, tagging, env_tag: Optional[str]) -> Iterator[DbResource]:
+    for cluster in iter_resources(rds, "describe_db_clusters", "DBClusters"):
+        tags = tag_dict(cluster.get("TagList"))
+        if matches_env(tags, env_tag):
+            yield DbResource(
+                "db_cluster",
+                cluster["DBClusterIdentifier"],
+                cluster.get("Status"),
+                {
+                    "engine": f"{cluster.get('Engine')} {cluster.get('EngineVersion')}",
+                    "endpoint": cluster.get("Endpoint"),
+                    "reader_endpoint": cluster.get("ReaderEndpoint"),
+                },
+                tags,
+            )
+    for db in iter_resources(rds, "describe_db_instances", "DBInstances"):
+        tags = tag_dict(db.get("TagList"))
+        if matches_env(tags, env_tag):
+            yield DbResource(
+                "db_instance",
+                db["DBInstanceIdentifier"],
+                db.get("DBInstanceStatus"),
+                {"instance_class": db.get("DBInstanceClass"), "cluster": db.get("DBClusterIdentifier")},
+                tags,
+            )
+    # Subnet and parameter groups do not return their tags; one tagging API listing covers them all.
+    subnet_groups = list(iter_resources(rds, "describe_db_subnet_groups", "DBSubnetGroups"))
+    parameter_groups = [
+        (resource_type, group[name_key], group[arn_key], group.get("DBParameterGroupFamily"))
+        for operation, result_key, name_key, arn_key, resource_type in DB_PARAMETER_GROUPS
+        for group in iter_resources(rds, operation, result_key)
+        if not group[name_key].startswith("default.")
+    ]
+    tag_index = rds_tag_index(
+        rds,
+        [group["DBSubnetGroupArn"] for group in subnet_groups] + [arn for _, _, arn, _ in parameter_groups],
+        env_tag,
+        tagging,
+    )
+    for group in subnet_groups:
+        tags = tag_index.get(group["DBSubnetGroupArn"], {})
+        if matches_env(tags, env_tag):
+            yield DbResource(
+                "db_subnet_group",
+                group["DBSubnetGroupName"],
+                group.get("SubnetGroupStatus"),
+                {"vpc_id": group.get("VpcId"), "subnets": len(group.get("Subnets", []))},
+                tags,
+            )
+    for resource_type, name, arn, family in parameter_groups:
+        tags = tag_index.get(arn, {})
+        if matches_env(tags, env_tag):
+            yield DbResource(resource_type, name, None, {"family": family}, tags)
 
 
-def show_iam_roles(session, cluster_name: Optional[str], env_tag: Optional[str]) -> None:
-    iam = session.client("iam")
-    paginator = iam.get_paginator("list_roles")
-    print_section("IAM Roles")
-    found = False
-    for page in paginator.paginate():
-        for role in page.get("Roles", []):
-            role_name = role["RoleName"]
-            if cluster_name and cluster_name not in role_name:
-                try:
-                    tags = iam.list_role_tags(RoleName=role_name).get("Tags", [])
-                except ClientError:
-                    continue
-                tag_map = tag_dict(tags)
-                if not matches_env(tag_map, env_tag):
-                    continue
-            else:
-                tags = iam.list_role_tags(RoleName=role_name).get("Tags", [])
-                tag_map = tag_dict(tags)
-                if not matches_env(tag_map, env_tag):
-                    continue
-            found = True
-            print(f"  - {role_name} | arn {role['Arn']} | tags: {format_tags(tag_map)}")
-    if not found:
-        print("  (none)")
+def collect_iam_roles(iam, tagging, env_tag: Optional[str]) -> Iterator[IamRole]:
+    roles = list(iter_resources(iam, "list_roles", "Roles"))
+    tag_index = role_tag_index(iam, roles, env_tag, tagging)
+
+    for role in roles:
+        role_name = role["RoleName"]
+        if role_name not in tag_index:
+            continue
+        tag_map = tag_index[role_name]
+        if matches_env(tag_map, env_tag):
+            yield IamRole(role_name, role["Arn"], tag_map)
 
 
-def show_kms_keys(session, cluster_name: Optional[str]) -> None:
-    print_section("KMS Keys")
+def collect_kms_keys(kms, cluster_name: Optional[str]) -> Iterator:
     if not cluster_name:
-        print("  (cluster name not provided)")
+        yield SectionNote("KMS Keys", "(cluster name not provided)")
         return
-    kms = session.client("kms")
     alias_name = f"alias/eks/{cluster_name}"
-    paginator = kms.get_paginator("list_aliases")
-    alias_entry = None
-    for page in paginator.paginate():
-        for alias in page.get("Aliases", []):
-            if alias.get("AliasName") == alias_name:
-                alias_entry = alias
-                break
-        if alias_entry:
-            break
+    alias_entry = next(
+        (alias for alias in iter_resources(kms, "list_aliases", "Aliases") if alias.get("AliasName") == alias_name),
+        None,
+    )
     if not alias_entry or "TargetKeyId" not in alias_entry:
-        print("  (none)")
         return
     key = kms.describe_key(KeyId=alias_entry["TargetKeyId"])["KeyMetadata"]
-    print(
-        f"  - {key['Arn']} | state {key['KeyState']} | deletion date {key.get('DeletionDate')} | alias {alias_name}"
+    deletion_date = key.get("DeletionDate")
+    yield KmsKey(
+        key["Arn"],
+        key["KeyState"],
+        deletion_date.isoformat() if deletion_date else None,
+        alias_name,
     )
 
 
-def show_cloudwatch_logs(session, cluster_name: Optional[str]) -> None:
-    if not cluster_name:
-        return
-    logs = session.client("logs")
+def collect_log_groups(logs, cluster_name: str) -> Iterator:
     log_group_name = f"/aws/eks/{cluster_name}/cluster"
-    print_section("CloudWatch Log Groups")
     try:
-        response = logs.describe_log_groups(logGroupNamePrefix=log_group_name)
+        for group in iter_resources(logs, "describe_log_groups", "logGroups", logGroupNamePrefix=log_group_name):
+            yield LogGroup(group["logGroupName"], group.get("storedBytes", 0), group.get("retentionInDays"))
     except ClientError as err:
-        print(f"  Unable to describe log groups: {err.response['Error']['Message']}")
-        return
-    groups = response.get("logGroups", [])
-    if not groups:
-        print("  (none)")
+        yield SectionNote(
+            "CloudWatch Log Groups",
+            f"Unable to describe log groups: {err.response['Error']['Message']}",
+        )
+
+
+def _drain(
+    limit: threading.BoundedSemaphore,
+    section: str,
+    func: Callable[..., Iterator],
+    args: tuple,
+    sink: Callable[[str, Any], None],
+) -> List[str]:
+    """Feed every record a collector yields to ``sink``; return VPC IDs for scoping."""
+    vpc_ids = []
+    with limit:
+        for record in func(*args):
+            sink(section, record)
+            if isinstance(record, VpcResource) and record.resource_type == "vpc":
+                vpc_ids.append(record.resource_id)
+    return vpc_ids
+
+
+def collect_inventory(
+    session,
+    cluster_name: Optional[str],
+    env_tag: Optional[str],
+    sink: Optional[Callable[[str, Any], None]] = None,
+    region: Optional[str] = None,
+    sections: Optional[Iterable[str]] = None,
+    retain: Optional[bool] = None,
+) -> Dict[str, Optional[List]]:
+    """Run every collector for ``region`` (default: the session's) concurrently.
+
+    Records go to ``sink`` as soon as they are produced. They are also returned
+    grouped by section when ``retain`` is set, which is the default without a
+    sink. Sections that do not apply map to ``None``; ``sections`` limits the
+    scan to the listed titles.
+    """
+    wanted = set(sections) if sections is not None else set(SECTIONS)
+    clients = {service: aws_client(service, region, session) for service in SERVICE_CONCURRENCY}
+    tagging = aws_client("resourcegroupstaggingapi", IAM_TAGGING_REGION, session)
+    regional_tagging = aws_client("resourcegroupstaggingapi", region, session)
+    limits = {
+        service: threading.BoundedSemaphore(limit) for service, limit in SERVICE_CONCURRENCY.items()
+    }
+    results: Dict[str, Optional[List]] = {section: [] for section in SECTIONS if section in wanted}
+    if not cluster_name and "CloudWatch Log Groups" in results:
+        results["CloudWatch Log Groups"] = None
+    if retain is None:
+        retain = sink is None
+    forward = sink
+
+    def sink(section: str, record) -> None:
+        if forward is not None:
+            forward(section, record)
+        if retain:
+            results[section].append(record)
+
+    with ThreadPoolExecutor(max_workers=COLLECTOR_WORKERS) as pool:
+
+        def submit(service: str, section: str, func: Callable[..., Iterator], *args) -> Future:
+            return pool.submit(_drain, limits[service], section, func, args, sink)
+
+        ec2 = clients["ec2"]
+        futures = []
+        vpc_future = None
+        if "VPCs" in wanted:
+            vpc_future = submit("ec2", "VPCs", collect_vpcs, ec2, cluster_name, env_tag)
+        if "EKS Clusters" in wanted:
+            futures.append(submit("eks", "EKS Clusters", collect_eks, clients["eks"], cluster_name, env_tag))
+        if "Application Load Balancers" in wanted:
+            futures.append(
+                submit("elbv2", "Application Load Balancers", collect_load_balancers, clients["elbv2"], env_tag)
+            )
+        if "RDS Databases" in wanted:
+            futures.append(submit("rds", "RDS Databases", collect_rds, clients["rds"], regional_tagging, env_tag))
+        if "IAM Roles" in wanted:
+            futures.append(submit("iam", "IAM Roles", collect_iam_roles, clients["iam"], tagging, env_tag))
+        if "KMS Keys" in wanted:
+            futures.append(submit("kms", "KMS Keys", collect_kms_keys, clients["kms"], cluster_name))
+        if cluster_name and "CloudWatch Log Groups" in wanted:
+            futures.append(
+                submit("logs", "CloudWatch Log Groups", collect_log_groups, clients["logs"], cluster_name)
+            )
+        if vpc_future is not None:
+            # The remaining VPC components are scoped to the VPCs found above.
+            vpc_ids = vpc_future.result()
+            for section in VPC_COMPONENTS:
+                if section in wanted:
+                    futures.append(
+                        submit("ec2", section, collect_vpc_component, ec2, section, env_tag, vpc_ids)
+                    )
+        for future in futures:
+            future.result()
+    return results
+
+
+def render_inventory(results: Dict[str, Optional[List]]) -> None:
+    """Print collected sections in the fixed report order."""
+    for section in SECTIONS:
+        records = results.get(section)
+        if records is None:
+            continue
+        print_section(section)
+        if not records:
+            print("  (none)")
+            continue
+        nodegroups: Dict[str, List[EksNodeGroup]] = {}
+        for record in records:
+            if isinstance(record, EksNodeGroup):
+                nodegroups.setdefault(record.cluster, []).append(record)
+        for record in records:
+            if isinstance(record, EksNodeGroup):
+                continue
+            print(record.line())
+            if isinstance(record, EksCluster):
+                if not nodegroups.get(record.name):
+                    print("    Node groups: (none)")
+                    continue
+                print("    Node groups:")
+                for nodegroup in nodegroups[record.name]:
+                    print(nodegroup.line())
+
+
+def resolve_regions(session, spec: str) -> List[str]:
+    if spec.strip().lower() == "all":
+        regions = aws_client("ec2", None, session).describe_regions()["Regions"]
+        return sorted(region["RegionName"] for region in regions)
+    return list(dict.fromkeys(region.strip() for region in spec.split(",") if region.strip()))
+
+
+ScanResult = Tuple[Dict[str, Optional[List]], float]
+
+
+def _timed_scan(session, region: str, sink, **kwargs) -> ScanResult:
+    started = time.monotonic()
+    results = collect_inventory(session, region=region, sink=sink, **kwargs)
+    return results, time.monotonic() - started
+
+
+def scan_regions(
+    session,
+    regions: List[str],
+    cluster_name: Optional[str],
+    env_tag: Optional[str],
+    sink: Optional[Callable[[str, str, Any], None]] = None,
+    retain: Optional[bool] = None,
+) -> Dict[str, ScanResult]:
+    """Scan each region concurrently and return ``{scope: (results, seconds)}``.
+
+    With more than one region the account-wide sections are collected once
+    under ``GLOBAL_SCOPE`` instead of once per region.
+    """
+    # Resolve credentials once so every worker reuses them instead of racing the chain.
+    session.get_credentials()
+    multi = len(regions) > 1
+    regional = [section for section in SECTIONS if not (multi and section in GLOBAL_SECTIONS)]
+    scopes = [(region, region, regional) for region in regions]
+    if multi:
+        scopes.append((GLOBAL_SCOPE, regions[0], list(GLOBAL_SECTIONS)))
+
+    def scoped_sink(scope: str):
+        if sink is None:
+            return None
+        return lambda section, record: sink(scope, section, record)
+
+    with ThreadPoolExecutor(max_workers=min(REGION_WORKERS, len(scopes))) as pool:
+        futures = {
+            scope: pool.submit(
+                _timed_scan,
+                session,
+                region,
+                scoped_sink(scope),
+                cluster_name=cluster_name,
+                env_tag=env_tag,
+                sections=scope_sections,
+                retain=retain,
+            )
+            for scope, region, scope_sections in scopes
+        }
+        return {scope: future.result() for scope, future in futures.items()}
+
+
+def render_report(report: Dict[str, ScanResult]) -> None:
+    for scope, (results, seconds) in report.items():
+        print(f"\n##### {scope} (scanned in {seconds:.1f}s) #####")
+        render_inventory(results)
+
+
+def inventory_document(report: Dict[str, ScanResult]) -> Dict[str, Any]:
+    document: Dict[str, Any] = {"regions": {}}
+    for scope, (results, seconds) in report.items():
+        document["regions"][scope] = {
+            "elapsed_seconds": round(seconds, 3),
+            "records": [
+                record_to_dict(record)
+                for section in SECTIONS
+                for record in (results.get(section) or [])
+            ],
+        }
+    return document
+
+
+def ndjson_sink(stream=None) -> Callable[[str, str, Any], None]:
+    """Write each record as one JSON line the moment a collector yields it."""
+    lock = threading.Lock()
+    stream = stream or sys.stdout
+
+    def sink(region: str, section: str, record) -> None:
+        data = record if isinstance(record, dict) else record_to_dict(record)
+        line = json.dumps({"region": region, "section": section, **data}, default=str)
+        with lock:
+            stream.write(line + "\n")
+            stream.flush()
+
+    return sink
+
+
+def snapshot_key(regions: List[str], cluster_name: Optional[str], env_tag: Optional[str]) -> str:
+    identity = json.dumps([sorted(regions), cluster_name or "", env_tag or ""])
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:12]
+
+
+def list_snapshots(key: str) -> List[Path]:
+    """Snapshots for ``key``, newest first."""
+    if not SNAPSHOT_DIR.is_dir():
+        return []
+    return sorted(SNAPSHOT_DIR.glob(f"{key}-*.ndjson.gz"), reverse=True)
+
+
+def fresh_snapshot(key: str, max_age: float) -> Optional[Path]:
+    for path in list_snapshots(key):
+        if time.time() - path.stat().st_mtime <= max_age:
+            return path
+        break
+    return None
+
+
+class SnapshotWriter:
+    """Stream records into a gzipped NDJSON snapshot, published atomically on close."""
+
+    def __init__(self, key: str, header: Dict[str, Any]) -> None:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)) + f"{int(now * 1000) % 1000:03d}"
+        self.path = SNAPSHOT_DIR / f"{key}-{stamp}-{os.getpid()}.ndjson.gz"
+        self._partial = self.path.with_name(self.path.name + ".part")
+        self._lock = threading.Lock()
+        self._stream = gzip.open(self._partial, "wt", encoding="utf-8")
+        self._write({"kind": "snapshot_header", "created": time.time(), **header})
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        line = json.dumps(data, default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+
+    def sink(self, region: str, section: str, record) -> None:
+        data = record if isinstance(record, dict) else record_to_dict(record)
+        self._write({"region": region, "section": section, **data})
+
+    def close(self, key: str) -> Path:
+        self._stream.close()
+        os.replace(self._partial, self.path)
+        for stale in list_snapshots(key)[SNAPSHOT_KEEP:]:
+            stale.unlink()
+        return self.path
+
+    def abandon(self) -> None:
+        self._stream.close()
+        self._partial.unlink()
+
+
+def read_snapshot(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield the snapshot's record lines (the header is skipped)."""
+    with gzip.open(path, "rt", encoding="utf-8") as stream:
+        for line in stream:
+            data = json.loads(line)
+            if data.get("kind") != "snapshot_header":
+                yield data
+
+
+def report_from_snapshot(path: Path) -> Dict[str, ScanResult]:
+    report: Dict[str, ScanResult] = {}
+    for data in read_snapshot(path):
+        scope = data.pop("region")
+        section = data.pop("section")
+        results, seconds = report.setdefault(scope, ({}, 0.0))
+        if data["kind"] == "scan_summary":
+            report[scope] = (results, data["elapsed_seconds"])
+            for empty, applies in data.get("sections", {}).items():
+                results.setdefault(empty, [] if applies else None)
+            continue
+        results.setdefault(section, []).append(record_from_dict(data))
+    return report
+
+
+def record_identity(data: Dict[str, Any]) -> Tuple[str, str, str]:
+    kind = data["kind"]
+    if kind in {"vpc_resource", "db_resource"}:
+        ident = f"{data['resource_type']}/{data['resource_id']}"
+    elif kind == "eks_nodegroup":
+        ident = f"{data['cluster']}/{data['name']}"
+    elif kind in {"load_balancer", "kms_key"}:
+        ident = data["arn"]
+    elif kind == "note":
+        ident = data["section"]
+    else:
+        ident = data["name"]
+    return data.get("region", ""), kind, ident
+
+
+def _diff_index(records: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+    index = {}
+    for data in records:
+        if data["kind"] in {"scan_summary", "note"}:
+            continue
+        comparable = {
+            key: value
+            for key, value in data.items()
+            if key not in DIFF_IGNORED_FIELDS and key != "section"
+        }
+        index[record_identity(data)] = comparable
+    return index
+
+
+def diff_snapshots(before: Path, after: Path) -> Dict[str, List[Dict[str, Any]]]:
+    old = _diff_index(read_snapshot(before))
+    new = _diff_index(read_snapshot(after))
+    changes: Dict[str, List[Dict[str, Any]]] = {"added": [], "removed": [], "changed": []}
+    for key in sorted(new.keys() - old.keys()):
+        changes["added"].append(new[key])
+    for key in sorted(old.keys() - new.keys()):
+        changes["removed"].append(old[key])
+    for key in sorted(old.keys() & new.keys()):
+        if old[key] == new[key]:
+            continue
+        changed_fields = sorted(
+            field for field in old[key].keys() | new[key].keys() if old[key].get(field) != new[key].get(field)
+        )
+        changes["changed"].append(
+            {
+                "region": key[0],
+                "kind": key[1],
+                "id": key[2],
+                "fields": {field: [old[key].get(field), new[key].get(field)] for field in changed_fields},
+            }
+        )
+    return changes
+
+
+def render_diff(changes: Dict[str, List[Dict[str, Any]]], baseline: Path) -> None:
+    print(f"\n=== Changes since {baseline.name} ===")
+    if not any(changes.values()):
+        print("  (no changes)")
         return
-    for group in groups:
-        print(
-            f"  - {group['logGroupName']} | stored bytes {group.get('storedBytes', 0)} | retention {group.get('retentionInDays', 'Never expires')}"
+    for marker, change in (("+", "added"), ("-", "removed")):
+        for data in changes[change]:
+            region, kind, ident = record_identity(data)
+            print(f"  {marker} [{region}] {kind} {ident}")
+    for entry in changes["changed"]:
+        fields_changed = ", ".join(
+            f"{field}: {before!r} -> {after!r}" for field, (before, after) in entry["fields"].items()
         )
+        print(f"  ~ [{entry['region']}] {entry['kind']} {entry['id']} ({fields_changed})")
+
+
+def scan_to_snapshot(
+    session,
+    regions: List[str],
+    key: str,
+    cluster_name: Optional[str],
+    env_tag: Optional[str],
+    stream: bool = False,
+    retain: bool = True,
+) -> Tuple[Path, Dict[str, ScanResult]]:
+    """Scan live, writing every record to a new snapshot (and stdout when ``stream``)."""
+    writer = SnapshotWriter(
+        key, {"regions": regions, "cluster": cluster_name, "environment": env_tag}
+    )
+    printer = ndjson_sink() if stream else None
+
+    def sink(scope: str, section: str, record) -> None:
+        writer.sink(scope, section, record)
+        if printer is not None:
+            printer(scope, section, record)
+
+    try:
+        report = scan_regions(session, regions, cluster_name, env_tag, sink, retain=retain)
+    except BaseException:
+        writer.abandon()
+        raise
+    for scope, (results, seconds) in report.items():
+        summary = {
+            "kind": "scan_summary",
+            "elapsed_seconds": round(seconds, 3),
+            "sections": {section: records is not None for section, records in results.items()},
+        }
+        sink(scope, "", summary)
+    return writer.close(key), report
+
+
+def resolve_baseline(spec: str, previous: List[Path], current: Path) -> Optional[Path]:
+    if spec == "latest":
+        return next((path for path in previous if path != current), None)
+    path = Path(spec).expanduser()
+    return path if path.is_file() else None
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Summarize AWS resources created for a HAPI FHIR EKS stack."
+    )
+    parser.add_argument("--cluster", help="Cluster name to inspect (skips the prompt).")
+    parser.add_argument("--environment", help="Environment tag filter (skips the prompt).")
+    parser.add_argument("--region", help="AWS region to scan (skips the prompt).")
+    parser.add_argument(
+        "--regions",
+        help="Comma-separated regions to scan concurrently, or 'all' for every enabled region.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="table",
+        help="Output format. json and ndjson never prompt; missing values fall back to saved defaults.",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="Reuse the latest local snapshot for the same scope if it is younger than this.",
+    )
+    parser.add_argument(
+        "--diff",
+        metavar="SNAPSHOT",
+        help="Report only resources added, removed or changed since SNAPSHOT (a path, or 'latest').",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print per-call AWS latency histograms and retry/throttle counts to stderr after the scan.",
+    )
+    return parser.parse_args(argv)
 
 
-def main() -> None:
+def main(argv=None) -> None:
     ensure_python_version()
+    args = parse_args(argv)
     tf_values = load_tfvars()
+    interactive = args.format == "table"
 
-    cluster_name = prompt(
+    def ask(value: Optional[str], message: str, default: str) -> str:
+        if value is not None:
+            return value
+        return prompt(message, default) if interactive else default
+
+    cluster_name = ask(
+        args.cluster,
         "Cluster name to inspect (Enter to list all clusters)",
         tf_values.get("cluster_name", ""),
     )
-    env_tag = prompt(
+    env_tag = ask(
+        args.environment,
         "Environment tag filter (Enter to include all)",
         tf_values.get("environment", ""),
     )
     env_tag = env_tag or None
-    region = prompt(
-        "AWS region (default us-east-1)",
+    default_region = (
         tf_values.get("aws_region")
         or os.environ.get("AWS_REGION")
         or os.environ.get("AWS_DEFAULT_REGION")
-        or "us-east-1",
-    ) or "us-east-1"
+        or "us-east-1"
+    )
+    if args.regions:
+        region = args.region or default_region
+    else:
+        region = ask(args.region, "AWS region (default us-east-1)", default_region) or "us-east-1"
 
+    # Clients are per region, shared by that region's collectors and the EKS describe pool.
+    configure_aws_clients(COLLECTOR_WORKERS + EKS_WORKERS)
     session = boto3.Session(region_name=region)
+    log_stream = sys.stdout if interactive else sys.stderr
+    streaming = args.format == "ndjson" and not args.diff
+    report = None
 
     try:
-        show_eks(session, cluster_name or None, env_tag)
-        show_vpc_resources(session, cluster_name or None, env_tag)
-        show_load_balancers(session, env_tag)
-        show_iam_roles(session, cluster_name or None, env_tag)
-        show_kms_keys(session, cluster_name or None)
-        show_cloudwatch_logs(session, cluster_name or None)
+        regions = resolve_regions(session, args.regions) if args.regions else [region]
+        key = snapshot_key(regions, cluster_name, env_tag)
+        previous = list_snapshots(key)
+        snapshot = fresh_snapshot(key, args.cache_ttl) if args.cache_ttl > 0 else None
+        if snapshot is None:
+            snapshot, report = scan_to_snapshot(
+                session,
+                regions,
+                key,
+                cluster_name or None,
+                env_tag,
+                stream=streaming,
+                retain=args.format != "ndjson" and not args.diff,
+            )
+        else:
+            print(f"Using cached snapshot {snapshot}.", file=log_stream)
+            if streaming:
+                printer = ndjson_sink()
+                for data in read_snapshot(snapshot):
+                    printer(data.pop("region"), data.pop("section"), data)
     except ClientError as err:
-        print(f"❌ AWS reported an error: {err.response['Error']['Message']}")
+        print(f"❌ AWS reported an error: {err.response['Error']['Message']}", file=log_stream)
         sys.exit(1)
+    if args.timings:
+        render_timings(CALL_TIMINGS)
+        print(format_aws_client_stats(), file=sys.stderr)
 
-    print("\n✅ Inventory complete. Review the sections above for active resources.")
+    if args.diff:
+        baseline = resolve_baseline(args.diff, previous, snapshot)
+        if baseline is None:
+            print(f"❌ No earlier snapshot to compare against ({args.diff}).", file=log_stream)
+            sys.exit(1)
+        changes = diff_snapshots(baseline, snapshot)
+        if args.format == "json":
+            print(json.dumps({"baseline": str(baseline), **changes}, indent=2, default=str))
+        elif args.format == "ndjson":
+            for change, entries in changes.items():
+                for entry in entries:
+                    print(json.dumps({"change": change, **entry}, default=str))
+        else:
+            render_diff(changes, baseline)
+        return
+    if streaming:
+        return
+
+    if report is None:
+        report = report_from_snapshot(snapshot)
+    if args.format == "json":
+        print(json.dumps(inventory_document(report), indent=2, default=str))
+    else:
+        render_report(report)
+        print("\n✅ Inventory complete. Review the sections above for active resources.")
 
 
 if __name__ == "__main__":
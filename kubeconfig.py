@@ -1,15 +1,27 @@
 import argparse
+import importlib.util
 import os
+import statistics
+import subprocess
 import sys
+import time
 from pathlib import Path
+from typing import Dict, List, Optional
 
 from hapi_cli_common import (
+    AWS_BACKENDS,
+    aws_client,
+    aws_session,
     ensure_python_version,
     load_tfvars,
     prompt,
+    resolve_aws_backend,
     run_streamed,
 )
 
+EXEC_API_VERSION = "client.authentication.k8s.io/v1beta1"
+BENCHMARK_RUNS = 3
+
 
 def default_region(tfvars):
     return (
@@ -54,9 +66,136 @@ def parse_args():
         action="store_true",
         help="Print the AWS CLI command without executing it.",
     )
+    parser.add_argument(
+        "--aws-backend",
+        choices=AWS_BACKENDS,
+        default="auto",
+        help="Write kubeconfig in-process with boto3 (sdk) or via `aws eks update-kubeconfig` (cli). "
+        "auto uses boto3 and PyYAML when they are installed.",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Time the cluster lookup through the AWS CLI and through boto3, then exit.",
+    )
     return parser.parse_args()
 
 
+def kubeconfig_path(override: Optional[Path]) -> Path:
+    if override:
+        return override.expanduser()
+    # Like kubectl and the AWS CLI, write to the first file listed in KUBECONFIG.
+    env_paths = [part for part in os.environ.get("KUBECONFIG", "").split(os.pathsep) if part]
+    if env_paths:
+        return Path(env_paths[0]).expanduser()
+    return Path.home() / ".kube" / "config"
+
+
+def _upsert(entries: List[Dict], name: str, key: str, value: Dict) -> bool:
+    """Replace the entry called ``name`` (or append it); return True if it already existed."""
+    for index, entry in enumerate(entries):
+        if entry.get("name") == name:
+            entries[index] = {"name": name, key: value}
+            return True
+    entries.append({"name": name, key: value})
+    return False
+
+
+def merge_kubeconfig(
+    config: Dict, cluster: Dict, region: str, profile: Optional[str], alias: Optional[str]
+) -> bool:
+    """Add or replace the cluster, user and context the way `aws eks update-kubeconfig` does.
+
+    Returns True when the context already existed.
+    """
+    arn = cluster["arn"]
+    context_name = alias or arn
+    config.setdefault("apiVersion", "v1")
+    config.setdefault("kind", "Config")
+    config.setdefault("preferences", {})
+    for section in ("clusters", "contexts", "users"):
+        if not isinstance(config.get(section), list):
+            config[section] = []
+
+    _upsert(
+        config["clusters"],
+        arn,
+        "cluster",
+        {
+            "certificate-authority-data": cluster["certificateAuthority"]["data"],
+            "server": cluster["endpoint"],
+        },
+    )
+    user = {
+        "exec": {
+            "apiVersion": EXEC_API_VERSION,
+            "command": "aws",
+            "args": ["--region", region, "eks", "get-token", "--cluster-name", cluster["name"], "--output", "json"],
+        }
+    }
+    if profile:
+        user["exec"]["env"] = [{"name": "AWS_PROFILE", "value": profile}]
+    _upsert(config["users"], arn, "user", user)
+    existed = _upsert(config["contexts"], context_name, "context", {"cluster": arn, "user": arn})
+    config["current-context"] = context_name
+    return existed
+
+
+def write_kubeconfig(path: Path, region: str, cluster_name: str, profile: Optional[str], alias: Optional[str]) -> None:
+    import yaml
+
+    cluster = aws_client("eks", region, aws_session(profile, region)).describe_cluster(name=cluster_name)["cluster"]
+    if cluster.get("status") != "ACTIVE":
+        raise RuntimeError(f"Cluster status is {cluster.get('status')}; kubeconfig can only be written for ACTIVE clusters.")
+
+    config: Dict = {}
+    if path.exists():
+        config = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    existed = merge_kubeconfig(config, cluster, region, profile, alias)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".part")
+    partial.write_text(yaml.safe_dump(config, default_flow_style=False, sort_keys=False), encoding="utf-8")
+    # Credentials live here: keep an existing file's mode, and create new ones private.
+    partial.chmod(path.stat().st_mode & 0o777 if path.exists() else 0o600)
+    os.replace(partial, path)
+    action = "Updated" if existed else "Added new"
+    print(f"{action} context {config['current-context']} to {path}")
+
+
+def run_benchmark(region: str, cluster: str, profile: Optional[str]) -> None:
+    """Compare `aws eks describe-cluster` with the same call through boto3."""
+    command = ["aws", "eks", "describe-cluster", "--name", cluster, "--region", region]
+    if profile:
+        command.extend(["--profile", profile])
+    timings: Dict[str, List[float]] = {"aws CLI": [], "boto3 (first call)": [], "boto3 (cached client)": []}
+
+    for _ in range(BENCHMARK_RUNS):
+        started = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings["aws CLI"].append(time.perf_counter() - started)
+
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    def describe() -> None:
+        try:
+            aws_client("eks", region, aws_session(profile, region)).describe_cluster(name=cluster)
+        except (BotoCoreError, ClientError):
+            pass  # The benchmark measures round trips, not outcomes.
+
+    started = time.perf_counter()
+    describe()
+    timings["boto3 (first call)"].append(time.perf_counter() - started)
+    for _ in range(BENCHMARK_RUNS):
+        started = time.perf_counter()
+        describe()
+        timings["boto3 (cached client)"].append(time.perf_counter() - started)
+
+    print(f"describe-cluster {cluster} in {region} (median of {BENCHMARK_RUNS} runs where repeated):")
+    for label, samples in timings.items():
+        print(f"  {label:<22} {statistics.median(samples) * 1000:8.0f} ms")
+
+
 def main() -> None:
     ensure_python_version()
     tfvars = load_tfvars()
@@ -94,9 +233,30 @@ def main() -> None:
         print(" ".join(command))
         return
 
-    rc = run_streamed(command)
-    if rc != 0:
-        sys.exit(rc)
+    backend = resolve_aws_backend(args.aws_backend)
+    if args.benchmark:
+        if backend != "sdk":
+            print("❌ --benchmark needs boto3. Install it with `pip install boto3`.")
+            sys.exit(1)
+        run_benchmark(region, cluster, args.profile)
+        return
+
+    if backend == "sdk" and importlib.util.find_spec("yaml") is None:
+        print("PyYAML is not installed; using `aws eks update-kubeconfig` instead.")
+        backend = "cli"
+
+    if backend == "sdk":
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        try:
+            write_kubeconfig(kubeconfig_path(args.kubeconfig), region, cluster, args.profile, args.alias)
+        except (BotoCoreError, ClientError, RuntimeError) as err:
+            print(f"❌ Unable to update kubeconfig: {err}")
+            sys.exit(1)
+    else:
+        rc = run_streamed(command)
+        if rc != 0:
+            sys.exit(rc)
 
     print("✅ kubeconfig updated. Test connectivity with `kubectl get nodes`.")
 
@@ -19,6 +19,31 @@ output "hapi_service" {
   description = "Helm release status by deployment mode."
 }
 
+output "hapi_autoscaling" {
+  value       = { for mode, hpa in kubernetes_horizontal_pod_autoscaler_v2.hapi_fhir : mode => "${hpa.spec[0].min_replicas}-${hpa.spec[0].max_replicas} replicas" }
+  description = "HPA replica range by deployment mode."
+}
+
+output "hapi_performance_profile" {
+  value       = { for mode in local.hapi_modes : mode => local.hapi_profile_env[mode].JAVA_TOOL_OPTIONS }
+  description = "JVM options applied by the selected performance profile, by deployment mode."
+}
+
+output "pgbouncer_endpoints" {
+  value       = { for mode, service in kubernetes_service_v1.pgbouncer : mode => "${service.metadata[0].name}:${local.pgbouncer_port}" }
+  description = "In-cluster PgBouncer endpoints by deployment mode (empty unless pgbouncer_enabled)."
+}
+
+output "database_endpoints" {
+  value = {
+    for mode, cluster in aws_rds_cluster.hapi : mode => {
+      writer = "${cluster.endpoint}:${cluster.port}"
+      reader = "${cluster.reader_endpoint}:${cluster.port}"
+    }
+  }
+  description = "Aurora writer and reader endpoints by deployment mode (empty unless database_mode = external). HAPI uses the writer; the reader endpoint falls back to the writer without a failover replica."
+}
+
 output "node_ami_type" {
   value       = local.eks_node_ami_type
   description = "AMI family used for the default EKS managed node group."
@@ -0,0 +1,166 @@
+locals {
+  pgbouncer_modes = var.pgbouncer_enabled ? local.hapi_modes : []
+  pgbouncer_port  = 5432
+
+  # PgBouncer signs in to the release's database (see database.tf) with the same credentials HAPI
+  # would use directly.
+  pgbouncer_upstreams = {
+    for mode in local.pgbouncer_modes : mode => merge(local.hapi_database[mode], {
+      name = "${local.hapi_values[mode].fullnameOverride}-pgbouncer"
+    })
+  }
+}
+
+resource "kubernetes_deployment_v1" "pgbouncer" {
+  for_each = local.pgbouncer_upstreams
+
+  metadata {
+    name      = each.value.name
+    namespace = "default"
+    labels = {
+      "app.kubernetes.io/name"     = "pgbouncer"
+      "app.kubernetes.io/instance" = each.value.name
+    }
+  }
+
+  # The embedded PostgreSQL secret only appears once the Helm release installs it, and the release
+  # in turn waits for HAPI to reach the database through this deployment, so do not block on it.
+  wait_for_rollout = false
+
+  spec {
+    replicas = var.pgbouncer_replicas
+
+    selector {
+      match_labels = {
+        "app.kubernetes.io/instance" = each.value.name
+      }
+    }
+
+    template {
+      metadata {
+        labels = {
+          "app.kubernetes.io/name"     = "pgbouncer"
+          "app.kubernetes.io/instance" = each.value.name
+        }
+      }
+
+      spec {
+        node_selector = local.hapi_values[each.key].nodeSelector
+
+        dynamic "toleration" {
+          for_each = lookup(local.hapi_values[each.key], "tolerations", [])
+          content {
+            key      = toleration.value.key
+            operator = toleration.value.operator
+            value    = toleration.value.value
+            effect   = toleration.value.effect
+          }
+        }
+
+        container {
+          name  = "pgbouncer"
+          image = var.pgbouncer_image
+
+          port {
+            name           = "postgres"
+            container_port = local.pgbouncer_port
+          }
+
+          env {
+            name  = "LISTEN_PORT"
+            value = tostring(local.pgbouncer_port)
+          }
+          env {
+            name  = "DB_HOST"
+            value = each.value.host
+          }
+          env {
+            name  = "DB_NAME"
+            value = each.value.database
+          }
+          env {
+            name  = "DB_USER"
+            value = each.value.user
+          }
+          env {
+            name = "DB_PASSWORD"
+            value_from {
+              secret_key_ref {
+                name = each.value.secret
+                key  = each.value.secret_key
+              }
+            }
+          }
+          env {
+            name  = "AUTH_TYPE"
+            value = "scram-sha-256"
+          }
+          env {
+            name  = "POOL_MODE"
+            value = "transaction"
+          }
+          env {
+            name  = "DEFAULT_POOL_SIZE"
+            value = tostring(var.pgbouncer_default_pool_size)
+          }
+          env {
+            name  = "RESERVE_POOL_SIZE"
+            value = tostring(var.pgbouncer_reserve_pool_size)
+          }
+          env {
+            name  = "MAX_CLIENT_CONN"
+            value = tostring(var.pgbouncer_max_client_conn)
+          }
+          env {
+            # The PostgreSQL JDBC driver sends extra_float_digits at startup.
+            name  = "IGNORE_STARTUP_PARAMETERS"
+            value = "extra_float_digits"
+          }
+
+          resources {
+            requests = {
+              cpu    = "50m"
+              memory = "64Mi"
+            }
+            limits = {
+              cpu    = "250m"
+              memory = "128Mi"
+            }
+          }
+
+          readiness_probe {
+            tcp_socket {
+              port = local.pgbouncer_port
+            }
+            period_seconds = 10
+          }
+        }
+      }
+    }
+  }
+
+  depends_on = [module.eks, kubernetes_secret_v1.database]
+}
+
+resource "kubernetes_service_v1" "pgbouncer" {
+  for_each = local.pgbouncer_upstreams
+
+  metadata {
+    name      = each.value.name
+    namespace = "default"
+  }
+
+  spec {
+    selector = {
+      "app.kubernetes.io/instance" = each.value.name
+    }
+
+    port {
+      name        = "postgres"
+      port        = local.pgbouncer_port
+      target_port = local.pgbouncer_port
+    }
+  }
+
+  depends_on = [module.eks]
+}
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# The scripts live at the repository root and import each other as top-level modules.
+sys.path.insert(0, str(REPO_ROOT))
+
+
+@pytest.fixture
+def aws_credentials(monkeypatch):
+    """Dummy credentials so botocore never looks for real ones."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
@@ -0,0 +1,142 @@
+import hashlib
+import io
+import os
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from hapi_chart_cache import ChartCacheError, _download, _partial_path, chart_url, fetch_chart
+
+VERSION = "0.21.0"
+
+
+def make_archive() -> bytes:
+    # Incompressible content keeps the archive several CHUNK_SIZE reads long.
+    payload = os.urandom(200 * 1024)
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        info = tarfile.TarInfo("hapi-fhir-jpaserver/Chart.yaml")
+        info.size = len(payload)
+        archive.addfile(info, io.BytesIO(payload))
+    return buffer.getvalue()
+
+
+ARCHIVE = make_archive()
+ARCHIVE_SHA256 = hashlib.sha256(ARCHIVE).hexdigest()
+
+
+class ChartHandler(BaseHTTPRequestHandler):
+    """Serves ARCHIVE; ``server.behaviour`` picks how it treats the request."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get("Range"))
+        behaviour = self.server.behaviour
+        if behaviour == "short":
+            # Promise the whole archive, send half, then drop the connection.
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(ARCHIVE)))
+            self.end_headers()
+            self.wfile.write(ARCHIVE[: len(ARCHIVE) // 2])
+            self.close_connection = True
+            return
+        requested = self.headers.get("Range")
+        if requested and behaviour == "ranges":
+            start = int(requested[len("bytes="):].rstrip("-"))
+            if start >= len(ARCHIVE):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(ARCHIVE)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = ARCHIVE[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(ARCHIVE) - 1}/{len(ARCHIVE)}")
+        else:
+            # "ignore-ranges": a server or proxy that always sends the full file.
+            body = ARCHIVE
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ChartHandler)
+    httpd.behaviour = "ranges"
+    httpd.ranges = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    monkeypatch.setenv("HAPI_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("HAPI_CHART_URL", f"http://127.0.0.1:{httpd.server_address[1]}/{{filename}}")
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def partial_with(data: bytes):
+    partial = _partial_path(VERSION)
+    partial.parent.mkdir(parents=True, exist_ok=True)
+    partial.write_bytes(data)
+    return partial
+
+
+def test_resume_requests_the_remaining_range(server):
+    partial = partial_with(ARCHIVE[:1000])
+
+    assert _download(chart_url(VERSION), partial) is True
+
+    assert server.ranges == ["bytes=1000-"]
+    assert partial.read_bytes() == ARCHIVE
+
+
+def test_full_response_to_a_range_request_rewrites_the_partial(server):
+    server.behaviour = "ignore-ranges"
+    partial = partial_with(ARCHIVE[:1000])
+
+    assert _download(chart_url(VERSION), partial) is False
+
+    assert server.ranges == ["bytes=1000-"]
+    assert partial.read_bytes() == ARCHIVE
+
+
+def test_range_not_satisfiable_means_the_partial_is_complete(server):
+    partial = partial_with(ARCHIVE)
+
+    blob, source = fetch_chart(VERSION, ARCHIVE_SHA256)
+
+    assert server.ranges == [f"bytes={len(ARCHIVE)}-"]
+    assert source == "resumed"
+    assert blob.read_bytes() == ARCHIVE
+    assert not partial.exists()
+
+
+def test_short_body_is_an_error_and_the_next_run_resumes(server):
+    server.behaviour = "short"
+
+    with pytest.raises(ChartCacheError, match="Rerun to resume"):
+        fetch_chart(VERSION, ARCHIVE_SHA256)
+    assert _partial_path(VERSION).read_bytes() == ARCHIVE[: len(ARCHIVE) // 2]
+
+    server.behaviour = "ranges"
+    blob, source = fetch_chart(VERSION, ARCHIVE_SHA256)
+
+    assert server.ranges == [None, f"bytes={len(ARCHIVE) // 2}-"]
+    assert source == "resumed"
+    assert blob.read_bytes() == ARCHIVE
+
+
+def test_sha256_mismatch_discards_the_download(server):
+    with pytest.raises(ChartCacheError, match="expected"):
+        fetch_chart(VERSION, "0" * 64)
+
+    assert not _partial_path(VERSION).exists()
+    # Nothing was cached, so the correct digest downloads from scratch.
+    blob, source = fetch_chart(VERSION, ARCHIVE_SHA256)
+    assert source == "downloaded"
+    assert blob.read_bytes() == ARCHIVE
@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+
+import pytest
+
+import deploy
+from hapi_deploy_state import PLAN_FILE, changed_inputs, init_fingerprint, init_needed, input_fingerprints
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="the fake terraform is a POSIX script")
+
+# Stands in for terraform: records its argv, returns the next plan exit code from
+# FAKE_TF_PLAN_CODES, and leaves behind the files a real init or plan would write.
+FAKE_TERRAFORM = """#!{python}
+import json, os, sys
+from pathlib import Path
+
+args = sys.argv[1:]
+with open(os.environ["FAKE_TF_LOG"], "a") as log:
+    log.write(json.dumps(args) + "\\n")
+if args[0] == "init":
+    Path(".terraform").mkdir(exist_ok=True)
+    Path(".terraform.lock.hcl").write_text("# providers\\n")
+elif args[0] == "plan":
+    counter = Path(os.environ["FAKE_TF_LOG"] + ".plans")
+    calls = int(counter.read_text()) if counter.exists() else 0
+    counter.write_text(str(calls + 1))
+    code = int(os.environ["FAKE_TF_PLAN_CODES"].split(",")[calls])
+    if code != 1:
+        out = next(arg for arg in args if arg.startswith("-out="))
+        Path(out[len("-out="):]).write_text("plan")
+    sys.exit(code)
+elif args[0] == "apply":
+    sys.exit(0 if Path(args[-1]).exists() else 1)
+"""
+
+MAIN_TF = """terraform {
+  required_version = ">= 1.5"
+}
+
+module "vpc" {
+  source  = "terraform-aws-modules/vpc/aws"
+  version = "5.8.1"
+}
+"""
+
+
+@pytest.fixture
+def terraform(tmp_path, monkeypatch):
+    """Put the fake terraform on PATH in a scratch working directory; return a reader for its argv log."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "terraform"
+    script.write_text(FAKE_TERRAFORM.format(python=sys.executable))
+    script.chmod(0o755)
+    work = tmp_path / "work"
+    work.mkdir()
+    (work / "main.tf").write_text(MAIN_TF)
+    log = tmp_path / "terraform.log"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_TF_LOG", str(log))
+    monkeypatch.chdir(work)
+
+    def calls():
+        if not log.exists():
+            return []
+        return [json.loads(line) for line in log.read_text().splitlines()]
+
+    return calls
+
+
+def commands(calls):
+    return [argv[0] for argv in calls]
+
+
+def test_init_skipped_while_fingerprint_unchanged(terraform, monkeypatch):
+    state = {}
+    assert init_needed(state)
+    assert deploy.run_init() == 0
+    state["init"] = init_fingerprint()
+
+    assert not init_needed(state)
+    monkeypatch.setenv("FAKE_TF_PLAN_CODES", "0")
+    assert deploy.plan_and_apply([], init_skipped=not init_needed(state)) == "no-changes"
+    assert commands(terraform()) == ["init", "plan"]
+
+    # A new module version pin needs a fresh init.
+    with open("main.tf", "w") as handle:
+        handle.write(MAIN_TF.replace("5.8.1", "5.9.0"))
+    assert init_needed(state)
+
+
+def test_no_changes_skips_apply(terraform, monkeypatch):
+    monkeypatch.setenv("FAKE_TF_PLAN_CODES", "0")
+
+    assert deploy.plan_and_apply(["-var=region=us-east-1"], init_skipped=True) == "no-changes"
+
+    assert terraform() == [
+        [
+            "plan",
+            "-input=false",
+            "-detailed-exitcode",
+            f"-out={PLAN_FILE}",
+            "-var=region=us-east-1",
+        ]
+    ]
+    assert not PLAN_FILE.exists()
+
+
+def test_diff_applies_the_saved_plan(terraform, monkeypatch):
+    monkeypatch.setenv("FAKE_TF_PLAN_CODES", "2")
+
+    assert deploy.plan_and_apply([], init_skipped=False) == "applied"
+
+    assert terraform()[1] == ["apply", "-input=false", str(PLAN_FILE)]
+    assert commands(terraform()) == ["plan", "apply"]
+    assert not PLAN_FILE.exists()
+
+
+def test_plan_failure_with_init_skipped_retries_init_once(terraform, monkeypatch):
+    monkeypatch.setenv("FAKE_TF_PLAN_CODES", "1,2")
+
+    assert deploy.plan_and_apply([], init_skipped=True) == "applied"
+
+    assert commands(terraform()) == ["plan", "init", "plan", "apply"]
+
+
+def test_plan_failure_after_init_is_not_retried(terraform, monkeypatch):
+    monkeypatch.setenv("FAKE_TF_PLAN_CODES", "1,1")
+
+    with pytest.raises(SystemExit) as exit_info:
+        deploy.plan_and_apply([], init_skipped=False)
+
+    assert exit_info.value.code == 1
+    assert commands(terraform()) == ["plan"]
+
+
+def test_user_tf_var_exports_are_deploy_inputs(terraform, monkeypatch):
+    for name in [name for name in os.environ if name.startswith("TF_VAR_")]:
+        monkeypatch.delenv(name)
+    monkeypatch.setenv("TF_VAR_general_max_replicas", "4")
+    exports = {"TF_VAR_environment": "dev"}
+    before = input_fingerprints(exports, PLAN_FILE)
+
+    assert changed_inputs(before, input_fingerprints(exports, PLAN_FILE)) == []
+    monkeypatch.setenv("TF_VAR_general_max_replicas", "6")
+    assert changed_inputs(before, input_fingerprints(exports, PLAN_FILE)) == ["environment"]
+    monkeypatch.delenv("TF_VAR_general_max_replicas")
+    assert changed_inputs(before, input_fingerprints(exports, PLAN_FILE)) == ["environment"]
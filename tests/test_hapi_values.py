@@ -0,0 +1,145 @@
+import copy
+
+import pytest
+
+from conftest import REPO_ROOT
+from hapi_values import (
+    DATABASE_INSTANCE_CLASS_VAR,
+    DATABASE_MODE_VAR,
+    EMBEDDED_DATABASE,
+    PERFORMANCE_PROFILES,
+    PROFILE_VAR,
+    database_limit,
+    effective_values,
+    load_profiles,
+    terraform_defaults,
+    validate_profile,
+)
+
+MODES = ("general", "terminology")
+
+SMALL = {
+    "JAVA_TOOL_OPTIONS": (
+        "-XX:+UseContainerSupport -XX:InitialRAMPercentage=50.0 -XX:MaxRAMPercentage=65.0 "
+        "-XX:+UseSerialGC -XX:+ExitOnOutOfMemoryError"
+    ),
+    "SPRING_DATASOURCE_HIKARI_MAXIMUMPOOLSIZE": "5",
+    "SPRING_DATASOURCE_HIKARI_MINIMUMIDLE": "2",
+    "HAPI_FHIR_REUSE_CACHED_SEARCH_RESULTS_MILLIS": "60000",
+    "HAPI_FHIR_RETAIN_CACHED_SEARCHES_MINS": "60",
+}
+
+EXPECTED_ENV = {
+    ("small", "general"): SMALL,
+    ("small", "terminology"): SMALL,
+    ("throughput", "general"): {
+        "JAVA_TOOL_OPTIONS": (
+            "-XX:+UseContainerSupport -XX:InitialRAMPercentage=50.0 -XX:MaxRAMPercentage=75.0 "
+            "-XX:+UseG1GC -XX:+ExitOnOutOfMemoryError -XX:MaxGCPauseMillis=200"
+        ),
+        "SPRING_DATASOURCE_HIKARI_MAXIMUMPOOLSIZE": "20",
+        "SPRING_DATASOURCE_HIKARI_MINIMUMIDLE": "5",
+        "HAPI_FHIR_REUSE_CACHED_SEARCH_RESULTS_MILLIS": "60000",
+        "HAPI_FHIR_RETAIN_CACHED_SEARCHES_MINS": "60",
+    },
+    ("throughput", "terminology"): {
+        "JAVA_TOOL_OPTIONS": (
+            "-XX:+UseContainerSupport -XX:InitialRAMPercentage=50.0 -XX:MaxRAMPercentage=70.0 "
+            "-XX:+UseG1GC -XX:+ExitOnOutOfMemoryError"
+        ),
+        "SPRING_DATASOURCE_HIKARI_MAXIMUMPOOLSIZE": "10",
+        "SPRING_DATASOURCE_HIKARI_MINIMUMIDLE": "2",
+        "HAPI_FHIR_REUSE_CACHED_SEARCH_RESULTS_MILLIS": "60000",
+        "HAPI_FHIR_RETAIN_CACHED_SEARCHES_MINS": "60",
+    },
+    ("terminology-heavy", "general"): SMALL,
+    ("terminology-heavy", "terminology"): {
+        "JAVA_TOOL_OPTIONS": (
+            "-XX:+UseContainerSupport -XX:InitialRAMPercentage=50.0 -XX:MaxRAMPercentage=75.0 "
+            "-XX:+UseG1GC -XX:+ExitOnOutOfMemoryError -XX:MaxGCPauseMillis=200"
+        ),
+        "SPRING_DATASOURCE_HIKARI_MAXIMUMPOOLSIZE": "15",
+        "SPRING_DATASOURCE_HIKARI_MINIMUMIDLE": "5",
+        "HAPI_FHIR_REUSE_CACHED_SEARCH_RESULTS_MILLIS": "600000",
+        "HAPI_FHIR_RETAIN_CACHED_SEARCHES_MINS": "120",
+    },
+}
+
+
+@pytest.fixture
+def repo(monkeypatch):
+    # The values, profiles and variables files are read relative to the working directory.
+    monkeypatch.chdir(REPO_ROOT)
+
+
+@pytest.fixture
+def profiles(repo):
+    return load_profiles(REPO_ROOT / "hapi-profiles.yaml")
+
+
+def render(profile, mode, profiles, **overrides):
+    # terraform_variables() without TF_VAR_* or tfvars, so the result does not depend on the machine.
+    defaults = {key: value for key, value in terraform_defaults().items() if value not in ("", "null")}
+    variables = {**defaults, PROFILE_VAR: profile, **overrides}
+    return variables, effective_values(mode, variables, profiles)
+
+
+def test_profiles_file_matches_the_known_profiles(profiles):
+    assert set(profiles) == set(PERFORMANCE_PROFILES)
+    assert set(EXPECTED_ENV) == {(profile, mode) for profile in PERFORMANCE_PROFILES for mode in MODES}
+
+
+@pytest.mark.parametrize("profile, mode", sorted(EXPECTED_ENV))
+def test_profile_renders_exact_environment(profiles, profile, mode):
+    _, values = render(profile, mode, profiles)
+
+    env = {entry["name"]: entry["value"] for entry in values["extraEnv"]}
+    for name, expected in EXPECTED_ENV[(profile, mode)].items():
+        assert env[name] == expected
+    assert values["resources"] == profiles[profile][mode]["resources"]
+
+
+@pytest.mark.parametrize("profile, mode", sorted(EXPECTED_ENV))
+def test_shipped_profiles_fit_the_embedded_database(profiles, profile, mode):
+    variables, values = render(profile, mode, profiles)
+
+    assert database_limit(variables) == EMBEDDED_DATABASE
+    assert validate_profile(profiles[profile][mode], values) == []
+
+
+@pytest.mark.parametrize("profile, mode", sorted(EXPECTED_ENV))
+def test_shipped_profiles_render_for_aurora(profiles, profile, mode):
+    variables, values = render(profile, mode, profiles, **{DATABASE_MODE_VAR: "external"})
+
+    env = {entry["name"]: entry["value"] for entry in values["extraEnv"]}
+    assert {name: env[name] for name in EXPECTED_ENV[(profile, mode)]} == EXPECTED_ENV[(profile, mode)]
+    assert values["postgresql"]["enabled"] is False
+    assert values["externalDatabase"]["user"] == "hapi"
+    assert validate_profile(profiles[profile][mode], values, database=database_limit(variables)) == []
+
+
+def test_pool_times_max_replicas_above_max_connections_is_rejected(profiles):
+    settings = copy.deepcopy(profiles["throughput"]["general"])
+    settings["database"]["maxPoolSize"] = 30
+    values = {"autoscaling": {"enabled": True, "maxReplicas": 4}}
+    available = EMBEDDED_DATABASE[0]
+
+    errors = validate_profile(settings, values)
+
+    assert len(errors) == 1
+    assert f"4 replicas x database.maxPoolSize=30 exceeds the {available} connections" in errors[0]
+    # With autoscaling off the replica count is the ceiling.
+    assert validate_profile(settings, {"autoscaling": {"enabled": False}, "replicaCount": 3}) == []
+
+
+def test_aurora_limit_follows_the_instance_class(profiles):
+    variables = {DATABASE_MODE_VAR: "external", DATABASE_INSTANCE_CLASS_VAR: "db.t4g.medium"}
+    settings = copy.deepcopy(profiles["throughput"]["general"])
+    settings["database"]["maxPoolSize"] = 30
+    values = {"autoscaling": {"enabled": True, "maxReplicas": 4}}
+
+    # LEAST(4 GiB / 9531392, 5000) = 450, less the reserved connections.
+    assert database_limit(variables) == (440, "an Aurora db.t4g.medium writer")
+    assert validate_profile(settings, values, database=database_limit(variables)) == []
+    values["autoscaling"]["maxReplicas"] = 15
+    assert validate_profile(settings, values, database=database_limit(variables))
@@ -0,0 +1,112 @@
+import math
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+import hapi_aws_common
+from hapi_aws_common import LOAD_BALANCER_BATCH_SIZE
+from inventory import collect_load_balancers
+
+# DescribeLoadBalancers returns at most 400 load balancers per page.
+PAGE_SIZE = 400
+
+
+def lb_arn(index: int) -> str:
+    return f"arn:aws:elasticloadbalancing:us-east-1:123456789012:loadbalancer/app/lb-{index}/{index:016x}"
+
+
+def environment(index: int) -> str:
+    return "dev" if index % 2 == 0 else "prod"
+
+
+@pytest.fixture
+def elbv2(aws_credentials):
+    return boto3.client("elbv2", region_name="us-east-1")
+
+
+def stub_account(client, count: int):
+    """Queue ``count`` load balancers in 400-LB pages, each followed by its describe_tags batches.
+
+    describe_tags batches of one page run on a pool, so their responses are queued
+    without expected parameters; the ARNs each call asked for are recorded instead.
+    """
+    stubber = Stubber(client)
+    tag_calls = []
+    client.meta.events.register(
+        "provide-client-params.*.DescribeTags",
+        lambda params, **_: tag_calls.append(list(params["ResourceArns"])),
+    )
+    for start in range(0, count, PAGE_SIZE):
+        indexes = range(start, min(start + PAGE_SIZE, count))
+        page = {
+            "LoadBalancers": [
+                {
+                    "LoadBalancerArn": lb_arn(index),
+                    "LoadBalancerName": f"lb-{index}",
+                    "Type": "application",
+                    "State": {"Code": "active"},
+                    "Scheme": "internet-facing",
+                }
+                for index in indexes
+            ]
+        }
+        if indexes.stop < count:
+            page["NextMarker"] = str(indexes.stop)
+        stubber.add_response("describe_load_balancers", page)
+        for batch_start in range(indexes.start, indexes.stop, LOAD_BALANCER_BATCH_SIZE):
+            batch = range(batch_start, min(batch_start + LOAD_BALANCER_BATCH_SIZE, indexes.stop))
+            stubber.add_response(
+                "describe_tags",
+                {
+                    "TagDescriptions": [
+                        {"ResourceArn": lb_arn(index), "Tags": [{"Key": "Environment", "Value": environment(index)}]}
+                        for index in batch
+                    ]
+                },
+                expected_params=None,
+            )
+    stubber.activate()
+    return stubber, tag_calls
+
+
+def scan(client, count: int, monkeypatch):
+    """Run collect_load_balancers over ``count`` stubbed LBs; return records, tag calls and tag joins."""
+    stubber, tag_calls = stub_account(client, count)
+    joins = []
+    real_tag_dict = hapi_aws_common.tag_dict
+
+    def counting_tag_dict(tags):
+        joins.append(1)
+        return real_tag_dict(tags)
+
+    monkeypatch.setattr(hapi_aws_common, "tag_dict", counting_tag_dict)
+    records = list(collect_load_balancers(client, "dev"))
+    stubber.assert_no_pending_responses()
+    return records, tag_calls, len(joins)
+
+
+@pytest.mark.parametrize("count", [1000, 5000])
+def test_describe_tags_is_batched_by_twenty(elbv2, monkeypatch, count):
+    records, tag_calls, _ = scan(elbv2, count, monkeypatch)
+
+    assert len(tag_calls) == math.ceil(count / LOAD_BALANCER_BATCH_SIZE)
+    assert max(len(arns) for arns in tag_calls) <= LOAD_BALANCER_BATCH_SIZE
+    requested = [arn for arns in tag_calls for arn in arns]
+    assert sorted(requested) == sorted(lb_arn(index) for index in range(count))
+
+    assert sorted(record.arn for record in records) == sorted(
+        lb_arn(index) for index in range(count) if environment(index) == "dev"
+    )
+    assert all(record.tags == {"Environment": "dev"} for record in records)
+
+
+def test_tag_join_work_grows_linearly(aws_credentials, monkeypatch):
+    small_records, small_calls, small_joins = scan(boto3.client("elbv2", region_name="us-east-1"), 1000, monkeypatch)
+    large_records, large_calls, large_joins = scan(boto3.client("elbv2", region_name="us-east-1"), 5000, monkeypatch)
+
+    # Each ARN is sent once and each tag description is converted once: no per-LB
+    # rescans of the batch results, so five times the LBs is five times the work.
+    assert small_joins == 1000 and large_joins == 5000
+    assert len(large_calls) == 5 * len(small_calls)
+    assert len(large_records) == 5 * len(small_records)
@@ -0,0 +1,95 @@
+import time
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+import cleanup
+import hapi_aws_common
+from hapi_aws_common import poll_until_settled
+
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    monkeypatch.setattr(hapi_aws_common, "POLL_INITIAL_DELAY", 0.01)
+    monkeypatch.setattr(hapi_aws_common, "POLL_MAX_DELAY", 0.01)
+
+
+def test_each_id_can_have_its_own_deadline():
+    lookups = []
+    settles_on_tick = {"fast": 3}
+
+    def lookup(ids):
+        lookups.append(list(ids))
+        tick = len(lookups)
+        return {rid: "deleting" for rid in ids if tick < settles_on_tick.get(rid, 10 ** 6)}
+
+    expired = poll_until_settled(
+        lookup,
+        ["stuck", "fast"],
+        lambda state: state is None,
+        "thing",
+        timeout=60,
+        deadlines={"stuck": time.monotonic()},
+    )
+
+    # "stuck" ran out after the first tick; "fast" kept being polled until it settled.
+    assert expired == ["stuck"]
+    assert lookups == [["stuck", "fast"], ["fast"], ["fast"]]
+
+
+def test_shared_deadline_returns_everything_outstanding():
+    expired = poll_until_settled(
+        lambda ids: {rid: "deleting" for rid in ids}, ["a", "b"], lambda state: state is None, "thing", timeout=0
+    )
+
+    assert expired == ["a", "b"]
+
+
+def test_node_groups_are_polled_against_their_own_deadlines(aws_credentials, monkeypatch):
+    eks = boto3.client("eks", region_name="us-east-1")
+    stubber = Stubber(eks)
+    stubber.add_response("list_nodegroups", {"nodegroups": ["general", "terminology"]}, {"clusterName": "hapi"})
+    stubber.add_response("delete_nodegroup", {}, {"clusterName": "hapi", "nodegroupName": "general"})
+    stubber.add_client_error(
+        "delete_nodegroup",
+        "ResourceInUseException",
+        expected_params={"clusterName": "hapi", "nodegroupName": "terminology"},
+    )
+    # Tick 1: both still deleting. Tick 2: general is gone, terminology failed.
+    for name in ("general", "terminology"):
+        stubber.add_response(
+            "describe_nodegroup",
+            {"nodegroup": {"nodegroupName": name, "status": "DELETING"}},
+            {"clusterName": "hapi", "nodegroupName": name},
+        )
+    stubber.add_client_error(
+        "describe_nodegroup",
+        "ResourceNotFoundException",
+        expected_params={"clusterName": "hapi", "nodegroupName": "general"},
+    )
+    stubber.add_response(
+        "describe_nodegroup",
+        {"nodegroup": {"nodegroupName": "terminology", "status": "DELETE_FAILED"}},
+        {"clusterName": "hapi", "nodegroupName": "terminology"},
+    )
+    calls = []
+    real_poll = cleanup.poll_until_settled
+
+    def recording_poll(*args, **kwargs):
+        calls.append(kwargs)
+        return real_poll(*args, **kwargs)
+
+    monkeypatch.setattr(cleanup, "poll_until_settled", recording_poll)
+    started = time.monotonic()
+
+    with stubber:
+        cleanup.delete_nodegroups(eks, "hapi")
+
+    stubber.assert_no_pending_responses()
+    deadlines = calls[0]["deadlines"]
+    assert set(deadlines) == {"general", "terminology"}
+    assert all(
+        started + cleanup.NODEGROUP_TIMEOUT <= deadline <= time.monotonic() + cleanup.NODEGROUP_TIMEOUT
+        for deadline in deadlines.values()
+    )
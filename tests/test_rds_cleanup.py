@@ -0,0 +1,150 @@
+import boto3
+import pytest
+from botocore.stub import Stubber
+from moto import mock_aws
+
+import cleanup
+import hapi_aws_common
+from hapi_aws_common import RDS_GROUP_RESOURCE_TYPES, rds_tag_index
+from inventory import collect_rds
+
+REGION = "us-east-1"
+DEV = [{"Key": "Environment", "Value": "dev"}]
+
+
+@pytest.fixture(autouse=True)
+def fresh_tag_cache(monkeypatch):
+    monkeypatch.setattr(hapi_aws_common, "_TAGGED_RESOURCES", {})
+    monkeypatch.setattr(hapi_aws_common, "POLL_INITIAL_DELAY", 0.01)
+
+
+@pytest.fixture
+def rds(aws_credentials):
+    with mock_aws():
+        ec2 = boto3.client("ec2", region_name=REGION)
+        client = boto3.client("rds", region_name=REGION)
+        vpc_id = ec2.create_vpc(CidrBlock="10.0.0.0/16")["Vpc"]["VpcId"]
+        subnet_ids = [
+            ec2.create_subnet(VpcId=vpc_id, CidrBlock=f"10.0.{index}.0/24", AvailabilityZone=f"{REGION}{zone}")[
+                "Subnet"
+            ]["SubnetId"]
+            for index, zone in enumerate("ab")
+        ]
+        # One tagged and one untagged copy of everything the Aurora mode creates.
+        for name, tags in (("hapi-db", DEV), ("other-db", [])):
+            client.create_db_subnet_group(
+                DBSubnetGroupName=name, DBSubnetGroupDescription=name, SubnetIds=subnet_ids, Tags=tags
+            )
+        for name, tags in (("hapi-cluster-params", DEV), ("other-cluster-params", [])):
+            client.create_db_cluster_parameter_group(
+                DBClusterParameterGroupName=name,
+                DBParameterGroupFamily="aurora-postgresql16",
+                Description=name,
+                Tags=tags,
+            )
+        for name, tags in (("hapi-params", DEV), ("other-params", [])):
+            client.create_db_parameter_group(
+                DBParameterGroupName=name, DBParameterGroupFamily="aurora-postgresql16", Description=name, Tags=tags
+            )
+        # AWS-managed groups are skipped even if they somehow carry the environment tag.
+        client.create_db_parameter_group(
+            DBParameterGroupName="default.aurora-postgresql16",
+            DBParameterGroupFamily="aurora-postgresql16",
+            Description="default",
+            Tags=DEV,
+        )
+        client.create_db_cluster_parameter_group(
+            DBClusterParameterGroupName="default.aurora-postgresql16",
+            DBParameterGroupFamily="aurora-postgresql16",
+            Description="default",
+        )
+        for prefix, tags in (("hapi", DEV), ("other", [])):
+            client.create_db_cluster(
+                DBClusterIdentifier=f"{prefix}-general",
+                Engine="aurora-postgresql",
+                EngineVersion="16.4",
+                MasterUsername="hapi",
+                MasterUserPassword="not-a-real-password",
+                DBSubnetGroupName=f"{prefix}-db",
+                DBClusterParameterGroupName=f"{prefix}-cluster-params",
+                Tags=tags,
+            )
+            client.create_db_instance(
+                DBInstanceIdentifier=f"{prefix}-general-1",
+                DBClusterIdentifier=f"{prefix}-general",
+                Engine="aurora-postgresql",
+                DBInstanceClass="db.t4g.medium",
+                DBParameterGroupName=f"{prefix}-params",
+                Tags=tags,
+            )
+        yield client
+
+
+def remaining(client):
+    return {
+        "db_cluster": {c["DBClusterIdentifier"] for c in client.describe_db_clusters()["DBClusters"]},
+        "db_instance": {db["DBInstanceIdentifier"] for db in client.describe_db_instances()["DBInstances"]},
+        "db_subnet_group": {g["DBSubnetGroupName"] for g in client.describe_db_subnet_groups()["DBSubnetGroups"]},
+        "db_cluster_parameter_group": {
+            g["DBClusterParameterGroupName"]
+            for g in client.describe_db_cluster_parameter_groups()["DBClusterParameterGroups"]
+        },
+        "db_parameter_group": {
+            g["DBParameterGroupName"] for g in client.describe_db_parameter_groups()["DBParameterGroups"]
+        },
+    }
+
+
+def test_collect_rds_lists_only_the_tagged_set(rds):
+    tagging = boto3.client("resourcegroupstaggingapi", region_name=REGION)
+
+    records = {(record.resource_type, record.resource_id) for record in collect_rds(rds, tagging, "dev")}
+
+    assert records == {
+        ("db_cluster", "hapi-general"),
+        ("db_instance", "hapi-general-1"),
+        ("db_subnet_group", "hapi-db"),
+        ("db_cluster_parameter_group", "hapi-cluster-params"),
+        ("db_parameter_group", "hapi-params"),
+    }
+
+
+def test_teardown_deletes_only_the_tagged_set(rds):
+    tagging = boto3.client("resourcegroupstaggingapi", region_name=REGION)
+    steps = cleanup.build_teardown_steps(None, None, None, None, rds, "hapi", "dev", rds_tagging_client=tagging)
+
+    for name in ("db_instances", "db_clusters", "db_subnet_groups", "db_parameter_groups"):
+        steps[name]()
+
+    assert remaining(rds) == {
+        "db_cluster": {"other-general"},
+        "db_instance": {"other-general-1"},
+        "db_subnet_group": {"other-db"},
+        "db_cluster_parameter_group": {"other-cluster-params", "default.aurora-postgresql16"},
+        "db_parameter_group": {"other-params", "default.aurora-postgresql16"},
+    }
+
+
+def test_rds_tag_index_uses_one_tagging_listing(aws_credentials):
+    rds = boto3.client("rds", region_name=REGION)
+    tagging = boto3.client("resourcegroupstaggingapi", region_name=REGION)
+    arns = [f"arn:aws:rds:{REGION}:123456789012:subgrp:group-{index}" for index in range(50)]
+
+    tagging_stub = Stubber(tagging)
+    tagging_stub.add_response(
+        "get_resources",
+        {"ResourceTagMappingList": [{"ResourceARN": arns[0], "Tags": [{"Key": "Environment", "Value": "dev"}]}]},
+        {
+            "ResourceTypeFilters": list(RDS_GROUP_RESOURCE_TYPES),
+            "TagFilters": [{"Key": "Environment", "Values": ["dev"]}],
+        },
+    )
+    # No responses queued: any per-group list_tags_for_resource call fails the test.
+    rds_stub = Stubber(rds)
+
+    with tagging_stub, rds_stub:
+        index = rds_tag_index(rds, arns, "dev", tagging)
+
+    tagging_stub.assert_no_pending_responses()
+    assert index[arns[0]] == {"Environment": "dev"}
+    assert all(index[arn] == {} for arn in arns[1:])
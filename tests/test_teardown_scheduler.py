@@ -0,0 +1,147 @@
+import threading
+
+import pytest
+
+from cleanup import TEARDOWN_DEPENDENCIES, StepResult, critical_path, print_teardown_report, run_teardown
+
+
+class Recorder:
+    """Stub steps that log when they start and finish."""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def log(self, event, name):
+        with self.lock:
+            self.events.append((event, name))
+
+    def step(self, name, action=None):
+        def run():
+            self.log("start", name)
+            if action is not None:
+                action()
+            self.log("finish", name)
+
+        return run
+
+    def index(self, event, name):
+        return self.events.index((event, name))
+
+    def started(self):
+        return {name for event, name in self.events if event == "start"}
+
+
+def test_steps_start_only_after_their_prerequisites_finish():
+    recorder = Recorder()
+    steps = {name: recorder.step(name) for name in TEARDOWN_DEPENDENCIES}
+
+    results = run_teardown(steps, TEARDOWN_DEPENDENCIES, max_workers=4)
+
+    assert {name: result.status for name, result in results.items()} == {
+        name: "ok" for name in TEARDOWN_DEPENDENCIES
+    }
+    for name, prerequisites in TEARDOWN_DEPENDENCIES.items():
+        for prerequisite in prerequisites:
+            assert recorder.index("finish", prerequisite) < recorder.index("start", name)
+            assert results[prerequisite].finished <= results[name].started
+
+
+def test_unrelated_branches_run_at_the_same_time():
+    # Each branch waits for the other to start: run one after the other, both time out.
+    both_running = threading.Barrier(2, timeout=5)
+    recorder = Recorder()
+    dependencies = {"nodegroups": (), "cluster": ("nodegroups",), "db_instances": ()}
+    steps = {
+        "nodegroups": recorder.step("nodegroups", both_running.wait),
+        "cluster": recorder.step("cluster"),
+        "db_instances": recorder.step("db_instances", both_running.wait),
+    }
+
+    results = run_teardown(steps, dependencies, max_workers=2)
+
+    assert {name: result.status for name, result in results.items()} == {
+        "nodegroups": "ok",
+        "cluster": "ok",
+        "db_instances": "ok",
+    }
+    assert results["nodegroups"].started < results["db_instances"].finished
+    assert results["db_instances"].started < results["nodegroups"].finished
+
+
+def test_dependents_of_a_failed_step_are_skipped():
+    recorder = Recorder()
+
+    def fail():
+        raise RuntimeError("DependencyViolation")
+
+    dependencies = {"cluster": (), "load_balancers": ("cluster",), "nat_gateways": ("load_balancers",), "iam": ()}
+    steps = {
+        "cluster": recorder.step("cluster", fail),
+        "load_balancers": recorder.step("load_balancers"),
+        "nat_gateways": recorder.step("nat_gateways"),
+        "iam": recorder.step("iam"),
+    }
+
+    results = run_teardown(steps, dependencies)
+
+    assert results["cluster"].status == "failed"
+    assert results["cluster"].error == "DependencyViolation"
+    assert results["load_balancers"].status == "skipped"
+    assert results["load_balancers"].error == "prerequisite cluster did not complete"
+    assert results["nat_gateways"].status == "skipped"
+    assert results["nat_gateways"].error == "prerequisite load_balancers did not complete"
+    assert results["iam"].status == "ok"
+    assert recorder.started() == {"cluster", "iam"}
+
+
+@pytest.mark.parametrize(
+    "dependencies, message",
+    [
+        ({"cluster": ("nodegroups",)}, "unknown step nodegroups"),
+        ({"cluster": ("vpcs",), "vpcs": ("cluster",)}, "cycle"),
+    ],
+)
+def test_broken_graphs_are_rejected_before_anything_runs(dependencies, message):
+    recorder = Recorder()
+    steps = {name: recorder.step(name) for name in ("cluster", "vpcs") if name in dependencies}
+
+    with pytest.raises(ValueError, match=message):
+        run_teardown(steps, dependencies)
+    assert recorder.events == []
+
+
+# A diamond: a -> (b, c) -> d, plus e on its own branch.
+DIAMOND = {"a": (), "b": ("a",), "c": ("a",), "d": ("b", "c"), "e": ()}
+DIAMOND_RESULTS = {
+    "a": StepResult("a", "ok", 0.0, 1.0),
+    "b": StepResult("b", "ok", 1.0, 6.0),
+    "c": StepResult("c", "ok", 1.0, 3.0),
+    "d": StepResult("d", "ok", 6.0, 7.0),
+    "e": StepResult("e", "ok", 0.0, 3.5),
+}
+
+
+def test_critical_path_is_the_longest_dependent_chain():
+    seconds, path = critical_path(DIAMOND_RESULTS, DIAMOND)
+
+    assert path == ["a", "b", "d"]
+    assert seconds == pytest.approx(7.0)
+    assert sum(result.seconds for result in DIAMOND_RESULTS.values()) == pytest.approx(12.5)
+
+
+def test_critical_path_ignores_steps_that_did_not_run():
+    results = {name: result for name, result in DIAMOND_RESULTS.items() if name != "b"}
+
+    seconds, path = critical_path(results, DIAMOND)
+
+    assert path == ["a", "c", "d"]
+    assert seconds == pytest.approx(4.0)
+
+
+def test_report_compares_serial_time_with_the_critical_path(capsys):
+    print_teardown_report(DIAMOND_RESULTS, DIAMOND)
+
+    output = capsys.readouterr().out
+    assert "Serial time 12.5s | critical path 7.0s | wall clock 7.0s" in output
+    assert "Critical path: a -> b -> d" in output
@@ -111,3 +111,163 @@ variable "hapi_mode" {
     error_message = "Valid values for hapi_mode are: general, terminology, both."
   }
 }
+
+variable "hapi_performance_profile" {
+  description = "JVM, connection pool and search cache profile from hapi-profiles.yaml: 'small', 'throughput', or 'terminology-heavy'"
+  type        = string
+  default     = "small"
+
+  validation {
+    condition     = contains(["small", "throughput", "terminology-heavy"], var.hapi_performance_profile)
+    error_message = "Valid values for hapi_performance_profile are: small, throughput, terminology-heavy."
+  }
+}
+
+variable "hapi_autoscaling_enabled" {
+  description = "Create a HorizontalPodAutoscaler for each HAPI release (null keeps autoscaling.enabled from the values files)"
+  type        = bool
+  default     = null
+}
+
+variable "general_min_replicas" {
+  description = "HPA replica floor for the general release (null keeps the values file setting)"
+  type        = number
+  default     = null
+}
+
+variable "general_max_replicas" {
+  description = "HPA replica ceiling for the general release (null keeps the values file setting)"
+  type        = number
+  default     = null
+}
+
+variable "general_target_cpu_utilization" {
+  description = "Average CPU utilization, in percent of requests, the general HPA scales towards"
+  type        = number
+  default     = null
+}
+
+variable "general_target_requests_per_second" {
+  description = "Average requests per second per general pod the HPA scales towards (0 disables)"
+  type        = number
+  default     = null
+}
+
+variable "terminology_min_replicas" {
+  description = "HPA replica floor for the terminology release (null keeps the values file setting)"
+  type        = number
+  default     = null
+}
+
+variable "terminology_max_replicas" {
+  description = "HPA replica ceiling for the terminology release; one pod per terminology node"
+  type        = number
+  default     = null
+}
+
+variable "terminology_target_cpu_utilization" {
+  description = "Average CPU utilization, in percent of requests, the terminology HPA scales towards"
+  type        = number
+  default     = null
+}
+
+variable "terminology_target_requests_per_second" {
+  description = "Average requests per second per terminology pod the HPA scales towards (0 disables)"
+  type        = number
+  default     = null
+}
+
+variable "hapi_request_rate_metric" {
+  description = "Per-pod custom metric (served by a metrics adapter) used for request-rate targets"
+  type        = string
+  default     = "http_server_requests_per_second"
+}
+
+variable "hapi_pdb_enabled" {
+  description = "Create the chart's PodDisruptionBudget for each release (null keeps the values file setting)"
+  type        = bool
+  default     = null
+}
+
+variable "pgbouncer_enabled" {
+  description = "Route each HAPI release's database connections through a PgBouncer deployment in transaction pooling mode"
+  type        = bool
+  default     = false
+}
+
+variable "pgbouncer_image" {
+  description = "PgBouncer container image (configured through the edoburu/pgbouncer environment variables)"
+  type        = string
+  default     = "edoburu/pgbouncer:v1.23.1-p3"
+}
+
+variable "pgbouncer_replicas" {
+  description = "PgBouncer pods per HAPI release; each keeps its own server connection pool"
+  type        = number
+  default     = 2
+}
+
+variable "pgbouncer_default_pool_size" {
+  description = "Server connections each PgBouncer pod opens to PostgreSQL"
+  type        = number
+  default     = 20
+}
+
+variable "pgbouncer_reserve_pool_size" {
+  description = "Extra server connections each PgBouncer pod may open when clients wait"
+  type        = number
+  default     = 5
+}
+
+variable "pgbouncer_max_client_conn" {
+  description = "Client (HAPI Hikari) connections each PgBouncer pod accepts"
+  type        = number
+  default     = 200
+}
+
+variable "database_mode" {
+  description = "Where HAPI stores its data: the chart's embedded PostgreSQL or an Aurora PostgreSQL cluster per release (external)"
+  type        = string
+  default     = "embedded"
+
+  validation {
+    condition     = contains(["embedded", "external"], var.database_mode)
+    error_message = "database_mode must be either embedded or external."
+  }
+}
+
+variable "database_engine_version" {
+  description = "Aurora PostgreSQL engine version for database_mode = external"
+  type        = string
+  default     = "16.4"
+}
+
+variable "database_instance_class" {
+  description = "Instance class of the Aurora writer (and failover replica) instances"
+  type        = string
+  default     = "db.t4g.medium"
+}
+
+variable "database_failover_replica_enabled" {
+  description = "Add a standby Aurora replica per cluster for faster writer failover. Failover only: HAPI sends every query to the writer, so the replica serves no HAPI traffic"
+  type        = bool
+  default     = false
+}
+
+variable "database_backup_retention_days" {
+  description = "Days Aurora keeps automated backups"
+  type        = number
+  default     = 7
+}
+
+variable "database_skip_final_snapshot" {
+  description = "Delete Aurora clusters without a final snapshot on destroy (set false to keep one)"
+  type        = bool
+  default     = true
+}
+
+variable "database_log_min_duration_ms" {
+  description = "Log statements running longer than this many milliseconds (-1 disables)"
+  type        = number
+  default     = 1000
+}
@@ -93,6 +93,10 @@ module "eks" {
     kube-proxy = {
       most_recent = true
     }
+    # Resource metrics for the HAPI HorizontalPodAutoscalers.
+    metrics-server = {
+      most_recent = true
+    }
     vpc-cni = {
       before_compute              = true
       most_recent                 = true